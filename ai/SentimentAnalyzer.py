@@ -1,22 +1,73 @@
 import openai
-from typing import Tuple, Optional
+from typing import Tuple, Optional, List, Dict
 import json
 import logging
 from config.config import BASE_URL, API_KEY, MODEL
+from ai.rate_limiter import RateLimiter, estimate_tokens
+from ai.response_cache import ResponseCache, get_response_cache, content_hash
+import threading
 logger = logging.getLogger(__name__)
 
+# 批量分析时每篇文章内容的最大字符数，避免单次请求过长
+BATCH_CONTENT_CHARS = 4000
+
+# 提示词模板版本，修改对应提示词后需递增，使旧的缓存结果失效
+PROMPT_VERSION_JSON = "json-v1"
+PROMPT_VERSION_TOOLS = "tools-v1"
+PROMPT_VERSION_BATCH = "batch-v1"
+
 class SentimentAnalyzer:
     """市场情绪分析器"""
     
-    def __init__(self, base_url: str = BASE_URL, api_key: str = API_KEY, model: str = MODEL):
+    def __init__(self, base_url: str = BASE_URL, api_key: str = API_KEY, model: str = MODEL,
+                 limiter: Optional[RateLimiter] = None, cache: Optional[ResponseCache] = None, use_cache: bool = True):
         self.client = openai.OpenAI(base_url=base_url, api_key=api_key)
         self.model = model
+        self.limiter = limiter
+        self.cache = cache or (get_response_cache() if use_cache else None)
+        # 缓存命中统计
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._stats_lock = threading.Lock()
+    
+    def _cache_get(self, prompt_version: str, title: str, content: str) -> Optional[Tuple[str, float, str]]:
+        """查询结果缓存并记录命中情况"""
+        if not self.cache:
+            return None
+        result = self.cache.get(self.model, prompt_version, content_hash(title, content))
+        with self._stats_lock:
+            if result:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        if result:
+            logger.info(f"命中LLM结果缓存: {title[:50] if title else ''}")
+        return result
+    
+    def _cache_put(self, prompt_version: str, title: str, content: str, result: Tuple[str, float, str]):
+        """缓存成功的分析结果，失败的默认结果不缓存"""
+        if self.cache:
+            self.cache.put(self.model, prompt_version, content_hash(title, content), result)
+    
+    @property
+    def cache_hit_rate(self) -> float:
+        """本分析器实例的缓存命中率"""
+        total = self.cache_hits + self.cache_misses
+        return self.cache_hits / total if total else 0.0
+    
+    def _throttle(self, *texts: str, completion_tokens: int = 500):
+        """发出请求前按估算的token数限流"""
+        if self.limiter:
+            self.limiter.acquire(estimate_tokens(*texts, completion_tokens=completion_tokens))
     
     def analyze_with_tools(self, title: str, content: str) -> Tuple[str, float, str]:
         """
         使用工具函数模式分析新闻情感（备用方案）
         返回: (情感类型, 情感分数, 中文摘要)
         """
+        cached = self._cache_get(PROMPT_VERSION_TOOLS, title, content)
+        if cached:
+            return cached
         try:
             # 定义工具函数
             tools = [
@@ -59,6 +110,7 @@ class SentimentAnalyzer:
             """
             
             # 调用API
+            self._throttle(prompt)
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
@@ -82,6 +134,7 @@ class SentimentAnalyzer:
                 sentiment = 'neutral'
             
             logger.info(f"工具函数模式分析完成: {sentiment} ({score}) - {chinese_summary}")
+            self._cache_put(PROMPT_VERSION_TOOLS, title, content, (sentiment, score, chinese_summary))
             return sentiment, score, chinese_summary
             
         except Exception as e:
@@ -93,6 +146,9 @@ class SentimentAnalyzer:
         分析新闻情感
         返回: (情感类型, 情感分数)
         """
+        cached = self._cache_get(PROMPT_VERSION_JSON, title, content)
+        if cached:
+            return cached
         try:
             # 优化后的提示词，更加结构化和明确
             prompt = f"""
@@ -129,6 +185,7 @@ class SentimentAnalyzer:
             请只返回JSON格式的结果，不要包含任何其他文本。
             """
             
+            self._throttle(prompt)
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
@@ -172,8 +229,126 @@ class SentimentAnalyzer:
                 sentiment = 'neutral'
             
             logger.info(f"情感分析完成: {sentiment} ({score}) - {chinese_summary}")
+            self._cache_put(PROMPT_VERSION_JSON, title, content, (sentiment, score, chinese_summary))
             return sentiment, score, chinese_summary
             
         except Exception as e:
             logger.error(f"情感分析失败: {e} - 标题: {title}", exc_info=True)
             return "neutral", 0.0, "分析失败"
+
+    def analyze_batch(self, articles: List[Dict]) -> Dict[str, Tuple[str, float, str]]:
+        """
+        在一次请求中批量分析多篇新闻，系统提示词与分析要求只发送一次
+        
+        参数:
+            articles: 文章列表，每项包含id、title、content
+        
+        返回:
+            Dict[str, Tuple[str, float, str]]: 文章ID到 (情感类型, 情感分数, 中文摘要) 的映射。
+            批量结果中缺失或校验不通过的文章会单独调用analyze重新分析
+        """
+        if not articles:
+            return {}
+        if len(articles) == 1:
+            article = articles[0]
+            return {article['id']: self.analyze(article['title'], article['content'])}
+        
+        # 已缓存的文章不再发送
+        results = {}
+        pending = []
+        for article in articles:
+            cached = self._cache_get(PROMPT_VERSION_BATCH, article.get('title'), article.get('content'))
+            if cached:
+                results[article['id']] = cached
+            else:
+                pending.append(article)
+        if not pending:
+            return results
+        
+        # 使用序号作为批内ID，避免原始ID过长或含特殊字符
+        by_index = {str(i): article for i, article in enumerate(pending, 1)}
+        try:
+            blocks = []
+            for index, article in by_index.items():
+                content = (article.get('content') or '')[:BATCH_CONTENT_CHARS]
+                blocks.append(f"### 新闻 {index}\n标题: {article.get('title') or ''}\n内容: {content}")
+            news_text = "\n\n".join(blocks)
+            
+            prompt = f"""
+            你是专业的加密货币市场分析师，擅长分析新闻对市场情绪的影响。下面共有 {len(by_index)} 条新闻，请逐条独立分析：
+            
+            ## 分析对象
+            {news_text}
+            
+            ## 分析要求
+            1. 识别新闻中提到的具体加密货币（如比特币、以太坊等）
+            2. 分析新闻对整体加密货币市场或特定币种的影响
+            3. 考虑市场当前可能的反应和投资者情
+            4. 忽略不相关的背景信息，聚焦核心内容
+            
+            ## 评分标准
+            - 情感类型：必须是positive（积极）、negative（消极）或neutral（中性）之一
+            - 情感分数：-1.0（极度负面）到1.0（极度正面）的浮点数
+            
+            ## 输出格式（必须严格遵守）
+            {{
+                "results": [
+                    {{"id": "新闻编号", "sentiment": "positive/negative/neutral", "score": 0.0, "chinese_summary": "新闻的中文摘要"}}
+                ]
+            }}
+            
+            results中每条新闻对应一项，id使用上面"### 新闻"后的编号。请只返回JSON格式的结果，不要包含任何其他文本。
+            """
+            
+            self._throttle(prompt, completion_tokens=200 * len(by_index))
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "你是深耕加密货币领域的市场情绪分析师，精通链上数据、宏观政策与热点事件对行情的即时影响，尤其擅长从话题热度与资金流向中提炼可操作的情绪信号。"},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"}
+            )
+            response_content = response.choices[0].message.content
+            logger.debug(f"批量分析API原始响应: {response_content}")
+            
+            json_start = response_content.find('{')
+            json_end = response_content.rfind('}') + 1
+            items = json.loads(response_content[json_start:json_end]).get('results', [])
+            
+            for item in items if isinstance(items, list) else []:
+                parsed = self._validate_batch_item(item)
+                if parsed and parsed[0] in by_index and by_index[parsed[0]]['id'] not in results:
+                    article = by_index[parsed[0]]
+                    results[article['id']] = parsed[1:]
+                    self._cache_put(PROMPT_VERSION_BATCH, article.get('title'), article.get('content'), parsed[1:])
+            logger.info(f"批量分析完成: {len(results)}/{len(by_index)} 篇结果有效")
+        except Exception as e:
+            logger.error(f"批量分析失败: {e}", exc_info=True)
+        
+        # 仅对批量结果中缺失或无效的文章逐篇重新分析
+        for article in by_index.values():
+            if article['id'] not in results:
+                logger.warning(f"文章 {article['id']} 批量分析结果无效，改为单篇分析")
+                results[article['id']] = self.analyze(article['title'], article['content'])
+        return results
+
+    @staticmethod
+    def _validate_batch_item(item) -> Optional[Tuple[str, str, float, str]]:
+        """校验批量结果中的单项，返回 (批内ID, 情感类型, 情感分数, 中文摘要)，无效时返回None"""
+        if not isinstance(item, dict):
+            return None
+        try:
+            index = str(item['id']).strip()
+            sentiment = item['sentiment']
+            score = float(item['score'])
+            chinese_summary = item['chinese_summary']
+        except (KeyError, TypeError, ValueError):
+            return None
+        if sentiment not in ['positive', 'negative', 'neutral']:
+            return None
+        if not -1.0 <= score <= 1.0:
+            return None
+        if not isinstance(chinese_summary, str) or not chinese_summary.strip():
+            return None
+        return index, sentiment, score, chinese_summary
@@ -0,0 +1,77 @@
+import threading
+import time
+import logging
+from typing import Optional
+from config.config import LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """令牌桶：容量为每分钟配额，按秒匀速补充"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        预占令牌并返回需要等待的秒数
+
+        令牌允许透支，透支部分由后续请求等待补足，这样单个超大请求不会永远无法执行
+        """
+        with self.lock:
+            self._refill()
+            amount = min(amount, self.capacity)
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimiter:
+    """
+    LLM调用限流器，同时限制每分钟请求数与每分钟token数
+
+    参数为0或负数时表示不限制对应维度
+    """
+
+    def __init__(self, requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = LLM_TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+
+    def acquire(self, tokens: int = 0):
+        """阻塞直到可以发出一次消耗约tokens个token的请求"""
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens and tokens > 0:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait > 0:
+            logger.debug(f"触发LLM限流，等待 {wait:.2f} 秒")
+            time.sleep(wait)
+
+
+def estimate_tokens(*texts: Optional[str], completion_tokens: int = 500) -> int:
+    """粗略估算一次请求消耗的token数（提示词+预计输出），中英文混排按约3个字符1个token计"""
+    prompt_chars = sum(len(t) for t in texts if t)
+    return prompt_chars // 3 + completion_tokens
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取进程内共享的限流器，使并发的多个处理任务共用同一份配额"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter()
+        return _shared_limiter
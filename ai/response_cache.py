@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+from config.config import LLM_CACHE_PATH, LLM_CACHE_TTL_HOURS, LLM_CACHE_MAX_ENTRIES
+logger = logging.getLogger(__name__)
+
+
+def content_hash(title: Optional[str], content: Optional[str]) -> str:
+    """计算标题+内容的哈希，同一篇文章以不同ID重复出现时也能命中缓存"""
+    return hashlib.sha256(f"{title or ''}\n{content or ''}".encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    LLM分析结果的SQLite持久化缓存
+
+    键为 (模型, 提示词模板版本, 标题+内容哈希)，值为 (情感类型, 情感分数, 中文摘要)。
+    条目超过ttl_hours视为过期，总数超过max_entries时按最近访问时间淘汰
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_hours: float = LLM_CACHE_TTL_HOURS,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.ttl = ttl_hours * 3600
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._puts = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, prompt_version, content_hash)
+            );
+            CREATE INDEX IF NOT EXISTS ix_llm_responses_last_access ON llm_responses (last_access);
+        """)
+        self._conn.commit()
+
+    def close(self):
+        """关闭缓存数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def get(self, model: str, prompt_version: str, digest: str) -> Optional[Tuple[str, float, str]]:
+        """读取未过期的缓存结果，未命中返回None"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT result, created_at FROM llm_responses "
+                    "WHERE model = ? AND prompt_version = ? AND content_hash = ?",
+                    (model or '', prompt_version, digest)
+                ).fetchone()
+                if not row:
+                    return None
+                now = time.time()
+                if self.ttl > 0 and now - row[1] > self.ttl:
+                    self._conn.execute(
+                        "DELETE FROM llm_responses WHERE model = ? AND prompt_version = ? AND content_hash = ?",
+                        (model or '', prompt_version, digest)
+                    )
+                    self._conn.commit()
+                    return None
+                self._conn.execute(
+                    "UPDATE llm_responses SET last_access = ? "
+                    "WHERE model = ? AND prompt_version = ? AND content_hash = ?",
+                    (now, model or '', prompt_version, digest)
+                )
+                self._conn.commit()
+                sentiment, score, chinese_summary = json.loads(row[0])
+                return sentiment, float(score), chinese_summary
+        except Exception as e:
+            logger.error(f"读取LLM结果缓存失败: {e}")
+            return None
+
+    def put(self, model: str, prompt_version: str, digest: str, result: Tuple[str, float, str]):
+        """写入分析结果，每写入一定次数检查一次容量并淘汰"""
+        try:
+            with self._lock:
+                now = time.time()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses "
+                    "(model, prompt_version, content_hash, result, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                    (model or '', prompt_version, digest, json.dumps(list(result), ensure_ascii=False), now, now)
+                )
+                self._puts += 1
+                if self._puts % 100 == 1:
+                    self._evict(now)
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"写入LLM结果缓存失败: {e}")
+
+    def _evict(self, now: float):
+        """删除过期条目，并在超出条数上限时删除最久未访问的条目"""
+        if self.ttl > 0:
+            self._conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE rowid IN "
+                "(SELECT rowid FROM llm_responses ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            logger.info(f"LLM结果缓存超出上限，已淘汰 {count - self.max_entries} 条")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """获取进程内共享的LLM结果缓存，LLM_CACHE_MAX_ENTRIES 为0或初始化失败时返回None"""
+    global _cache
+    if LLM_CACHE_MAX_ENTRIES <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = ResponseCache()
+            except Exception as e:
+                logger.error(f"初始化LLM结果缓存失败: {e}")
+                return None
+        return _cache
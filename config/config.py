@@ -28,12 +28,59 @@ MODEL = os.getenv("MODEL")
 FETCH_INTERVAL = 300
 MAX_RETRIES = 3
 TIMEOUT = 30
+# RSS源并发抓取的线程数
+FEED_FETCH_WORKERS = int(os.getenv("FEED_FETCH_WORKERS", "8"))
+# 正文提取：下载线程数、HTML转文本的进程数（0表示在下载线程内直接提取）、单个站点的最大并发下载数
+EXTRACT_DOWNLOAD_WORKERS = int(os.getenv("EXTRACT_DOWNLOAD_WORKERS", "8"))
+EXTRACT_PROCESS_WORKERS = int(os.getenv("EXTRACT_PROCESS_WORKERS", "2"))
+EXTRACT_PER_HOST_LIMIT = int(os.getenv("EXTRACT_PER_HOST_LIMIT", "2"))
+# 正文提取缓存：保存压缩后的原始HTML与提取结果，超过容量上限时按最近最少使用淘汰（0表示禁用）
+EXTRACT_CACHE_DIR = os.getenv("EXTRACT_CACHE_DIR", str(Path(__file__).resolve().parent.parent / "data" / "extract_cache"))
+EXTRACT_CACHE_MAX_MB = int(os.getenv("EXTRACT_CACHE_MAX_MB", "512"))
 # 调度参数
 FETCH_INTERVAL_MINUTES = 10
 PROCESS_INTERVAL_MINUTES = 10
 PROCESS_BATCH_SIZE = int(os.getenv("PROCESS_BATCH_SIZE", "20"))
 PROCESS_DELAY_SEC = float(os.getenv("PROCESS_DELAY_SEC", "0.5"))
+# AI处理租约时长（秒），认领的文章在此时间内未完成则可被其他处理进程重新认领
+PROCESS_LEASE_SEC = int(os.getenv("PROCESS_LEASE_SEC", "600"))
+# API触发处理时每批认领的最大文章数，一批需在租约时长内处理完，积压更多时任务分批循环认领
+PROCESS_MAX_BATCH_SIZE = int(os.getenv("PROCESS_MAX_BATCH_SIZE", "100"))
+# LLM并发分析：最大同时进行的请求数（1为串行），以及每分钟请求数/token数限额（0表示不限制）
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "150000"))
+# 每次LLM请求打包分析的文章数（1表示逐篇分析）
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "5"))
+# LLM结果缓存：按(模型, 提示词版本, 标题+内容哈希)缓存分析结果，超过条数上限按最近最少使用淘汰（条数为0表示禁用）
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", str(Path(__file__).resolve().parent.parent / "data" / "llm_cache.db"))
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "720"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
 #数据库配置
 DB_URL='sqlite:///f:/PyCode/crypto-news-analyzer/database/crypto_news.db'
+# 进程内只读连接池的大小（同时也是API读线程池的线程数）与获取连接的超时时间（秒）
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "16"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# SQLite连接参数：遇到锁时的等待时间（毫秒）与同步级别（WAL模式下NORMAL即可保证一致性）
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+# 流式读取文章（iter_*/stream_articles）时每次从数据库游标取出的行数，决定大结果集扫描的内存上限
+DB_STREAM_CHUNK_SIZE = int(os.getenv("DB_STREAM_CHUNK_SIZE", "1000"))
+# API读取数据版本号（用于ETag）的缓存时间（秒），其他进程写入的数据最迟在此时间后可见
+DATA_VERSION_CACHE_SEC = float(os.getenv("DATA_VERSION_CACHE_SEC", "1.0"))
+# 实时事件流：每个订阅者的事件缓冲上限（同时也是断线补发的历史条数）与心跳间隔（秒）
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "256"))
+EVENT_HEARTBEAT_SEC = float(os.getenv("EVENT_HEARTBEAT_SEC", "15"))
+# 后台任务：专用线程数、已结束任务的保留条数与保留时间（秒），以及任务记录的SQLite路径（为空则只保存在内存中）
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "100"))
+JOB_HISTORY_TTL_SEC = float(os.getenv("JOB_HISTORY_TTL_SEC", "86400"))
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "")
+# API响应压缩：小于该字节数的响应不压缩，以及gzip压缩级别与brotli质量（安装brotli时优先使用br）
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+# 批量导出：每次从数据库读取并写出的行数（同时也是Parquet行组的大小）
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
 if __name__ == "__main__":
     print(BASE_URL, API_KEY, MODEL)
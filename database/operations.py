@@ -7,14 +7,24 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 sys.path.insert(0, project_root)
 
-from sqlalchemy import create_engine, Column, String, Text, DateTime, Float, Boolean
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import (create_engine, event, Column, String, Text, DateTime, Float, Boolean, Integer, Index, select, update,
+                        or_, text, func, literal, literal_column, table, tuple_)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import declarative_base, deferred, undefer, undefer_group
 from sqlalchemy.orm import sessionmaker
-from typing import Optional, List, Dict
+from sqlalchemy.engine import Engine
+from typing import Optional, List, Dict, Set, Iterable, Iterator, Tuple
+import asyncio
 import datetime
+import functools
 import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 # 导入配置
-from config.config import DB_URL
+from config.config import (DB_URL, PROCESS_LEASE_SEC, DB_POOL_SIZE, DB_POOL_TIMEOUT,
+                           DB_BUSY_TIMEOUT_MS, DB_SYNCHRONOUS, DATA_VERSION_CACHE_SEC, DB_STREAM_CHUNK_SIZE)
 logger = logging.getLogger(__name__)
 # 创建基类
 Base = declarative_base()
@@ -27,9 +37,10 @@ class Article(Base):
     source = Column(String(50))  # 新闻来源（如Cointelegraph, Coindesk等）
     title = Column(String(255))  # 文章标题
     link = Column(String(255))  # 文章链接
-    summary = Column(Text)  # 文章摘要
+    # 摘要和正文体积较大，默认延迟加载（同属body组，访问其一时一起加载），列表查询按需加载
+    summary = deferred(Column(Text), group='body')  # 文章摘要
     published = Column(DateTime)  # 发布时间
-    content = Column(Text)  # 完整内容（可选）
+    content = deferred(Column(Text), group='body')  # 完整内容（可选）
     author = Column(String(100))  # 作者（可选）
     sentiment = Column(String(100))  # 情感分析结果（'positive', 'negative', 'neutral'）
     sentiment_score = Column(Float)  # 情感分数（范围-1到1，由AI分析）
@@ -38,71 +49,1140 @@ class Article(Base):
     created_at = Column(DateTime, default=datetime.datetime.now)  # 数据库插入时间
     updated_at = Column(DateTime, default=datetime.datetime.now)  # 数据库更新时间
     ai_processed = Column(Boolean, default=False)  # 是否已由AI处理
+    lease_owner = Column(String(100))  # 当前认领该文章进行AI处理的工作进程ID
+    lease_expires = Column(DateTime)  # 认领租约到期时间
+    
+    __table_args__ = (
+        # 列表页按 (发布时间, ID) 倒序排列与游标分页，并支持按来源/情感/处理状态筛选
+        Index('ix_articles_published_id', 'published', 'id'),
+        Index('ix_articles_source_published', 'source', 'published', 'id'),
+        Index('ix_articles_sentiment_published', 'sentiment', 'published', 'id'),
+        Index('ix_articles_ai_processed_published', 'ai_processed', 'published', 'id'),
+        # 认领后按工作进程ID取回文章，只索引正被租用的行
+        Index('ix_articles_lease_owner', 'lease_owner', sqlite_where=text('lease_owner IS NOT NULL')),
+    )
+
+# 文章的公开字段（不含AI处理租约），流式读取未指定字段时返回全部这些列
+ARTICLE_FIELDS = (
+    "id", "source", "title", "link", "summary", "published", "content", "author", "sentiment",
+    "sentiment_score", "chinese_summary", "keywords", "created_at", "updated_at", "ai_processed"
+)
+
+# 定义RSS源抓取状态模型，保存条件请求所需的校验值
+class FeedState(Base):
+    __tablename__ = 'feed_states'
+    
+    url = Column(String(512), primary_key=True)  # RSS源地址
+    etag = Column(String(255))  # 上次响应的ETag
+    last_modified = Column(String(255))  # 上次响应的Last-Modified
+    updated_at = Column(DateTime, default=datetime.datetime.now)  # 校验值更新时间
+
+# 定义文章统计计数模型，由articles表上的触发器在同一事务中维护
+class ArticleStat(Base):
+    __tablename__ = 'article_stats'
+    
+    kind = Column(String(20), primary_key=True)  # 统计维度：total/processed/source/sentiment
+    key = Column(String(255), primary_key=True)  # 维度取值（来源名、情感类型），total/processed为空字符串
+    count = Column(Integer, nullable=False, default=0)  # 文章数
+
+# 定义情感时间桶汇总模型，按小时/天和来源汇总已处理文章的情感，由触发器维护
+class SentimentRollup(Base):
+    __tablename__ = 'sentiment_rollups'
+    
+    bucket = Column(String(10), primary_key=True)  # 时间粒度：hour/day
+    source = Column(String(50), primary_key=True)  # 新闻来源，来源为空时为空字符串
+    bucket_start = Column(String(19), primary_key=True)  # 时间桶起点（按发布时间），格式 YYYY-MM-DD HH:00:00
+    count = Column(Integer, nullable=False, default=0)  # 已处理文章数
+    score_count = Column(Integer, nullable=False, default=0)  # 有情感分数的文章数
+    score_sum = Column(Float, nullable=False, default=0.0)  # 情感分数之和
+    score_min = Column(Float)  # 最低情感分数
+    score_max = Column(Float)  # 最高情感分数
+    positive = Column(Integer, nullable=False, default=0)  # 积极文章数
+    negative = Column(Integer, nullable=False, default=0)  # 消极文章数
+    neutral = Column(Integer, nullable=False, default=0)  # 中性文章数
+    
+    __table_args__ = (
+        # 不限来源时按时间范围跨来源汇总
+        Index('ix_sentiment_rollups_bucket_start', 'bucket', 'bucket_start'),
+    )
+
+# 定义数据版本模型，只有一行，文章数据每次变化时由触发器递增，用于API的ETag
+class DataVersion(Base):
+    __tablename__ = 'data_version'
+    
+    id = Column(Integer, primary_key=True)  # 固定为1
+    version = Column(Integer, nullable=False, default=0)  # 数据版本号，只增不减
+
+def _migrate_add_missing_columns(conn):
+    """版本1：为早期创建的articles表补齐后续新增的列"""
+    columns_to_add = [
+        "sentiment VARCHAR(100)",
+        "sentiment_score REAL",
+        "chinese_summary TEXT",
+        "keywords VARCHAR(255)",
+        # SQLite的ALTER TABLE不支持非常量默认值，新行的时间由模型默认值填充
+        "created_at DATETIME",
+        "updated_at DATETIME",
+        "ai_processed BOOLEAN DEFAULT 0",
+        "lease_owner VARCHAR(100)",
+        "lease_expires DATETIME"
+    ]
+    current_columns = {col[1] for col in conn.execute(text("PRAGMA table_info(articles)")).fetchall()}
+    for column_def in columns_to_add:
+        column_name = column_def.split()[0]
+        if column_name not in current_columns:
+            conn.execute(text(f"ALTER TABLE articles ADD COLUMN {column_def}"))
+            logger.info(f"成功添加列: {column_name}")
+
+
+def _migrate_add_article_indexes(conn):
+    """
+    版本2：为列表筛选、排序和未处理文章查询添加索引
+
+    迁移中的DDL固定为该版本的定义，不读取模型，之后修改模型中的索引不影响旧版本的迁移
+    """
+    for ddl in (
+        "CREATE INDEX IF NOT EXISTS ix_articles_published ON articles (published)",
+        "CREATE INDEX IF NOT EXISTS ix_articles_source_published ON articles (source, published)",
+        "CREATE INDEX IF NOT EXISTS ix_articles_sentiment_published ON articles (sentiment, published)",
+        "CREATE INDEX IF NOT EXISTS ix_articles_ai_processed_published ON articles (ai_processed, published)",
+        "CREATE INDEX IF NOT EXISTS ix_articles_unprocessed ON articles (published) WHERE ai_processed = 0",
+        "CREATE INDEX IF NOT EXISTS ix_articles_lease_owner ON articles (lease_owner) WHERE lease_owner IS NOT NULL",
+    ):
+        conn.execute(text(ddl))
+    conn.execute(text("ANALYZE articles"))
+
+
+def _migrate_keyset_indexes(conn):
+    """版本4：列表索引追加id列，使 (published, id) 排序与游标分页可以直接走索引"""
+    for name in ('ix_articles_published', 'ix_articles_source_published',
+                 'ix_articles_sentiment_published', 'ix_articles_ai_processed_published'):
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for ddl in (
+        "CREATE INDEX IF NOT EXISTS ix_articles_published_id ON articles (published, id)",
+        "CREATE INDEX IF NOT EXISTS ix_articles_source_published ON articles (source, published, id)",
+        "CREATE INDEX IF NOT EXISTS ix_articles_sentiment_published ON articles (sentiment, published, id)",
+        "CREATE INDEX IF NOT EXISTS ix_articles_ai_processed_published ON articles (ai_processed, published, id)",
+    ):
+        conn.execute(text(ddl))
+    conn.execute(text("ANALYZE articles"))
+
+
+# 统计维度及其在articles行上的取值表达式（{row}替换为new/old）
+STATS_DIMENSIONS = {
+    'total': "''",
+    'processed': "''",
+    'source': "COALESCE({row}.source, '')",
+    'sentiment': "COALESCE({row}.sentiment, '')",
+}
+
+
+def _stats_delta_sql(kind: str, row: str, delta: str) -> str:
+    """生成对某个统计维度加减计数的UPSERT语句"""
+    key = STATS_DIMENSIONS[kind].format(row=row)
+    return (
+        f"INSERT INTO article_stats(kind, key, count) VALUES ('{kind}', {key}, {delta}) "
+        f"ON CONFLICT(kind, key) DO UPDATE SET count = count + excluded.count;"
+    )
+
+
+def create_stats_triggers(conn):
+    """
+    创建维护 article_stats 的触发器
+    
+    文章的插入、删除以及来源/情感/处理状态的修改都会在同一事务中更新对应计数，
+    读取统计时无需扫描articles表
+    """
+    processed_new = "COALESCE(new.ai_processed, 0)"
+    processed_old = "COALESCE(old.ai_processed, 0)"
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS article_stats_ai AFTER INSERT ON articles BEGIN
+            {_stats_delta_sql('total', 'new', '1')}
+            {_stats_delta_sql('processed', 'new', processed_new)}
+            {_stats_delta_sql('source', 'new', '1')}
+            {_stats_delta_sql('sentiment', 'new', '1')}
+        END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS article_stats_ad AFTER DELETE ON articles BEGIN
+            {_stats_delta_sql('total', 'old', '-1')}
+            {_stats_delta_sql('processed', 'old', '-' + processed_old)}
+            {_stats_delta_sql('source', 'old', '-1')}
+            {_stats_delta_sql('sentiment', 'old', '-1')}
+        END
+    """))
+    for kind, column in (('source', 'source'), ('sentiment', 'sentiment')):
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS article_stats_au_{kind} AFTER UPDATE OF {column} ON articles
+            WHEN old.{column} IS NOT new.{column} BEGIN
+                {_stats_delta_sql(kind, 'old', '-1')}
+                {_stats_delta_sql(kind, 'new', '1')}
+            END
+        """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS article_stats_au_processed AFTER UPDATE OF ai_processed ON articles
+        WHEN {processed_old} != {processed_new} BEGIN
+            {_stats_delta_sql('processed', 'new', f'{processed_new} - {processed_old}')}
+        END
+    """))
+
+
+def rebuild_stats(conn):
+    """按articles表当前内容重新计算全部统计计数"""
+    conn.execute(text("DELETE FROM article_stats"))
+    conn.execute(text(
+        "INSERT INTO article_stats(kind, key, count) "
+        "SELECT 'total', '', COUNT(*) FROM articles"
+    ))
+    conn.execute(text(
+        "INSERT INTO article_stats(kind, key, count) "
+        "SELECT 'processed', '', COALESCE(SUM(COALESCE(ai_processed, 0)), 0) FROM articles"
+    ))
+    for kind in ('source', 'sentiment'):
+        conn.execute(text(
+            f"INSERT INTO article_stats(kind, key, count) "
+            f"SELECT '{kind}', COALESCE({kind}, ''), COUNT(*) FROM articles GROUP BY COALESCE({kind}, '')"
+        ))
+
+
+def _migrate_add_article_stats(conn):
+    """版本5：添加由触发器维护的统计计数表"""
+    ArticleStat.__table__.create(conn, checkfirst=True)
+    create_stats_triggers(conn)
+    rebuild_stats(conn)
+
+
+# 情感汇总的时间粒度：(时间桶起点格式, 下一个时间桶的偏移)
+ROLLUP_BUCKETS = {
+    'hour': ('%Y-%m-%d %H:00:00', '+1 hour'),
+    'day': ('%Y-%m-%d 00:00:00', '+1 day'),
+}
+ROLLUP_COLUMNS = ('bucket, source, bucket_start, count, score_count, score_sum, score_min, score_max, '
+                  'positive, negative, neutral')
+
+
+def _rollup_increment_sql(bucket: str) -> str:
+    """生成把new行计入其时间桶的UPSERT语句，用于文章首次完成AI处理"""
+    fmt, _ = ROLLUP_BUCKETS[bucket]
+    return f"""
+        INSERT INTO sentiment_rollups({ROLLUP_COLUMNS}) VALUES (
+            '{bucket}', COALESCE(new.source, ''), strftime('{fmt}', new.published), 1,
+            new.sentiment_score IS NOT NULL, COALESCE(new.sentiment_score, 0),
+            new.sentiment_score, new.sentiment_score,
+            new.sentiment IS 'positive', new.sentiment IS 'negative', new.sentiment IS 'neutral'
+        ) ON CONFLICT(bucket, source, bucket_start) DO UPDATE SET
+            count = count + 1,
+            score_count = score_count + excluded.score_count,
+            score_sum = score_sum + excluded.score_sum,
+            score_min = CASE WHEN excluded.score_min IS NULL THEN score_min
+                             WHEN score_min IS NULL THEN excluded.score_min
+                             ELSE min(score_min, excluded.score_min) END,
+            score_max = CASE WHEN excluded.score_max IS NULL THEN score_max
+                             WHEN score_max IS NULL THEN excluded.score_max
+                             ELSE max(score_max, excluded.score_max) END,
+            positive = positive + excluded.positive,
+            negative = negative + excluded.negative,
+            neutral = neutral + excluded.neutral;
+    """
+
+
+def _rollup_aggregate_select(bucket: str) -> str:
+    """汇总已处理文章的SELECT片段，调用方补充WHERE/GROUP BY"""
+    fmt, _ = ROLLUP_BUCKETS[bucket]
+    return f"""
+        SELECT '{bucket}', COALESCE(source, ''), strftime('{fmt}', published), COUNT(*),
+               COUNT(sentiment_score), COALESCE(SUM(sentiment_score), 0),
+               MIN(sentiment_score), MAX(sentiment_score),
+               SUM(sentiment IS 'positive'), SUM(sentiment IS 'negative'), SUM(sentiment IS 'neutral')
+        FROM articles
+    """
+
+
+def _rollup_recompute_sql(bucket: str, row: str) -> str:
+    """
+    生成按articles重新计算row（new/old）所在时间桶的语句
+    
+    重新分析或删除文章时最小/最大值无法增量扣减，只重算受影响的一个时间桶，
+    通过 (source, published) 索引只读取该桶内的文章
+    """
+    fmt, step = ROLLUP_BUCKETS[bucket]
+    start = f"strftime('{fmt}', {row}.published)"
+    return f"""
+        DELETE FROM sentiment_rollups
+        WHERE bucket = '{bucket}' AND source = COALESCE({row}.source, '') AND bucket_start = {start};
+        INSERT INTO sentiment_rollups({ROLLUP_COLUMNS})
+        {_rollup_aggregate_select(bucket)}
+        WHERE ai_processed = 1 AND source IS {row}.source
+          AND published >= {start} AND published < datetime({start}, '{step}')
+        HAVING COUNT(*) > 0;
+    """
+
+
+def create_rollup_triggers(conn):
+    """
+    创建维护 sentiment_rollups 的触发器
+    
+    文章首次完成AI处理时增量计入；已处理文章的情感、分数、来源或发布时间变化（重新分析）
+    以及删除时，重算变化前后所在的时间桶
+    """
+    increment = ''.join(_rollup_increment_sql(b) for b in ROLLUP_BUCKETS)
+    recompute_old = ''.join(_rollup_recompute_sql(b, 'old') for b in ROLLUP_BUCKETS)
+    recompute_new = ''.join(_rollup_recompute_sql(b, 'new') for b in ROLLUP_BUCKETS)
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS sentiment_rollups_ai AFTER INSERT ON articles
+        WHEN new.ai_processed = 1 AND new.published IS NOT NULL BEGIN
+            {increment}
+        END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS sentiment_rollups_au_processed AFTER UPDATE OF ai_processed ON articles
+        WHEN COALESCE(old.ai_processed, 0) = 0 AND new.ai_processed = 1 AND new.published IS NOT NULL BEGIN
+            {increment}
+        END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS sentiment_rollups_au_reanalyzed
+        AFTER UPDATE OF ai_processed, sentiment, sentiment_score, source, published ON articles
+        WHEN old.ai_processed = 1 AND (
+            new.ai_processed IS NOT 1 OR old.sentiment IS NOT new.sentiment
+            OR old.sentiment_score IS NOT new.sentiment_score
+            OR old.source IS NOT new.source OR old.published IS NOT new.published
+        ) BEGIN
+            {recompute_old}
+            {recompute_new}
+        END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS sentiment_rollups_ad AFTER DELETE ON articles
+        WHEN old.ai_processed = 1 BEGIN
+            {recompute_old}
+        END
+    """))
+
+
+def rebuild_rollups(conn):
+    """按articles表当前内容重新计算全部情感汇总"""
+    conn.execute(text("DELETE FROM sentiment_rollups"))
+    for bucket, (fmt, _) in ROLLUP_BUCKETS.items():
+        conn.execute(text(
+            f"INSERT INTO sentiment_rollups({ROLLUP_COLUMNS}) {_rollup_aggregate_select(bucket)} "
+            f"WHERE ai_processed = 1 AND published IS NOT NULL "
+            f"GROUP BY COALESCE(source, ''), strftime('{fmt}', published)"
+        ))
+
+
+def _migrate_add_sentiment_rollups(conn):
+    """版本6：添加按小时/天汇总的情感时间序列表"""
+    SentimentRollup.__table__.create(conn, checkfirst=True)
+    create_rollup_triggers(conn)
+    rebuild_rollups(conn)
+
+
+# 不影响API输出的列（AI处理租约），只修改这些列时不递增数据版本
+DATA_VERSION_IGNORED_COLUMNS = ('lease_owner', 'lease_expires')
+# 版本7时API可见的列，固定写入触发器定义，不随之后的模型改动变化；
+# 新增可见列时需在新的迁移中重建 data_version_au 触发器
+DATA_VERSION_COLUMNS = (
+    'id', 'source', 'title', 'link', 'summary', 'published', 'content', 'author',
+    'sentiment', 'sentiment_score', 'chinese_summary', 'keywords',
+    'created_at', 'updated_at', 'ai_processed',
+)
+BUMP_DATA_VERSION_SQL = "UPDATE data_version SET version = version + 1 WHERE id = 1"
+
+
+def create_data_version_triggers(conn):
+    """
+    创建数据版本行及递增版本号的触发器
+    
+    文章的插入、删除以及API可见列的修改都会在同一事务中递增 data_version，
+    认领/释放租约不递增，避免AI处理过程使所有缓存失效
+    """
+    conn.execute(text("INSERT OR IGNORE INTO data_version(id, version) VALUES (1, 0)"))
+    for name, action in (('ai', 'INSERT'), ('ad', 'DELETE'), ('au', f"UPDATE OF {', '.join(DATA_VERSION_COLUMNS)}")):
+        conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS data_version_{name} AFTER {action} ON articles BEGIN
+                {BUMP_DATA_VERSION_SQL};
+            END
+        """))
+
+
+def _migrate_add_data_version(conn):
+    """版本7：添加由触发器维护的数据版本号"""
+    DataVersion.__table__.create(conn, checkfirst=True)
+    create_data_version_triggers(conn)
+
+
+# 全文索引覆盖的列，顺序即 articles_fts 的列顺序
+SEARCH_COLUMNS = ('title', 'summary', 'content', 'chinese_summary', 'keywords')
+# BM25各列权重，标题和关键词命中比正文命中更相关
+SEARCH_WEIGHTS = (10.0, 4.0, 1.0, 4.0, 6.0)
+# 搜索摘要中命中词的起止标记，由调用方替换为需要的高亮格式
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+
+
+def _migrate_drop_unprocessed_index(conn):
+    """
+    版本8：删除 ix_articles_unprocessed 部分索引
+
+    未处理文章与认领查询的查询计划总是选择 ix_articles_ai_processed_published（同时满足排序），
+    部分索引从未被使用，只增加每次写入的开销
+    """
+    conn.execute(text("DROP INDEX IF EXISTS ix_articles_unprocessed"))
+
+
+def create_search_index(conn):
+    """
+    创建全文索引表 articles_fts 及同步触发器
+    
+    articles_fts 是以articles为外部内容、按rowid关联的FTS5表，本身不重复存储文本。
+    优先使用trigram分词，以支持中文等无空格语言的子串搜索；SQLite不支持时退回unicode61。
+    注意：VACUUM可能改变articles的rowid，执行后需调用 rebuild_search_index 重建
+    """
+    columns = ', '.join(SEARCH_COLUMNS)
+    try:
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+            f"{columns}, content='articles', content_rowid='rowid', tokenize='trigram')"
+        ))
+    except Exception as e:
+        logger.warning(f"SQLite不支持trigram分词，使用unicode61: {e}")
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+            f"{columns}, content='articles', content_rowid='rowid', tokenize='unicode61')"
+        ))
+    new_values = ', '.join(f"new.{c}" for c in SEARCH_COLUMNS)
+    old_values = ', '.join(f"old.{c}" for c in SEARCH_COLUMNS)
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN
+            INSERT INTO articles_fts(rowid, {columns}) VALUES (new.rowid, {new_values});
+        END
+    """))
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+        END
+    """))
+    # 只在被索引的列变化时更新索引，认领租约等更新不触发
+    conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE OF {columns} ON articles BEGIN
+            INSERT INTO articles_fts(articles_fts, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO articles_fts(rowid, {columns}) VALUES (new.rowid, {new_values});
+        END
+    """))
+
+
+def rebuild_search_index(conn):
+    """按articles表当前内容重建全文索引"""
+    conn.execute(text("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')"))
+
+
+def _migrate_add_search_index(conn):
+    """版本3：添加全文索引并索引已有文章"""
+    create_search_index(conn)
+    rebuild_search_index(conn)
+
+
+# 数据库迁移列表：(版本号, 说明, 迁移函数)，版本号只增不改，新迁移追加到末尾
+MIGRATIONS = [
+    (1, "补齐articles表缺失的列", _migrate_add_missing_columns),
+    (2, "添加文章查询索引", _migrate_add_article_indexes),
+    (3, "添加FTS5全文索引", _migrate_add_search_index),
+    (4, "列表索引支持 (published, id) 游标分页", _migrate_keyset_indexes),
+    (5, "添加文章统计计数表", _migrate_add_article_stats),
+    (6, "添加情感时间序列汇总表", _migrate_add_sentiment_rollups),
+    (7, "添加数据版本号", _migrate_add_data_version),
+    (8, "删除未被使用的未处理文章部分索引", _migrate_drop_unprocessed_index),
+]
+
+
+def _is_full_scan(plan_step: str) -> bool:
+    """判断查询计划步骤是否为对articles表的全表扫描（SCAN且未使用索引）"""
+    return re.match(r"SCAN articles\b(?!_)", plan_step) is not None and "INDEX" not in plan_step
+
+
+def _migrate_database(engine: Engine):
+    """
+    按版本号执行数据库迁移
+    
+    已执行到的版本记录在 PRAGMA user_version 中，只执行比当前版本新的迁移。
+    迁移函数需可重复执行，中途失败时下次启动会从该版本重新执行
+    """
+    with engine.connect() as conn:
+        current = conn.execute(text("PRAGMA user_version")).scalar() or 0
+    
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            with engine.begin() as conn:
+                migrate(conn)
+                conn.execute(text(f"PRAGMA user_version = {int(version)}"))
+            logger.info(f"数据库迁移到版本 {version}: {description}")
+        except Exception as e:
+            logger.error(f"数据库迁移到版本 {version} 失败: {e}")
+            raise
+
+
+def _is_memory_url(db_url: str) -> bool:
+    return db_url in ('sqlite://', 'sqlite:///:memory:')
+
+
+def _configure_sqlite(engine: Engine, read_only: bool):
+    """
+    为引擎的每个新连接设置SQLite参数
+    
+    所有连接启用WAL、busy_timeout和同步级别；读连接设置query_only，
+    写连接改为显式开启事务并使用BEGIN IMMEDIATE，在事务开始时即获取写锁，
+    避免多个写事务在提交阶段相互冲突而报 "database is locked"
+    """
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        # 由SQLAlchemy负责开启事务，避免pysqlite隐式BEGIN
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT_MS)}")
+            if not read_only:
+                cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+            if read_only:
+                cursor.execute("PRAGMA query_only = 1")
+        finally:
+            cursor.close()
+    
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        conn.exec_driver_sql("BEGIN" if read_only else "BEGIN IMMEDIATE")
+
+
+def _create_engines(db_url: str) -> Tuple[Engine, Engine]:
+    """
+    创建 (写引擎, 读引擎)
+    
+    写引擎只有一个连接，进程内的写操作排队串行执行；读引擎为只读连接池，
+    WAL模式下读取不会被写事务阻塞。内存数据库无法跨连接共享，读写共用一个引擎
+    """
+    if _is_memory_url(db_url):
+        engine = create_engine(db_url)
+        return engine, engine
+    writer = create_engine(db_url, pool_size=1, max_overflow=0, pool_timeout=DB_POOL_TIMEOUT)
+    _configure_sqlite(writer, read_only=False)
+    reader = create_engine(db_url, pool_size=DB_POOL_SIZE, pool_timeout=DB_POOL_TIMEOUT)
+    _configure_sqlite(reader, read_only=True)
+    return writer, reader
+
+
+class _DataVersionCache:
+    """
+    一个数据库的数据版本号缓存，与引擎一样按URL在进程内共享
+
+    写引擎每次提交后失效。失效会递增代数，读取期间发生的提交使读到的旧值不再写入缓存
+    """
+
+    def __init__(self):
+        self.value: Optional[Tuple[int, float]] = None  # (版本号, 读取时间)
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def invalidate(self, conn=None):
+        with self._lock:
+            self.value = None
+            self.generation += 1
+
+    def store(self, version: int, checked_at: float, generation: int):
+        with self._lock:
+            if generation == self.generation:
+                self.value = (version, checked_at)
+
+
+# 进程内共享的引擎、数据版本号缓存与Database实例，按数据库URL区分
+_engines: Dict[str, Tuple[Engine, Engine]] = {}
+_data_version_caches: Dict[str, _DataVersionCache] = {}
+_databases: Dict[str, 'Database'] = {}
+_registry_lock = threading.Lock()
+
+
+def _get_engines(db_url: str) -> Tuple[Engine, Engine]:
+    """获取 (写引擎, 读引擎)，每个数据库URL只在第一次获取时创建引擎、建表并执行迁移"""
+    with _registry_lock:
+        engines = _engines.get(db_url)
+        if engines is None:
+            engines = _create_engines(db_url)
+            Base.metadata.create_all(engines[0])  # 创建所有表
+            _migrate_database(engines[0])  # 检查并迁移数据库表结构
+            # 提交监听器随引擎只注册一次，之后创建的Database实例共享同一个缓存
+            cache = _DataVersionCache()
+            event.listen(engines[0], 'commit', cache.invalidate)
+            _data_version_caches[db_url] = cache
+            _engines[db_url] = engines
+        return engines
+
+
+def get_engine(db_url: str = DB_URL) -> Engine:
+    """
+    获取进程内共享的数据库写引擎
+    
+    每个数据库URL只在第一次获取时创建引擎、建表并执行迁移，之后的调用直接复用同一个连接池
+    """
+    return _get_engines(db_url)[0]
+
+
+def get_read_engine(db_url: str = DB_URL) -> Engine:
+    """获取进程内共享的只读引擎"""
+    return _get_engines(db_url)[1]
+
+
+def get_database(db_url: str = DB_URL) -> 'Database':
+    """获取进程内共享的Database实例，定时任务和API服务应通过它访问数据库"""
+    with _registry_lock:
+        db = _databases.get(db_url)
+    if db is None:
+        db = Database(db_url)
+        with _registry_lock:
+            db = _databases.setdefault(db_url, db)
+    return db
+
 
 class Database:
     """数据库操作类，封装所有数据库交互方法"""
     def __init__(self, db_url: str):
-        """初始化数据库引擎和会话"""
-        self.engine = create_engine(db_url)
-        Base.metadata.create_all(self.engine)  # 创建所有表
+        """初始化数据库引擎和会话，同一URL共享引擎，建表与迁移每个进程只执行一次"""
+        self.engine, self.read_engine = _get_engines(db_url)
         self.Session = sessionmaker(bind=self.engine)
-        
-        # 检查并迁移数据库表结构
-        self._migrate_database()
+        self.ReadSession = sessionmaker(bind=self.read_engine)
+        self._read_executor = None
+        self._read_executor_lock = threading.Lock()
+        # 数据版本号缓存，同一URL的实例共享，本进程的写事务提交后立即失效
+        self._data_version = _data_version_caches[db_url]
 
     def get_session(self):
-        """获取数据库会话对象"""
+        """获取数据库会话对象（写连接，进程内串行）"""
         return self.Session()
     
-    def _migrate_database(self):
+    def get_read_session(self):
+        """获取只读会话对象，用于不修改数据的查询"""
+        return self.ReadSession()
+    
+    async def run_read(self, fn, *args, **kwargs):
         """
-        检查并迁移数据库表结构，添加缺失的列
+        在专用的读线程池中执行同步的数据库读取，供异步代码（FastAPI处理函数）调用
+        
+        线程数与只读连接池大小一致（DB_POOL_SIZE），超出的请求在线程池队列中等待，
+        不会阻塞事件循环，也不会占用连接池之外的连接
+        
+        参数:
+            fn: 同步函数，内部自行获取并关闭只读会话
+            *args, **kwargs: 传给fn的参数
+        
+        返回:
+            fn的返回值（fn抛出的异常原样抛出）
+        """
+        if self._read_executor is None:
+            with self._read_executor_lock:
+                if self._read_executor is None:
+                    self._read_executor = ThreadPoolExecutor(
+                        max_workers=max(1, DB_POOL_SIZE), thread_name_prefix='db-read'
+                    )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, functools.partial(fn, *args, **kwargs))
+    
+    async def iterate_read(self, iterator):
         """
-        from sqlalchemy import text
+        在读线程池中逐块推进同步迭代器（如流式导出），供流式响应使用
         
-        # 需要添加的列定义
-        columns_to_add = [
-            "sentiment VARCHAR(100)",
-            "sentiment_score REAL",
-            "chinese_summary TEXT",
-            "keywords VARCHAR(255)",
-            "created_at DATETIME DEFAULT CURRENT_TIMESTAMP",
-            "updated_at DATETIME DEFAULT CURRENT_TIMESTAMP",
-            "ai_processed BOOLEAN DEFAULT 0"
-        ]
+        每次只取一块，块之间不占用线程。调用方取消（客户端断开）时，正在读线程中执行的
+        next() 不会随之中止，需等它结束后再关闭迭代器，否则关闭会抛出
+        "generator already executing" 且迭代器占用的只读连接不会释放
         
-        with self.engine.connect() as conn:
-            # 检查表是否存在
-            result = conn.execute(text(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name='articles'"
-            )).fetchone()
-            
-            if not result:
-                logger.info("表 'articles' 不存在，将创建新表")
-                Base.metadata.create_all(self.engine)
-                logger.info("表 'articles' 创建成功")
-                return
-            
-            # 获取当前表结构
-            current_columns = conn.execute(text("PRAGMA table_info(articles)")).fetchall()
-            current_column_names = [col[1] for col in current_columns]
-            
-            logger.info(f"当前表中的列: {current_column_names}")
+        参数:
+            iterator: 同步迭代器（生成器），在读线程中推进与关闭
+        
+        返回:
+            异步迭代器，逐个产出iterator的元素
+        """
+        pending = None
+        try:
+            while True:
+                pending = asyncio.ensure_future(self.run_read(next, iterator, None))
+                chunk = await asyncio.shield(pending)
+                pending = None
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            if pending is not None:
+                await asyncio.wait([pending])
+                if not pending.cancelled():
+                    pending.exception()
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                await self.run_read(close)
+    
+    def cached_data_version(self, max_age: float = DATA_VERSION_CACHE_SEC) -> Optional[int]:
+        """
+        返回未过期的缓存数据版本号，不访问数据库；缓存不存在或已过期时返回None
+        
+        参数:
+            max_age: 缓存有效期（秒）
+        """
+        cached = self._data_version.value
+        if cached is not None and time.monotonic() - cached[1] < max_age:
+            return cached[0]
+        return None
+    
+    def get_data_version(self, max_age: float = DATA_VERSION_CACHE_SEC) -> Optional[int]:
+        """
+        获取当前数据版本号，文章数据的任何可见变化都会使其增大
+        
+        缓存max_age秒：本进程的写入提交后立即失效，其他进程（定时抓取、AI处理）的写入
+        最迟max_age秒后可见
+        
+        参数:
+            max_age: 缓存有效期（秒）
+        
+        返回:
+            Optional[int]: 数据版本号，读取失败时返回None
+        """
+        version = self.cached_data_version(max_age)
+        if version is not None:
+            return version
+        try:
+            generation = self._data_version.generation
+            checked_at = time.monotonic()
+            with self.read_engine.connect() as conn:
+                version = conn.execute(select(DataVersion.version).where(DataVersion.id == 1)).scalar()
+            version = version or 0
+            self._data_version.store(version, checked_at, generation)
+            return version
+        except Exception as e:
+            logger.error(f"读取数据版本号失败: {e}")
+            return None
+    
+    def explain_query_plan(self, query) -> List[str]:
+        """
+        获取查询的 EXPLAIN QUERY PLAN 结果
+        
+        查询按运行时的方式编译并绑定参数，只是在发送给SQLite前加上 EXPLAIN QUERY PLAN 前缀，
+        得到的计划与实际执行时一致（参数内联后SQLite可能选择不同的索引）
+        
+        参数:
+            query: SQLAlchemy查询（Query或Select）
+        
+        返回:
+            List[str]: 查询计划各步骤的描述
+        """
+        statement = getattr(query, 'statement', query)
+        
+        def _explain(conn, cursor, sql, parameters, context, executemany):
+            return f"EXPLAIN QUERY PLAN {sql}", parameters
+        
+        with self.read_engine.connect() as conn:
+            event.listen(conn, 'before_cursor_execute', _explain, retval=True)
+            result = conn.execute(statement)
+            try:
+                return [row[-1] for row in result.cursor.fetchall()]
+            finally:
+                result.close()
+
+    def check_query_plans(self) -> Dict[str, List[str]]:
+        """
+        检查热点查询是否退化为全表扫描
+        
+        返回:
+            Dict[str, List[str]]: 出现全表扫描的查询名称到其查询计划的映射，为空表示全部命中索引
+        """
+        session = self.get_read_session()
+        try:
+            day = datetime.datetime(2024, 1, 1)
+            base = session.query(Article.id)
+            hot_queries = {
+                "文章列表": self.filter_articles(base),
+                "按来源筛选": self.filter_articles(base, source="CoinDesk"),
+                "按情感筛选": self.filter_articles(base, sentiment="positive"),
+                "按处理状态筛选": self.filter_articles(base, ai_processed=True),
+                "按日期范围筛选": self.filter_articles(base, start_date=day, end_date=day + datetime.timedelta(days=7)),
+                "来源+日期范围": self.filter_articles(base, source="CoinDesk", start_date=day,
+                                                 end_date=day + datetime.timedelta(days=7)),
+                "游标翻页": self.after_keyset(self.filter_articles(base), day, "id"),
+                "来源+游标翻页": self.after_keyset(self.filter_articles(base, source="CoinDesk"), day, "id"),
+                "未处理文章": self.filter_articles(base, ai_processed=False),
+                "认领候选": select(Article.id).where(
+                    (Article.ai_processed == False) & or_(Article.lease_expires.is_(None), Article.lease_expires < day)
+                ).order_by(Article.published.desc()),
+                "取回认领": session.query(Article.id).filter(Article.lease_owner == "worker",
+                                                         Article.lease_expires == day),
+            }
+            full_scans = {}
+            for name, query in hot_queries.items():
+                plan = self.explain_query_plan(query.limit(20))
+                if any(_is_full_scan(step) for step in plan):
+                    full_scans[name] = plan
+            return full_scans
+        finally:
+            session.close()
+
+    @staticmethod
+    def filter_articles(query, source: Optional[str] = None, sentiment: Optional[str] = None,
+                        ai_processed: Optional[bool] = None, start_date: Optional[datetime.datetime] = None,
+                        end_date: Optional[datetime.datetime] = None):
+        """
+        为文章查询添加列表页使用的筛选条件，并按 (发布时间, ID) 倒序排列
+        
+        参数:
+            query: 针对Article的查询
+            source: 新闻来源
+            sentiment: 情感类型
+            ai_processed: 是否已AI处理
+            start_date: 开始日期（需与end_date同时提供）
+            end_date: 结束日期
+        
+        返回:
+            添加筛选与排序后的查询
+        """
+        if source:
+            query = query.filter(Article.source == source)
+        if sentiment:
+            query = query.filter(Article.sentiment == sentiment)
+        if ai_processed is not None:
+            query = query.filter(Article.ai_processed == ai_processed)
+        if start_date and end_date:
+            query = query.filter(Article.published.between(start_date, end_date))
+        return query.order_by(Article.published.desc(), Article.id.desc())
+
+    @staticmethod
+    def after_keyset(query, published: Optional[datetime.datetime], article_id: str):
+        """
+        只保留排在 (published, article_id) 之后、且 published 同为空或同为非空的文章
+        
+        使用行值比较，SQLite可以直接在 (published, id) 索引上定位起点而不是从头扫描
+        
+        参数:
+            query: 已经过 filter_articles 处理的查询
+            published: 上一页最后一篇文章的发布时间
+            article_id: 上一页最后一篇文章的ID
+        
+        返回:
+            添加游标条件后的查询
+        """
+        if published is None:
+            return query.filter(Article.published.is_(None), Article.id < article_id)
+        return query.filter(tuple_(Article.published, Article.id) < tuple_(published, article_id))
+
+    @classmethod
+    def keyset_page(cls, query, limit: int, after: Optional[Tuple[Optional[datetime.datetime], str]] = None) -> List:
+        """
+        按 (published, id) 倒序取一页结果（游标分页）
+        
+        published 为空的文章排在最后，非空部分取完后从空值部分补足本页
+        
+        参数:
+            query: 已经过 filter_articles 处理的查询
+            limit: 本页数量
+            after: 上一页最后一篇文章的 (published, id)，为None时取第一页
+        
+        返回:
+            List: 查询结果
+        """
+        if after is None:
+            return query.limit(limit).all()
+        published, article_id = after
+        rows = cls.after_keyset(query, published, article_id).limit(limit).all()
+        if published is not None and len(rows) < limit:
+            rows += query.filter(Article.published.is_(None)).limit(limit - len(rows)).all()
+        return rows
+
+    def stream_articles(self, fields: Optional[Iterable[str]] = None, source: Optional[str] = None,
+                        sentiment: Optional[str] = None, ai_processed: Optional[bool] = None,
+                        start_date: Optional[datetime.datetime] = None, end_date: Optional[datetime.datetime] = None,
+                        limit: Optional[int] = None, chunk_size: int = DB_STREAM_CHUNK_SIZE) -> Iterator:
+        """
+        按列表页的筛选条件与排序流式读取文章，iter_* 系列方法与批量导出都基于它
+        
+        只查询指定的列，结果为行元组（可按列名访问属性）而非ORM对象；使用 yield_per 每次从数据库游标
+        取 chunk_size 行，内存占用只与 chunk_size 有关，与结果总数无关。读取期间占用一个只读连接，
+        迭代结束或生成器关闭时释放。出错时记录日志并抛出，调用方不会把不完整的结果当作完整结果
+        
+        参数:
+            fields: Article的列名，默认为 ARTICLE_FIELDS
+            source, sentiment, ai_processed, start_date, end_date: 筛选条件，同 filter_articles
+            limit: 最多返回的文章数量
+            chunk_size: 每次从游标读取的行数
+        
+        返回:
+            Iterator: 逐行产出的行元组
+        """
+        columns = [getattr(Article, name) for name in (fields or ARTICLE_FIELDS)]
+        session = self.get_read_session()
+        count = 0
+        try:
+            query = self.filter_articles(session.query(*columns), source=source, sentiment=sentiment,
+                                         ai_processed=ai_processed, start_date=start_date, end_date=end_date)
+            if limit:
+                query = query.limit(limit)
+            for row in query.yield_per(chunk_size):
+                count += 1
+                yield row
+            logger.info(f"流式读取了 {count} 篇文章")
+        except Exception as e:
+            logger.error(f"流式读取文章失败（已读取 {count} 篇）: {e}")
+            raise
+        finally:
+            session.close()
+
+    def _search_tokenizer(self) -> Optional[str]:
+        """返回全文索引使用的分词器（trigram/unicode61），索引不存在时返回None"""
+        if not hasattr(self, '_fts_tokenizer'):
+            with self.read_engine.connect() as conn:
+                sql = conn.execute(text(
+                    "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+                )).scalar()
+            if sql is None:
+                return None
+            self._fts_tokenizer = 'trigram' if 'trigram' in sql else 'unicode61'
+        return self._fts_tokenizer
+
+    @staticmethod
+    def _build_match_query(terms: List[str], tokenizer: str) -> Optional[str]:
+        """
+        将搜索词转换为安全的FTS5 MATCH表达式
+        
+        每个词都作为带引号的短语，多个词之间为AND关系，用户输入中的FTS5语法字符不会生效。
+        unicode61分词下按前缀匹配
+        """
+        phrases = []
+        for term in terms:
+            phrase = '"' + term.replace('"', '""') + '"'
+            phrases.append(phrase + '*' if tokenizer == 'unicode61' else phrase)
+        return ' '.join(phrases) or None
+
+    def search_articles(self, query: str, source: Optional[str] = None, sentiment: Optional[str] = None,
+                        ai_processed: Optional[bool] = None, start_date: Optional[datetime.datetime] = None, end_date: Optional[datetime.datetime] = None,
+                        limit: int = 10, offset: int = 0,
+                        fields: Optional[Iterable[str]] = None) -> Tuple[List[Tuple[Article, Optional[float], Optional[str]]], int]:
+        """
+        全文搜索文章，按BM25相关度排序
+        
+        trigram分词要求每个词至少3个字符，更短的词（如两个字的中文词）改为对各列做子串匹配。
+        
+        参数:
+            query: 搜索词，空白分隔的多个词之间为AND关系
+            source: 新闻来源
+            sentiment: 情感类型
+            ai_processed: 是否已AI处理
+            start_date: 开始日期（需与end_date同时提供）
+            end_date: 结束日期
+            limit: 返回数量
+            offset: 跳过数量
+            fields: 只查询这些列，文章以行元组（可按列名访问）代替Article对象返回；为None时返回不含正文的Article
+        
+        返回:
+            Tuple[List[Tuple[Article, Optional[float], Optional[str]]], int]:
+                ((文章, BM25分数, 命中摘要) 列表, 命中总数)；分数越小越相关，
+                摘要中的命中词以 SNIPPET_START/SNIPPET_END 标记
+        
+        异常:
+            RuntimeError: 数据库中没有全文索引
+        """
+        tokenizer = self._search_tokenizer()
+        if tokenizer is None:
+            raise RuntimeError("全文索引不存在，请执行 utils/db_maintenance.py rebuild-search")
+        
+        terms = [t for t in query.replace('"', ' ').split() if t]
+        min_length = 3 if tokenizer == 'trigram' else 1
+        match_terms = [t for t in terms if len(t) >= min_length]
+        like_terms = [t for t in terms if len(t) < min_length]
+        match_query = self._build_match_query(match_terms, tokenizer)
+        
+        # autoescape转义词中的 % _ 等通配符，按字面子串匹配
+        filters = [
+            or_(*(getattr(Article, c).contains(term, autoescape=True) for c in SEARCH_COLUMNS))
+            for term in like_terms
+        ]
+        session = self.get_read_session()
+        try:
+            fts = literal_column('articles_fts')
+            if match_query:
+                # 计数时先在全文索引中取出命中的rowid，避免按筛选条件逐行回查全文索引
+                matched_rowids = (
+                    select(literal_column('rowid')).select_from(table('articles_fts'))
+                    .where(fts.op('MATCH')(match_query))
+                )
+                count_filters = filters + [literal_column('articles.rowid').in_(matched_rowids)]
+            else:
+                count_filters = filters
+            total = self.filter_articles(
+                session.query(Article.id).filter(*count_filters),
+                source=source, sentiment=sentiment, ai_processed=ai_processed,
+                start_date=start_date, end_date=end_date
+            ).order_by(None).count()
+            if not total:
+                return [], 0
             
-            # 添加缺失的列
-            for column_def in columns_to_add:
-                column_name = column_def.split()[0]
-                if column_name not in current_column_names:
-                    try:
-                        conn.execute(text(f"ALTER TABLE articles ADD COLUMN {column_def}"))
-                        conn.commit()
-                        logger.info(f"成功添加列: {column_name}")
-                    except Exception as e:
-                        logger.error(f"添加列 {column_name} 失败: {e}")
-                else:
-                    logger.info(f"列 {column_name} 已存在，跳过")
-        
-        logger.info("数据库迁移完成")
+            if match_query:
+                rank = func.bm25(fts, *(literal(w) for w in SEARCH_WEIGHTS)).label('rank')
+                snippet = func.snippet(fts, -1, SNIPPET_START, SNIPPET_END, '…', 64).label('snippet')
+            else:
+                rank = literal(None).label('rank')
+                snippet = literal(None).label('snippet')
+            if fields is not None:
+                # 列投影：只查询需要的列，结果为行元组，不构造ORM对象
+                columns = [getattr(Article, name) for name in fields]
+                q = session.query(*columns, rank, snippet)
+            else:
+                q = session.query(Article, rank, snippet).options(undefer(Article.summary))
+            if match_query:
+                q = (
+                    q.select_from(table('articles_fts'))
+                    .join(Article, literal_column('articles.rowid') == literal_column('articles_fts.rowid'))
+                    .filter(fts.op('MATCH')(match_query), *filters)
+                )
+            else:
+                q = q.filter(*filters)
+            q = self.filter_articles(q, source=source, sentiment=sentiment, ai_processed=ai_processed,
+                                     start_date=start_date, end_date=end_date)
+            if match_query:
+                q = q.order_by(None).order_by(rank, Article.published.desc())
+            rows = q.offset(offset).limit(limit).all()
+            if fields is not None:
+                # 行中带有rank/snippet两列，按列名读取文章字段时不受影响
+                results = [(row, row.rank, row.snippet) for row in rows]
+            else:
+                results = [tuple(row) for row in rows]
+            return results, total
+        finally:
+            session.close()
+
+    def rebuild_search_index(self) -> bool:
+        """
+        重建全文索引（索引不存在时先创建）
+        
+        返回:
+            bool: 重建成功返回True，否则返回False
+        """
+        try:
+            with self.engine.begin() as conn:
+                create_search_index(conn)
+                rebuild_search_index(conn)
+                conn.execute(text(BUMP_DATA_VERSION_SQL))
+            self.__dict__.pop('_fts_tokenizer', None)
+            logger.info("全文索引重建完成")
+            return True
+        except Exception as e:
+            logger.error(f"重建全文索引失败: {e}")
+            return False
+
+    def get_stats(self) -> Dict:
+        """
+        读取文章统计信息（来自 article_stats 计数表，不扫描articles表）
+        
+        返回:
+            Dict: 总数、已处理/未处理数以及按来源、情感的计数
+        """
+        session = self.get_read_session()
+        try:
+            counts: Dict[str, Dict[str, int]] = {kind: {} for kind in STATS_DIMENSIONS}
+            for stat in session.query(ArticleStat).all():
+                counts.setdefault(stat.kind, {})[stat.key] = stat.count
+            total = counts['total'].get('', 0)
+            processed = counts['processed'].get('', 0)
+            return {
+                "total_articles": total,
+                "processed_articles": processed,
+                "unprocessed_articles": total - processed,
+                "source_stats": {k: v for k, v in counts['source'].items() if k and v > 0},
+                "sentiment_stats": {k: v for k, v in counts['sentiment'].items() if k and v > 0},
+            }
+        finally:
+            session.close()
+
+    def rebuild_stats(self) -> bool:
+        """
+        重新计算统计计数表（触发器缺失或计数异常时用于恢复）
+        
+        返回:
+            bool: 重建成功返回True，否则返回False
+        """
+        try:
+            with self.engine.begin() as conn:
+                ArticleStat.__table__.create(conn, checkfirst=True)
+                create_stats_triggers(conn)
+                rebuild_stats(conn)
+                conn.execute(text(BUMP_DATA_VERSION_SQL))
+            logger.info("统计计数重建完成")
+            return True
+        except Exception as e:
+            logger.error(f"重建统计计数失败: {e}")
+            return False
+
+    def get_sentiment_timeseries(self, bucket: str = 'day', source: Optional[str] = None,
+                                 start: Optional[datetime.datetime] = None,
+                                 end: Optional[datetime.datetime] = None) -> List[Dict]:
+        """
+        从情感汇总表读取情感时间序列
+        
+        参数:
+            bucket: 时间粒度，hour 或 day
+            source: 新闻来源，为空时汇总所有来源
+            start: 起始时间（含），按时间桶起点比较
+            end: 结束时间（不含）
+        
+        返回:
+            List[Dict]: 按时间升序的各时间桶统计
+        """
+        if bucket not in ROLLUP_BUCKETS:
+            raise ValueError(f"不支持的时间粒度: {bucket}")
+        session = self.get_read_session()
+        try:
+            r = SentimentRollup
+            query = session.query(
+                r.bucket_start,
+                func.sum(r.count), func.sum(r.score_count), func.sum(r.score_sum),
+                func.min(r.score_min), func.max(r.score_max),
+                func.sum(r.positive), func.sum(r.negative), func.sum(r.neutral)
+            ).filter(r.bucket == bucket)
+            if source is not None:
+                query = query.filter(r.source == source)
+            if start:
+                query = query.filter(r.bucket_start >= start.strftime('%Y-%m-%d %H:%M:%S'))
+            if end:
+                query = query.filter(r.bucket_start < end.strftime('%Y-%m-%d %H:%M:%S'))
+            points = []
+            for row in query.group_by(r.bucket_start).order_by(r.bucket_start):
+                bucket_start, count, scored, score_sum, score_min, score_max, positive, negative, neutral = row
+                points.append({
+                    "bucket_start": bucket_start,
+                    "count": count,
+                    "scored": scored,
+                    "avg_score": round(score_sum / scored, 4) if scored else None,
+                    "min_score": score_min,
+                    "max_score": score_max,
+                    "positive": positive,
+                    "negative": negative,
+                    "neutral": neutral,
+                })
+            return points
+        finally:
+            session.close()
+
+    def rebuild_rollups(self) -> bool:
+        """
+        重新计算情感汇总表
+        
+        返回:
+            bool: 重建成功返回True，否则返回False
+        """
+        try:
+            with self.engine.begin() as conn:
+                SentimentRollup.__table__.create(conn, checkfirst=True)
+                create_rollup_triggers(conn)
+                rebuild_rollups(conn)
+                conn.execute(text(BUMP_DATA_VERSION_SQL))
+            logger.info("情感汇总重建完成")
+            return True
+        except Exception as e:
+            logger.error(f"重建情感汇总失败: {e}")
+            return False
 
     def add_article(self, article_data: Dict) -> bool:
         """
@@ -151,9 +1231,84 @@ class Database:
         finally:
             session.close()
 
+    def add_articles_bulk(self, articles: List[Dict]) -> List[str]:
+        """
+        在一个事务中批量添加文章，已存在的ID会被跳过
+        
+        使用 INSERT ... ON CONFLICT DO NOTHING 批量执行，整批只提交一次
+        
+        参数:
+            articles: 文章数据字典列表，字段同add_article
+        
+        返回:
+            List[str]: 实际新插入的文章ID
+        """
+        rows = {}
+        for article_data in articles:
+            if article_data.get('id') and article_data['id'] not in rows:
+                rows[article_data['id']] = {
+                    'id': article_data['id'],
+                    'source': article_data.get('source'),
+                    'title': article_data.get('title'),
+                    'link': article_data.get('link'),
+                    'summary': article_data.get('summary'),
+                    'published': article_data.get('published'),
+                    'content': article_data.get('content'),
+                    'author': article_data.get('author'),
+                    'sentiment': article_data.get('sentiment'),
+                    'sentiment_score': article_data.get('sentiment_score'),
+                    'chinese_summary': article_data.get('chinese_summary'),
+                    'keywords': article_data.get('keywords'),
+                    'ai_processed': article_data.get('ai_processed', False)
+                }
+        if not rows:
+            return []
+        
+        session = self.get_session()
+        try:
+            stmt = sqlite_insert(Article).on_conflict_do_nothing(index_elements=['id']).returning(Article.id)
+            new_ids = session.execute(stmt, list(rows.values())).scalars().all()
+            session.commit()
+            logger.info(f"批量添加文章: {len(new_ids)}/{len(rows)} 篇为新文章")
+            return list(new_ids)
+        except Exception as e:
+            session.rollback()
+            logger.error(f"批量添加 {len(rows)} 篇文章失败: {e}")
+            return []
+        finally:
+            session.close()
+
+    def get_existing_ids(self, article_ids: Iterable[str]) -> Set[str]:
+        """
+        批量检查文章是否已存在
+        
+        参数:
+            article_ids: 待检查的文章ID
+        
+        返回:
+            Set[str]: 其中已存在于数据库的文章ID集合
+        """
+        ids = list(dict.fromkeys(i for i in article_ids if i))
+        if not ids:
+            return set()
+        session = self.get_read_session()
+        try:
+            existing = set()
+            # 分块查询，避免超过SQLite的绑定参数上限
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                rows = session.query(Article.id).filter(Article.id.in_(chunk)).all()
+                existing.update(row[0] for row in rows)
+            return existing
+        except Exception as e:
+            logger.error(f"批量检查文章是否存在失败: {e}")
+            return set()
+        finally:
+            session.close()
+
     def get_articles_by_source(self, source: str) -> List[Article]:
         """
-        根据来源获取文章
+        根据来源获取文章，结果一次性加载为ORM对象列表；大结果集请使用 iter_articles_by_source
         
         参数:
             source: 新闻来源
@@ -161,9 +1316,12 @@ class Database:
         返回:
             List[Article]: 文章列表
         """
-        session = self.get_session()
+        session = self.get_read_session()
         try:
-            articles = session.query(Article).filter_by(source=source).order_by(Article.published.desc()).all()
+            articles = (
+                session.query(Article).options(undefer_group('body'))
+                .filter_by(source=source).order_by(Article.published.desc()).all()
+            )
             logger.info(f"成功获取来源 {source} 的 {len(articles)} 篇文章")
             return articles
         except Exception as e:
@@ -172,9 +1330,24 @@ class Database:
         finally:
             session.close()
 
+    def iter_articles_by_source(self, source: str, fields: Optional[Iterable[str]] = None,
+                                chunk_size: int = DB_STREAM_CHUNK_SIZE) -> Iterator:
+        """
+        根据来源流式获取文章，get_articles_by_source 的迭代器版本，适合大结果集
+        
+        参数:
+            source: 新闻来源
+            fields: 需要的列名，默认为 ARTICLE_FIELDS
+            chunk_size: 每次从数据库读取的行数
+        
+        返回:
+            Iterator: 逐行产出的行元组，见 stream_articles
+        """
+        return self.stream_articles(fields, source=source, chunk_size=chunk_size)
+
     def get_articles_by_date_range(self, start_date: datetime.datetime, end_date: datetime.datetime) -> List[Article]:
         """
-        根据日期范围获取文章
+        根据日期范围获取文章，结果一次性加载为ORM对象列表；大结果集请使用 iter_articles_by_date_range
         
         参数:
             start_date: 开始日期
@@ -183,9 +1356,9 @@ class Database:
         返回:
             List[Article]: 文章列表
         """
-        session = self.get_session()
+        session = self.get_read_session()
         try:
-            articles = session.query(Article).filter(
+            articles = session.query(Article).options(undefer_group('body')).filter(
                 Article.published.between(start_date, end_date)
             ).order_by(Article.published.desc()).all()
             logger.info(f"成功获取日期范围 {start_date} 到 {end_date} 的 {len(articles)} 篇文章")
@@ -196,16 +1369,33 @@ class Database:
         finally:
             session.close()
 
+    def iter_articles_by_date_range(self, start_date: datetime.datetime, end_date: datetime.datetime,
+                                    fields: Optional[Iterable[str]] = None,
+                                    chunk_size: int = DB_STREAM_CHUNK_SIZE) -> Iterator:
+        """
+        根据日期范围流式获取文章，get_articles_by_date_range 的迭代器版本，适合大结果集
+        
+        参数:
+            start_date: 开始日期
+            end_date: 结束日期
+            fields: 需要的列名，默认为 ARTICLE_FIELDS
+            chunk_size: 每次从数据库读取的行数
+        
+        返回:
+            Iterator: 逐行产出的行元组，见 stream_articles
+        """
+        return self.stream_articles(fields, start_date=start_date, end_date=end_date, chunk_size=chunk_size)
+
     def get_all_articles(self) -> List[Article]:
         """
-        获取所有文章
+        获取所有文章，结果一次性加载为ORM对象列表；大结果集请使用 iter_all_articles
         
         返回:
             List[Article]: 所有文章列表
         """
-        session = self.get_session()
+        session = self.get_read_session()
         try:
-            articles = session.query(Article).order_by(Article.published.desc()).all()
+            articles = session.query(Article).options(undefer_group('body')).order_by(Article.published.desc()).all()
             logger.info(f"成功获取数据库中的 {len(articles)} 篇文章")
             return articles
         except Exception as e:
@@ -214,6 +1404,20 @@ class Database:
         finally:
             session.close()
 
+    def iter_all_articles(self, fields: Optional[Iterable[str]] = None,
+                          chunk_size: int = DB_STREAM_CHUNK_SIZE) -> Iterator:
+        """
+        流式获取所有文章，get_all_articles 的迭代器版本，全表扫描时内存占用只与chunk_size有关
+        
+        参数:
+            fields: 需要的列名，默认为 ARTICLE_FIELDS
+            chunk_size: 每次从数据库读取的行数
+        
+        返回:
+            Iterator: 逐行产出的行元组，见 stream_articles
+        """
+        return self.stream_articles(fields, chunk_size=chunk_size)
+
     def update_article(self, article_id: str, update_data: Dict) -> bool:
         """
         更新文章的信息
@@ -271,7 +1475,7 @@ class Database:
 
     def get_unprocessed_articles(self, limit: int = None) -> List[Article]:
         """
-        获取所有未经过AI处理的文章
+        获取所有未经过AI处理的文章，结果一次性加载为ORM对象列表；大结果集请使用 iter_unprocessed_articles
         
         参数:
             limit: 限制返回的文章数量
@@ -279,9 +1483,12 @@ class Database:
         返回:
             List[Article]: 未处理的文章列表
         """
-        session = self.get_session()
+        session = self.get_read_session()
         try:
-            query = session.query(Article).filter_by(ai_processed=False).order_by(Article.published.desc())
+            query = (
+                session.query(Article).options(undefer_group('body'))
+                .filter_by(ai_processed=False).order_by(Article.published.desc())
+            )
             if limit:
                 query = query.limit(limit)
             articles = query.all()
@@ -292,9 +1499,205 @@ class Database:
             return []
         finally:
             session.close()
+    def iter_unprocessed_articles(self, limit: int = None, fields: Optional[Iterable[str]] = None,
+                                  chunk_size: int = DB_STREAM_CHUNK_SIZE) -> Iterator:
+        """
+        流式获取未经过AI处理的文章，get_unprocessed_articles 的迭代器版本
+        
+        只读取，不认领；并发处理文章请使用 claim_unprocessed_articles
+        
+        参数:
+            limit: 限制返回的文章数量
+            fields: 需要的列名，默认为 ARTICLE_FIELDS
+            chunk_size: 每次从数据库读取的行数
+        
+        返回:
+            Iterator: 逐行产出的行元组，见 stream_articles
+        """
+        return self.stream_articles(fields, ai_processed=False, limit=limit, chunk_size=chunk_size)
+
+    def get_feed_validators(self, url: str) -> Dict[str, Optional[str]]:
+        """
+        获取RSS源上次抓取保存的条件请求校验值
+        
+        参数:
+            url: RSS源地址
+        
+        返回:
+            Dict: 包含etag和modified的字典，没有记录时均为None
+        """
+        session = self.get_read_session()
+        try:
+            state = session.query(FeedState).filter_by(url=url).first()
+            if not state:
+                return {'etag': None, 'modified': None}
+            return {'etag': state.etag, 'modified': state.last_modified}
+        except Exception as e:
+            logger.error(f"获取RSS源 {url} 的校验值失败: {e}")
+            return {'etag': None, 'modified': None}
+        finally:
+            session.close()
+
+    def save_feed_validators(self, url: str, etag: Optional[str], modified: Optional[str]) -> bool:
+        """
+        保存RSS源的条件请求校验值
+        
+        参数:
+            url: RSS源地址
+            etag: 响应中的ETag
+            modified: 响应中的Last-Modified
+        
+        返回:
+            bool: 是否保存成功
+        """
+        session = self.get_session()
+        try:
+            state = session.query(FeedState).filter_by(url=url).first()
+            if not state:
+                state = FeedState(url=url)
+                session.add(state)
+            state.etag = etag
+            state.last_modified = modified
+            state.updated_at = datetime.datetime.now()
+            session.commit()
+            logger.debug(f"已保存RSS源 {url} 的校验值")
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"保存RSS源 {url} 的校验值失败: {e}")
+            return False
+        finally:
+            session.close()
+
+    # 允许通过update_article/complete_article更新的字段
+    UPDATABLE_FIELDS = (
+        'title', 'link', 'source', 'summary', 'published', 'content', 'author', 'keywords',
+        'sentiment', 'sentiment_score', 'chinese_summary', 'ai_processed'
+    )
+
+    def claim_unprocessed_articles(self, worker_id: str, limit: int, lease_seconds: int = PROCESS_LEASE_SEC,
+                                   fields: Optional[Iterable[str]] = None) -> List:
+        """
+        原子地认领一批未处理且未被租用（或租约已过期）的文章
+        
+        认领通过单条UPDATE完成，多个进程或线程同时认领时不会拿到同一篇文章。
+        处理完成后调用complete_article写回结果，放弃处理时调用release_articles
+        
+        参数:
+            worker_id: 工作进程ID，需在所有并发的处理者之间唯一
+            limit: 最多认领的文章数量
+            lease_seconds: 租约时长（秒）
+            fields: 需要取回的列名，默认为 ARTICLE_FIELDS
+        
+        返回:
+            List: 认领到的文章行元组（可按列名访问属性）
+        """
+        session = self.get_session()
+        try:
+            now = datetime.datetime.now()
+            expires = now + datetime.timedelta(seconds=lease_seconds)
+            claimable = (Article.ai_processed == False) & or_(
+                Article.lease_expires.is_(None), Article.lease_expires < now
+            )
+            candidates = (
+                select(Article.id).where(claimable)
+                .order_by(Article.published.desc()).limit(limit)
+            )
+            session.execute(
+                update(Article)
+                .where(Article.id.in_(candidates), claimable)
+                .values(lease_owner=worker_id, lease_expires=expires),
+                execution_options={"synchronize_session": False}
+            )
+            # 只取回需要的列，结果为行元组，不构造ORM对象，提交后也可在会话外访问
+            articles = (
+                session.query(*[getattr(Article, name) for name in (fields or ARTICLE_FIELDS)])
+                .filter(Article.lease_owner == worker_id, Article.lease_expires == expires)
+                .order_by(Article.published.desc())
+                .all()
+            )
+            session.commit()
+            logger.info(f"工作进程 {worker_id} 认领了 {len(articles)} 篇未处理的文章")
+            return articles
+        except Exception as e:
+            session.rollback()
+            logger.error(f"认领未处理文章失败: {e}")
+            return []
+        finally:
+            session.close()
+
+    def complete_article(self, article_id: str, worker_id: str, update_data: Dict) -> bool:
+        """
+        写回已认领文章的处理结果并释放租约
+        
+        仅当租约仍归worker_id所有时才写入，避免租约过期后被其他进程重新认领时重复写入
+        
+        参数:
+            article_id: 文章ID
+            worker_id: 认领时使用的工作进程ID
+            update_data: 要更新的数据字典
+        
+        返回:
+            bool: 是否更新成功
+        """
+        session = self.get_session()
+        try:
+            values = {k: v for k, v in update_data.items() if k in self.UPDATABLE_FIELDS}
+            values.update(lease_owner=None, lease_expires=None, updated_at=datetime.datetime.now())
+            result = session.execute(
+                update(Article)
+                .where(Article.id == article_id, Article.lease_owner == worker_id)
+                .values(**values),
+                execution_options={"synchronize_session": False}
+            )
+            session.commit()
+            if result.rowcount == 0:
+                logger.warning(f"文章 {article_id} 的租约已不属于 {worker_id}，放弃写入")
+                return False
+            logger.info(f"成功更新文章 {article_id}")
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error(f"更新文章 {article_id} 失败: {e}")
+            return False
+        finally:
+            session.close()
+
+    def release_articles(self, article_ids: Iterable[str], worker_id: str) -> int:
+        """
+        释放认领但未完成处理的文章，使其可被立即重新认领
+        
+        参数:
+            article_ids: 文章ID
+            worker_id: 认领时使用的工作进程ID
+        
+        返回:
+            int: 实际释放的文章数量
+        """
+        ids = list(article_ids)
+        if not ids:
+            return 0
+        session = self.get_session()
+        try:
+            result = session.execute(
+                update(Article)
+                .where(Article.id.in_(ids), Article.lease_owner == worker_id)
+                .values(lease_owner=None, lease_expires=None),
+                execution_options={"synchronize_session": False}
+            )
+            session.commit()
+            logger.info(f"工作进程 {worker_id} 释放了 {result.rowcount} 篇文章")
+            return result.rowcount
+        except Exception as e:
+            session.rollback()
+            logger.error(f"释放文章租约失败: {e}")
+            return 0
+        finally:
+            session.close()
+
     def get_sentiment_articles(self, sentiment: str) -> List[Article]:
         """
-        获取所有情感为指定值的文章
+        获取所有情感为指定值的文章，结果一次性加载为ORM对象列表；大结果集请使用 iter_sentiment_articles
         
         参数:
             sentiment: 情感值（'positive', 'negative', 'neutral'）
@@ -302,9 +1705,12 @@ class Database:
         返回:
             List[Article]: 情感为指定值的文章列表
         """
-        session = self.get_session()
+        session = self.get_read_session()
         try:
-            articles = session.query(Article).filter_by(sentiment=sentiment).order_by(Article.published.desc()).all()
+            articles = (
+                session.query(Article).options(undefer_group('body'))
+                .filter_by(sentiment=sentiment).order_by(Article.published.desc()).all()
+            )
             logger.info(f"成功获取情感为 {sentiment} 的 {len(articles)} 篇文章")
             return articles
         except Exception as e:
@@ -312,13 +1718,29 @@ class Database:
             return []
         finally:
             session.close()
+    def iter_sentiment_articles(self, sentiment: str, fields: Optional[Iterable[str]] = None,
+                                chunk_size: int = DB_STREAM_CHUNK_SIZE) -> Iterator:
+        """
+        流式获取情感为指定值的文章，get_sentiment_articles 的迭代器版本，适合大结果集
+        
+        参数:
+            sentiment: 情感值（'positive', 'negative', 'neutral'）
+            fields: 需要的列名，默认为 ARTICLE_FIELDS
+            chunk_size: 每次从数据库读取的行数
+        
+        返回:
+            Iterator: 逐行产出的行元组，见 stream_articles
+        """
+        return self.stream_articles(fields, sentiment=sentiment, chunk_size=chunk_size)
+
 # 示例用法
 if __name__ == "__main__":
     # 初始化数据库连接
-    db = Database(DB_URL)
+    db = get_database(DB_URL)
     
     print("数据库连接成功！")
     print("已创建articles表")
-    re=db.get_unprocessed_articles()
+    # 只取ID流式计数，不把全部未处理文章加载到内存
+    count = sum(1 for _ in db.iter_unprocessed_articles(fields=("id",)))
     
-    print(f"未处理文章数量: {len(re)}")
+    print(f"未处理文章数量: {count}")
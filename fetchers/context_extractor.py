@@ -1,36 +1,263 @@
+import sys
+import os
+# 将项目根目录添加到Python路径以解决config模块导入问题
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import atexit
 import logging
-from typing import Optional
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Iterable, Iterator, Tuple, Dict
+from urllib.parse import urlparse
 try:
     import trafilatura
     _TRAFILATURA_AVAILABLE = True
 except Exception:
     _TRAFILATURA_AVAILABLE = False
 
+from config.config import EXTRACT_DOWNLOAD_WORKERS, EXTRACT_PROCESS_WORKERS, EXTRACT_PER_HOST_LIMIT
+from fetchers.extraction_cache import ExtractionCache, get_extraction_cache
+
 
 logger = logging.getLogger(__name__)
 
 
-def extract_with_trafilatura(url: str) -> Optional[str]:
-    if not _TRAFILATURA_AVAILABLE:
-        return None
+def _download(url: str) -> Optional[str]:
+    """下载网页HTML（网络密集）"""
     try:
-        downloaded = trafilatura.fetch_url(url)
-        if downloaded:
-            content = trafilatura.extract(
-                downloaded,
-                favor_precision=False,
-                deduplicate=True,
-                favor_recall=True,
-                include_comments=False,
-                include_tables=False,
-                include_images=False,
-                output_format="txt"
-            )
-            return content
+        return trafilatura.fetch_url(url)
+    except Exception:
         return None
+
+
+def _extract_text(downloaded: str) -> Optional[str]:
+    """从HTML中提取正文（CPU密集），需为模块级函数以便在子进程中执行"""
+    try:
+        return trafilatura.extract(
+            downloaded,
+            favor_precision=False,
+            deduplicate=True,
+            favor_recall=True,
+            include_comments=False,
+            include_tables=False,
+            include_images=False,
+            output_format="txt"
+        )
     except Exception:
         return None
 
+
+def extract_with_trafilatura(url: str, refresh: bool = False) -> Optional[str]:
+    if not _TRAFILATURA_AVAILABLE:
+        return None
+    cache = get_extraction_cache()
+    downloaded = None
+    if cache and not refresh:
+        downloaded, text = cache.get(url)
+        if text:
+            return text
+    if not downloaded:
+        downloaded = _download(url)
+    if downloaded:
+        text = _extract_text(downloaded)
+        if cache:
+            cache.put(url, downloaded, text)
+        return text
+    return None
+
+
+# 各进程数对应的共享提取进程池，进程内长期复用，进程退出时关闭
+_process_pools: Dict[int, ProcessPoolExecutor] = {}
+_process_pools_lock = threading.Lock()
+
+
+def get_process_pool(workers: int = EXTRACT_PROCESS_WORKERS) -> ProcessPoolExecutor:
+    """
+    获取进程内共享的正文提取进程池
+
+    子进程以spawn方式启动，不复制调用方（如uvicorn）的线程与锁状态；
+    进程池在首次使用时创建，之后所有ExtractionPool共用，避免每次批量提取都启动新的子进程
+    """
+    with _process_pools_lock:
+        pool = _process_pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _process_pools[workers] = pool
+        return pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor):
+    """丢弃已损坏的共享进程池，下次使用时重新创建"""
+    with _process_pools_lock:
+        for workers, current in list(_process_pools.items()):
+            if current is pool:
+                del _process_pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def shutdown_process_pools():
+    """关闭全部共享进程池"""
+    with _process_pools_lock:
+        pools = list(_process_pools.values())
+        _process_pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+class ExtractionPool:
+    """
+    正文批量提取池
+    
+    下载在线程池中进行，并按站点限制并发数；HTML转文本交给进程内共享的进程池，
+    避免CPU密集的解析阻塞下载线程。已缓存的正文直接返回，
+    已缓存HTML的页面只做提取不再下载。可作为上下文管理器使用
+    """
+    
+    def __init__(self, download_workers: int = EXTRACT_DOWNLOAD_WORKERS,
+                 process_workers: int = EXTRACT_PROCESS_WORKERS,
+                 per_host_limit: int = EXTRACT_PER_HOST_LIMIT,
+                 cache: Optional[ExtractionCache] = None, use_cache: bool = True):
+        self.per_host_limit = max(1, per_host_limit)
+        self.cache = cache or (get_extraction_cache() if use_cache else None)
+        self._downloader = ThreadPoolExecutor(max_workers=max(1, download_workers), thread_name_prefix='extract-dl')
+        self._extractor = get_process_pool(process_workers) if process_workers > 0 else None
+        self._host_slots: Dict[str, threading.Semaphore] = {}
+        self._host_lock = threading.Lock()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def close(self):
+        """关闭下载线程池，共享的提取进程池保留给之后的批量提取"""
+        self._downloader.shutdown(wait=True, cancel_futures=True)
+    
+    def _host_slot(self, url: str) -> threading.Semaphore:
+        host = urlparse(url).netloc.lower()
+        with self._host_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.Semaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+    
+    def _disable_extractor(self):
+        """进程池损坏后停用并丢弃，本批后续改为在线程内提取"""
+        if self._extractor:
+            logger.warning("正文提取进程池不可用，改为线程内提取")
+            _discard_process_pool(self._extractor)
+            self._extractor = None
+    
+    def _download_limited(self, url: str) -> Optional[str]:
+        with self._host_slot(url):
+            return _download(url)
+    
+    def _download_and_extract(self, url: str, downloaded: Optional[str] = None) -> Optional[str]:
+        if not downloaded:
+            downloaded = self._download_limited(url)
+        text = _extract_text(downloaded) if downloaded else None
+        self._store(url, downloaded, text)
+        return text
+    
+    def _store(self, url: str, downloaded: Optional[str], text: Optional[str]):
+        if self.cache and downloaded:
+            self.cache.put(url, downloaded, text)
+    
+    def _submit_extract(self, url: str, downloaded: str, pending: Dict):
+        """将已下载的HTML交给进程池提取，进程池不可用时在下载线程池中提取"""
+        if self._extractor is not None:
+            try:
+                pending[self._extractor.submit(_extract_text, downloaded)] = (url, 'extract', downloaded)
+                return
+            except (BrokenProcessPool, RuntimeError):
+                # 共享进程池已损坏，或已被其他批次丢弃并关闭
+                self._disable_extractor()
+        pending[self._downloader.submit(self._download_and_extract, url, downloaded)] = (url, 'done', None)
+    
+    def extract_many(self, urls: Iterable[str], refresh: bool = False) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        批量提取正文，按完成顺序逐个返回
+        
+        参数:
+            urls: 文章链接，重复链接只提取一次
+            refresh: 为True时忽略缓存，重新下载并提取
+        
+        返回:
+            Iterator[Tuple[str, Optional[str]]]: (链接, 正文) 二元组，提取失败时正文为None
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))
+        if not urls:
+            return
+        if not _TRAFILATURA_AVAILABLE:
+            for url in urls:
+                yield url, None
+            return
+        
+        # pending: future -> (链接, 阶段, 已下载的HTML)
+        pending = {}
+        try:
+            yield from self._collect(urls, refresh, pending)
+        finally:
+            # 调用方提前停止迭代时，取消本批尚未开始的提取任务，不影响共享进程池中的其他批次
+            for future in pending:
+                future.cancel()
+    
+    def _collect(self, urls, refresh: bool, pending: Dict) -> Iterator[Tuple[str, Optional[str]]]:
+        for url in urls:
+            if self.cache and not refresh:
+                downloaded, text = self.cache.get(url)
+                if text:
+                    yield url, text
+                    continue
+                if downloaded:
+                    self._submit_extract(url, downloaded, pending)
+                    continue
+            if self._extractor is None:
+                pending[self._downloader.submit(self._download_and_extract, url)] = (url, 'done', None)
+            else:
+                pending[self._downloader.submit(self._download_limited, url)] = (url, 'download', None)
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, stage, downloaded = pending.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    # 进程池不可用时退回到线程内提取
+                    self._disable_extractor()
+                    pending[self._downloader.submit(self._download_and_extract, url, downloaded)] = (url, 'done', None)
+                    continue
+                except Exception as e:
+                    logger.error(f"提取正文失败 {url}: {e}")
+                    yield url, None
+                    continue
+                
+                if stage == 'download':
+                    if result:
+                        self._submit_extract(url, result, pending)
+                        continue
+                elif stage == 'extract':
+                    self._store(url, downloaded, result)
+                yield url, result
+
+
+def extract_many(urls: Iterable[str], refresh: bool = False, **kwargs) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    使用临时提取池批量提取正文，其余参数同ExtractionPool
+    
+    返回:
+        Iterator[Tuple[str, Optional[str]]]: 按完成顺序返回的 (链接, 正文) 二元组
+    """
+    with ExtractionPool(**kwargs) as pool:
+        yield from pool.extract_many(urls, refresh=refresh)
+
+
 if __name__ == "__main__":
     content = extract_with_trafilatura("https://cryptoslate.com/the-hubris-in-pretending-bitcoins-story-doesnt-include-79k-this-year/")
-    print(content)
\ No newline at end of file
+    print(content)
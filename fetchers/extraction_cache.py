@@ -0,0 +1,212 @@
+import sys
+import os
+# 将项目根目录添加到Python路径以解决config模块导入问题
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional, Tuple
+
+from config.config import EXTRACT_CACHE_DIR, EXTRACT_CACHE_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """
+    正文提取的本地磁盘缓存
+
+    内容按SHA-256寻址，以zlib压缩后存放在 objects/ 目录下，相同内容只存一份；
+    index.db 记录每个URL对应的原始HTML与正文的内容哈希以及最近访问时间。
+    总大小超过上限时按最近最少使用的URL淘汰，并删除不再被引用的内容。
+    总大小在进程内累计维护，只在超过上限、准备淘汰时才从索引重新求和
+    """
+
+    def __init__(self, cache_dir: str = EXTRACT_CACHE_DIR, max_bytes: int = EXTRACT_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._objects_dir = os.path.join(cache_dir, 'objects')
+        os.makedirs(self._objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(cache_dir, 'index.db'), check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                html_hash TEXT,
+                text_hash TEXT,
+                fetched_at REAL,
+                last_access REAL
+            );
+            CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access);
+            CREATE INDEX IF NOT EXISTS ix_entries_html_hash ON entries (html_hash);
+            CREATE INDEX IF NOT EXISTS ix_entries_text_hash ON entries (text_hash);
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            );
+        """)
+        self._conn.commit()
+        self._total_bytes = self._sum_sizes()
+
+    def close(self):
+        """关闭索引数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._objects_dir, digest[:2], digest + '.z')
+
+    def _read_blob(self, digest: Optional[str]) -> Optional[str]:
+        if not digest:
+            return None
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                return zlib.decompress(f.read()).decode('utf-8')
+        except (OSError, zlib.error, UnicodeDecodeError):
+            return None
+
+    def _write_blob(self, value: Optional[str]) -> Optional[str]:
+        """写入内容并返回其哈希，内容已存在时直接复用"""
+        if not value:
+            return None
+        data = value.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        if self._conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone():
+            return digest
+        path = self._blob_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = zlib.compress(data, 6)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        self._conn.execute("INSERT OR REPLACE INTO blobs (hash, size) VALUES (?, ?)", (digest, len(compressed)))
+        self._total_bytes += len(compressed)
+        return digest
+
+    def get(self, url: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        读取缓存
+
+        参数:
+            url: 文章链接
+
+        返回:
+            Tuple[Optional[str], Optional[str]]: (原始HTML, 正文)，未命中时均为None
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT html_hash, text_hash FROM entries WHERE url = ?", (url,)
+                ).fetchone()
+                if not row:
+                    return None, None
+                self._conn.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), url))
+                self._conn.commit()
+                return self._read_blob(row[0]), self._read_blob(row[1])
+        except Exception as e:
+            logger.error(f"读取提取缓存失败 {url}: {e}")
+            return None, None
+
+    def get_text(self, url: str) -> Optional[str]:
+        """读取缓存的正文"""
+        return self.get(url)[1]
+
+    def put(self, url: str, html: Optional[str], text: Optional[str]):
+        """
+        写入缓存，并在超过容量上限时淘汰旧条目
+
+        参数:
+            url: 文章链接
+            html: 原始HTML
+            text: 提取出的正文
+        """
+        if not url or (not html and not text):
+            return
+        try:
+            with self._lock:
+                now = time.time()
+                previous = self._conn.execute(
+                    "SELECT html_hash, text_hash FROM entries WHERE url = ?", (url,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (url, html_hash, text_hash, fetched_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (url, self._write_blob(html), self._write_blob(text), now, now)
+                )
+                # 覆盖旧条目后，旧内容可能不再被引用
+                if previous:
+                    self._remove_orphans(previous)
+                self._conn.commit()
+                self._evict()
+        except Exception as e:
+            logger.error(f"写入提取缓存失败 {url}: {e}")
+
+    def _sum_sizes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _remove_orphans(self, digests):
+        """删除给定哈希中已不被任何条目引用的内容，只检查这些哈希，不扫描整个索引"""
+        for digest in {d for d in digests if d}:
+            row = self._conn.execute("""
+                SELECT size FROM blobs
+                WHERE hash = ?
+                  AND NOT EXISTS (SELECT 1 FROM entries WHERE html_hash = blobs.hash)
+                  AND NOT EXISTS (SELECT 1 FROM entries WHERE text_hash = blobs.hash)
+            """, (digest,)).fetchone()
+            if not row:
+                continue
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+            self._conn.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+            self._total_bytes -= row[0]
+
+    def _evict(self):
+        """总大小超过上限时，按最近访问时间从旧到新淘汰URL条目"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        # 其他进程可能共用同一缓存目录，淘汰前以索引中的实际总大小为准
+        self._total_bytes = self._sum_sizes()
+        evicted = 0
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT url, html_hash, text_hash FROM entries ORDER BY last_access LIMIT 20"
+            ).fetchall()
+            if not rows:
+                # 条目已全部淘汰，清理之前遗留的无引用内容
+                self._remove_orphans(digest for (digest,) in self._conn.execute("""
+                    SELECT hash FROM blobs
+                    WHERE NOT EXISTS (SELECT 1 FROM entries WHERE html_hash = blobs.hash)
+                      AND NOT EXISTS (SELECT 1 FROM entries WHERE text_hash = blobs.hash)
+                """).fetchall())
+                break
+            self._conn.executemany("DELETE FROM entries WHERE url = ?", [(row[0],) for row in rows])
+            evicted += len(rows)
+            self._remove_orphans(digest for row in rows for digest in row[1:])
+        self._conn.commit()
+        logger.info(f"提取缓存超出容量，已淘汰 {evicted} 个条目")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """获取进程内共享的提取缓存，EXTRACT_CACHE_MAX_MB 为0或初始化失败时返回None"""
+    global _cache
+    if EXTRACT_CACHE_MAX_MB <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = ExtractionCache()
+            except Exception as e:
+                logger.error(f"初始化提取缓存失败: {e}")
+                return None
+        return _cache
@@ -7,37 +7,81 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import feedparser
 import time
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 # 导入配置
-from config.config import RSS_FEEDS
+from config.config import RSS_FEEDS, TIMEOUT, FEED_FETCH_WORKERS
 
 # 获取当前模块的日志记录器，用于输出本模块的日志信息
 logger = logging.getLogger(__name__)
 class RSSFetcher:
     """RSS抓取器"""
     
-    def __init__(self, feed_config: Dict):
+    # 添加请求头避免被阻止
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Accept': 'application/xml, text/xml, application/rss+xml'
+    }
+    
+    def __init__(self, feed_config: Dict, session: Optional[requests.Session] = None, timeout: float = TIMEOUT,
+                 etag: Optional[str] = None, modified: Optional[str] = None):
         self.config = feed_config
+        self.session = session
+        self.timeout = timeout
+        self.response_headers = {}
+        # 条件请求校验值，抓取成功后更新为服务器返回的新值
+        self.etag = etag
+        self.modified = modified
+        self.not_modified = False
+        self.articles = []
     
-    def fetch(self) -> List[Dict]:
-        """获取RSS内容"""
+    def download(self) -> Optional[bytes]:
+        """
+        下载RSS原始内容
+        
+        timeout为整个下载过程的上限（连接+读取），超时视为本次抓取失败。
+        带有上次的ETag/Last-Modified时发送条件请求，服务器返回304时
+        将not_modified置为True并返回None
+        
+        返回:
+            Optional[bytes]: RSS原始字节，失败或未更新时返回None
+        """
+        logger.info(f"正在抓取: {self.config['name']} - {self.config['url']}")
+        http = self.session or requests
+        headers = dict(self.HEADERS)
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.modified:
+            headers['If-Modified-Since'] = self.modified
+        deadline = time.monotonic() + self.timeout
         try:
-            logger.info(f"正在抓取: {self.config['name']} - {self.config['url']}")
-            
-            # 添加请求头避免被阻止
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'application/xml, text/xml, application/rss+xml'
-            }
-            
-            # feedparser会自动处理重定向和编码
-            feed = feedparser.parse(
-                self.config['url'],
-                request_headers=headers,
-                agent=headers['User-Agent']
-            )
+            with http.get(self.config['url'], headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304:
+                    logger.info(f"RSS源 {self.config['name']} 自上次抓取后未更新")
+                    self.not_modified = True
+                    return None
+                response.raise_for_status()
+                chunks = []
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"下载超过 {self.timeout} 秒")
+                    chunks.append(chunk)
+                self.response_headers = {k.lower(): v for k, v in response.headers.items()}
+                self.etag = response.headers.get('ETag')
+                self.modified = response.headers.get('Last-Modified')
+                return b''.join(chunks)
+        except Exception as e:
+            logger.error(f"抓取RSS失败 {self.config['name']}: {e}")
+            return None
+    
+    def parse(self, data: bytes) -> List[Dict]:
+        """将RSS原始内容解析为文章列表"""
+        try:
+            # feedparser会根据响应头自动处理编码
+            feed = feedparser.parse(data, response_headers=self.response_headers)
             
             if feed.bozo and feed.bozo_exception:
                 logger.warning(f"RSS解析警告: {feed.bozo_exception}")
@@ -60,9 +104,16 @@ class RSSFetcher:
             return articles
             
         except Exception as e:
-            logger.error(f"抓取RSS失败 {self.config['name']}: {e}")
+            logger.error(f"解析RSS失败 {self.config['name']}: {e}")
             return []
     
+    def fetch(self) -> List[Dict]:
+        """获取RSS内容"""
+        data = self.download()
+        # 304未更新时直接跳过解析
+        self.articles = self.parse(data) if data is not None else []
+        return self.articles
+    
     def _parse_entry(self, entry) -> Optional[Dict]:
         """解析单个RSS条目"""
         try:
@@ -116,6 +167,52 @@ class RSSFetcher:
             return None
 
 
+def fetch_all_feeds(feeds: Dict[str, Dict] = RSS_FEEDS, max_workers: int = FEED_FETCH_WORKERS,
+                    timeout: float = TIMEOUT, validators: Optional[Dict[str, Dict]] = None) -> Dict[str, RSSFetcher]:
+    """
+    并发抓取多个RSS源
+    
+    所有源在线程池中并行下载，共享一个带连接池的HTTP会话，
+    每个源单独受timeout限制，整轮耗时取决于最慢的源而不是所有源之和
+    
+    参数:
+        feeds: 源名称到源配置的映射
+        max_workers: 最大并发下载数
+        timeout: 单个源的下载超时（秒）
+        validators: 源名称到上次校验值（etag/modified）的映射，用于条件请求
+    
+    返回:
+        Dict[str, RSSFetcher]: 源名称到已完成抓取的抓取器的映射，
+            文章列表在articles属性中，新的校验值在etag/modified属性中
+    """
+    validators = validators or {}
+    fetchers = {}
+    for name, config in feeds.items():
+        saved = validators.get(name) or {}
+        fetchers[name] = RSSFetcher(config, timeout=timeout, etag=saved.get('etag'), modified=saved.get('modified'))
+    if not feeds:
+        return fetchers
+    
+    workers = max(1, min(max_workers, len(feeds)))
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rss-fetch') as executor:
+            futures = {}
+            for name, fetcher in fetchers.items():
+                fetcher.session = session
+                futures[executor.submit(fetcher.fetch)] = name
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"抓取RSS源 {name} 失败: {e}")
+    return fetchers
+
+
 if __name__ == "__main__":
     fetcher = RSSFetcher(RSS_FEEDS['cryptoslate'])
     content = fetcher.fetch()
@@ -8,7 +8,7 @@ import uvicorn
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from utils.fetch_and_save import fetch_and_save, logger
-from utils.ai_processor import process_unprocessed_articles
+from utils.ai_processor import drain_unprocessed_articles
 from config.config import (
     FETCH_INTERVAL_MINUTES,
     PROCESS_INTERVAL_MINUTES,
@@ -22,15 +22,11 @@ def drain_unprocessed():
     if not _lock.acquire(blocking=False):
         return
     try:
-        loops = 0
-        while loops < 10:
-            result = process_unprocessed_articles(
-                batch_size=PROCESS_BATCH_SIZE,
-                delay=PROCESS_DELAY_SEC,
-            )
-            if not result or result.get("processed", 0) == 0:
-                break
-            loops += 1
+        drain_unprocessed_articles(
+            batch_size=PROCESS_BATCH_SIZE,
+            delay=PROCESS_DELAY_SEC,
+            max_batches=10,
+        )
     finally:
         _lock.release()
 
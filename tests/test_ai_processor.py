@@ -0,0 +1,27 @@
+"""
+循环处理的累计结果检查
+"""
+from utils import ai_processor
+
+
+def test_drain_totals_include_cache_counters(monkeypatch):
+    batches = iter([
+        {"processed": 2, "success": 2, "failed": 0, "cache_hits": 1, "cache_misses": 1},
+        {"processed": 2, "success": 1, "failed": 1, "cache_hits": 2, "cache_misses": 0},
+        {"processed": 0, "success": 0, "failed": 0, "cache_hits": 0, "cache_misses": 0},
+    ])
+    monkeypatch.setattr(ai_processor, "process_unprocessed_articles", lambda *args, **kwargs: next(batches))
+
+    totals = ai_processor.drain_unprocessed_articles(2, delay=0)
+
+    assert totals["batches"] == 2
+    assert (totals["processed"], totals["success"], totals["failed"]) == (4, 3, 1)
+    assert (totals["cache_hits"], totals["cache_misses"]) == (3, 1)
+    assert totals["cache_hit_rate"] == 0.75
+
+
+def test_drain_totals_without_lookups(monkeypatch):
+    monkeypatch.setattr(ai_processor, "process_unprocessed_articles", lambda *args, **kwargs: {
+        "processed": 0, "success": 0, "failed": 0, "cache_hits": 0, "cache_misses": 0,
+    })
+    assert ai_processor.drain_unprocessed_articles(2, delay=0)["cache_hit_rate"] == 0.0
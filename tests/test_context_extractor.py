@@ -0,0 +1,44 @@
+"""
+正文批量提取池检查：提取进程池在进程内共享复用，并以spawn方式启动子进程
+"""
+import pytest
+
+from fetchers import context_extractor
+from fetchers.extraction_cache import ExtractionCache
+
+pytest.importorskip("trafilatura")
+
+
+
+def _html(page: int) -> str:
+    # 每页内容不同，避免被trafilatura的去重缓存过滤
+    paragraphs = "".join(
+        f"<p>Bitcoin ETF inflows reached a new record on day {i} of page {page} as institutions kept buying.</p>"
+        for i in range(20)
+    )
+    return f"<html><body><article><h1>Bitcoin {page}</h1>{paragraphs}</article></body></html>"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    yield cache
+    cache.close()
+
+
+def test_process_pool_is_shared_and_spawned(cache):
+    urls = [f"https://example.com/{i}" for i in range(3)]
+    pools = []
+    for run in range(2):
+        for i, url in enumerate(urls):
+            cache.put(url, _html(run * len(urls) + i), None)
+        with context_extractor.ExtractionPool(process_workers=1, cache=cache) as pool:
+            pools.append(pool._extractor)
+            results = dict(pool.extract_many(urls))
+        assert set(results) == set(urls)
+        assert all(text and "Bitcoin ETF inflows" in text for text in results.values())
+
+    assert pools[0] is pools[1]
+    assert pools[0]._mp_context.get_start_method() == "spawn"
+    assert pools[0]._processes
+    assert context_extractor.get_process_pool(1) is pools[0]
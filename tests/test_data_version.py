@@ -0,0 +1,49 @@
+"""
+数据版本触发器检查
+
+版本7的触发器列清单是固定的DDL，模型新增API可见列而没有新的迁移时在此失败
+"""
+import datetime
+
+import pytest
+from sqlalchemy import text
+
+from database.operations import (Article, Database, DATA_VERSION_COLUMNS,
+                                 DATA_VERSION_IGNORED_COLUMNS)
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(f"sqlite:///{tmp_path / 'version.db'}")
+    database.add_articles_bulk([{
+        "id": "a1", "source": "CoinDesk", "title": "bitcoin", "link": "https://example.com/1",
+        "published": datetime.datetime(2024, 1, 1),
+    }])
+    return database
+
+
+def _version(db):
+    with db.engine.connect() as conn:
+        return conn.execute(text("SELECT version FROM data_version WHERE id = 1")).scalar()
+
+
+def _update(db, sql):
+    with db.engine.begin() as conn:
+        conn.execute(text(sql))
+
+
+def test_trigger_columns_cover_visible_columns():
+    visible = {c.name for c in Article.__table__.columns} - set(DATA_VERSION_IGNORED_COLUMNS)
+    assert set(DATA_VERSION_COLUMNS) == visible
+
+
+def test_visible_column_update_bumps_version(db):
+    before = _version(db)
+    _update(db, "UPDATE articles SET title = 'ether' WHERE id = 'a1'")
+    assert _version(db) == before + 1
+
+
+def test_lease_update_keeps_version(db):
+    before = _version(db)
+    _update(db, "UPDATE articles SET lease_owner = 'w1', lease_expires = CURRENT_TIMESTAMP WHERE id = 'a1'")
+    assert _version(db) == before
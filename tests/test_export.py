@@ -0,0 +1,75 @@
+"""
+流式导出检查：Parquet分块写出，以及读线程池中推进导出迭代器时的取消处理
+"""
+import asyncio
+import datetime
+import io
+import threading
+
+import pytest
+
+from database.operations import Database
+from utils.export_articles import _ChunkSink, iter_parquet
+
+FIELDS = ("id", "title", "published", "sentiment_score", "ai_processed")
+ROWS = [
+    (f"a{i}", f"bitcoin {i}", datetime.datetime(2024, 1, 1, i), None if i == 2 else i / 10, i % 2)
+    for i in range(5)
+]
+
+
+def test_chunk_sink_hands_out_written_data_once():
+    sink = _ChunkSink()
+    assert sink.write(b"PAR1") == 4
+    sink.write(memoryview(b"data"))
+    assert sink.tell() == 8
+    assert sink.drain() == b"PAR1data"
+    assert sink.drain() == b""
+    assert sink.tell() == 8
+
+
+def test_iter_parquet_streams_row_groups():
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+
+    chunks = list(iter_parquet(iter(ROWS), FIELDS, chunk_size=2))
+    # 3个行组各产出一块，文件尾单独一块
+    assert len(chunks) == 4
+    table = pyarrow.parquet.read_table(io.BytesIO(b"".join(chunks)))
+    assert table.num_rows == len(ROWS)
+    assert table.schema.field("published").type == pyarrow.timestamp("us")
+    assert table.schema.field("ai_processed").type == pyarrow.bool_()
+    assert table.to_pylist()[2] == {
+        "id": "a2", "title": "bitcoin 2", "published": datetime.datetime(2024, 1, 1, 2),
+        "sentiment_score": None, "ai_processed": False,
+    }
+
+
+def test_iterate_read_waits_for_inflight_next_before_close(tmp_path):
+    db = Database(f"sqlite:///{tmp_path / 'export.db'}")
+    entered = threading.Event()
+    release = threading.Event()
+    state = {"closed": False}
+
+    def _slow_export():
+        try:
+            yield b"first"
+            entered.set()
+            release.wait(5)
+            yield b"second"
+        finally:
+            state["closed"] = True
+
+    async def _consume():
+        stream = db.iterate_read(_slow_export())
+        assert await stream.__anext__() == b"first"
+        task = asyncio.ensure_future(stream.__anext__())
+        await asyncio.get_running_loop().run_in_executor(None, entered.wait, 5)
+        # 客户端断开：next() 仍在读线程中执行时取消
+        task.cancel()
+        threading.Timer(0.1, release.set).start()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(_consume())
+    assert state["closed"]
@@ -0,0 +1,58 @@
+"""
+正文提取缓存检查：累计的总大小与索引一致，淘汰与覆盖后不留下无引用的内容
+"""
+import os
+
+import pytest
+
+from fetchers.extraction_cache import ExtractionCache
+
+
+def _page(i: int) -> str:
+    return os.urandom(2000).hex() + f"<p>page {i}</p>"
+
+
+def _blob_files(cache) -> int:
+    return sum(len(files) for _, _, files in os.walk(cache._objects_dir))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache"), max_bytes=20000)
+    yield cache
+    cache.close()
+
+
+def test_running_total_matches_index(cache):
+    for i in range(5):
+        cache.put(f"https://example.com/{i}", _page(i), f"text {i}")
+    # 相同内容只计一次
+    cache.put("https://example.com/dup", None, "text 0")
+    assert cache._total_bytes == cache._sum_sizes()
+
+
+def test_evict_keeps_total_under_limit_without_orphans(cache):
+    for i in range(40):
+        cache.put(f"https://example.com/{i}", _page(i), f"text {i}")
+    assert cache._total_bytes == cache._sum_sizes() <= cache.max_bytes
+    assert cache.get("https://example.com/0") == (None, None)
+    assert cache.get_text("https://example.com/39") == "text 39"
+    referenced = cache._conn.execute(
+        "SELECT COUNT(*) FROM blobs WHERE hash IN (SELECT html_hash FROM entries UNION SELECT text_hash FROM entries)"
+    ).fetchone()[0]
+    assert referenced == cache._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == _blob_files(cache)
+
+
+def test_replaced_entry_releases_old_content(cache):
+    cache.put("https://example.com/a", _page(1), None)
+    cache.put("https://example.com/a", _page(2), "text")
+    assert cache._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 2
+    assert cache._total_bytes == cache._sum_sizes()
+
+
+def test_orphan_queries_use_hash_indexes(cache):
+    for column in ("html_hash", "text_hash"):
+        plan = [row[-1] for row in cache._conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT 1 FROM entries WHERE {column} = ?", ("x",)
+        )]
+        assert any(f"ix_entries_{column}" in step for step in plan), plan
@@ -0,0 +1,115 @@
+"""
+热点查询的执行计划检查
+
+在临时数据库上执行全部迁移，捕获各数据库方法运行时实际发送给SQLite的语句与绑定参数，
+对其执行 EXPLAIN QUERY PLAN：出现对articles表的全表扫描，或没有使用预期的索引时失败
+"""
+import datetime
+import re
+
+import pytest
+from sqlalchemy import event, text
+
+from database.operations import Article, Database, MIGRATIONS, _is_full_scan
+
+DAY = datetime.datetime(2024, 1, 1)
+WEEK = DAY + datetime.timedelta(days=7)
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(f"sqlite:///{tmp_path / 'plans.db'}")
+    database.add_articles_bulk([
+        {
+            "id": f"a{i}", "source": ("CoinDesk", "Decrypt")[i % 2], "title": f"bitcoin market {i}",
+            "link": f"https://example.com/{i}", "summary": "bitcoin etf", "content": "bitcoin etf inflows",
+            "published": DAY + datetime.timedelta(hours=i), "ai_processed": i % 3 == 0,
+        }
+        for i in range(30)
+    ])
+    return database
+
+
+def _capture(db, fn):
+    """执行fn，返回其间对articles表执行的 SELECT/UPDATE 语句及其参数"""
+    statements = []
+
+    def _listener(conn, cursor, statement, parameters, context, executemany):
+        if re.match(r"\s*(SELECT|UPDATE)\b", statement, re.I) and re.search(r"\barticles\b", statement):
+            statements.append((statement, parameters))
+
+    engines = {db.engine, db.read_engine}
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _listener)
+    try:
+        fn(db)
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", _listener)
+    return statements
+
+
+def _plan(db, statement, parameters):
+    with db.engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def _keyset_page(db):
+    session = db.get_read_session()
+    try:
+        query = db.filter_articles(session.query(Article.id), source="CoinDesk")
+        db.keyset_page(query, 10, after=(DAY + datetime.timedelta(hours=20), "a20"))
+    finally:
+        session.close()
+
+
+def _claim(db):
+    db.claim_unprocessed_articles("worker-1", limit=5, fields=("id",))
+
+
+# (测试ID, 以运行时方式调用的查询, 计划中必须出现的索引)
+HOT_QUERIES = [
+    ("list", lambda db: list(db.stream_articles(("id", "title"))), "ix_articles_published_id"),
+    ("source", lambda db: list(db.stream_articles(source="CoinDesk")), "ix_articles_source_published"),
+    ("sentiment", lambda db: list(db.iter_sentiment_articles("positive")), "ix_articles_sentiment_published"),
+    ("ai_processed", lambda db: list(db.stream_articles(ai_processed=True)), "ix_articles_ai_processed_published"),
+    ("date_range", lambda db: list(db.iter_articles_by_date_range(DAY, WEEK)), "ix_articles_published_id"),
+    ("source_date_range", lambda db: list(db.stream_articles(source="CoinDesk", start_date=DAY, end_date=WEEK)),
+     "ix_articles_source_published"),
+    ("source_keyset", _keyset_page, "ix_articles_source_published"),
+    ("unprocessed", lambda db: list(db.iter_unprocessed_articles(limit=5)), "ix_articles_ai_processed_published"),
+    ("claim", _claim, "ix_articles_ai_processed_published"),
+    ("claim_fetch", _claim, "ix_articles_lease_owner"),
+    ("existing_ids", lambda db: db.get_existing_ids(["a1", "a2", "missing"]), "sqlite_autoindex_articles_1"),
+]
+
+
+@pytest.mark.parametrize("name, run, index", HOT_QUERIES, ids=[name for name, _, _ in HOT_QUERIES])
+def test_hot_query_uses_index(db, name, run, index):
+    statements = _capture(db, run)
+    assert statements, "没有捕获到查询语句"
+    plans = [_plan(db, statement, parameters) for statement, parameters in statements]
+    for plan in plans:
+        assert not any(_is_full_scan(step) for step in plan), plan
+    assert any(index in step for plan in plans for step in plan), plans
+
+
+def test_search_uses_fulltext_index(db):
+    statements = _capture(db, lambda db: db.search_articles("bitcoin"))
+    for statement, parameters in statements:
+        assert not any(_is_full_scan(step) for step in _plan(db, statement, parameters))
+
+
+def test_check_query_plans_reports_no_full_scans(db):
+    assert db.check_query_plans() == {}
+
+
+def test_migrations_reach_latest_version(db):
+    with db.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA user_version")).scalar() == MIGRATIONS[-1][0]
+
+
+def test_unused_partial_index_is_dropped(db):
+    with db.engine.connect() as conn:
+        names = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+    assert "ix_articles_unprocessed" not in names
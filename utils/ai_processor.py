@@ -6,18 +6,27 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
 import logging
-from typing import List, Dict, Any
-from database.operations import Database
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from database.operations import Database, get_database
 from ai.SentimentAnalyzer import SentimentAnalyzer
+from ai.rate_limiter import get_rate_limiter
 try:
     # 优先使用抓取器抽取正文
-    from fetchers.context_extractor import extract_with_trafilatura
+    from fetchers.context_extractor import extract_with_trafilatura, extract_many
 except Exception:
     # 当依赖未安装或导入失败时，提供降级函数，返回None
     def extract_with_trafilatura(url: str):
         return None
-from config.config import DB_URL
+
+    def extract_many(urls, **kwargs):
+        for url in urls:
+            yield url, None
+from config.config import DB_URL, LLM_MAX_CONCURRENCY, LLM_BATCH_SIZE
+from utils.event_bus import publish, ARTICLE_ANALYZED
 import time
+import socket
+import uuid
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -29,58 +38,42 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def process_unprocessed_articles(batch_size, delay: float = 1.0) -> Dict[str, Any]:
+# 分析与写回需要的文章列，认领时只取回这些列
+CLAIM_FIELDS = ("id", "title", "link", "content", "keywords")
+
+def _analyze_and_update(db: Database, analyzer: SentimentAnalyzer, worker_id: str,
+                        items: List[Tuple[Any, Optional[str]]]) -> List[Any]:
     """
-    处理数据库中未经过AI处理的新闻文章
+    分析一组已认领的文章并逐篇写回数据库，多篇时打包为一次LLM请求
     
     Args:
-        batch_size: 每批处理的文章数量
-        delay: 每篇文章处理之间的延迟（秒），避免API调用过于频繁
-        
+        worker_id: 认领文章时使用的工作进程ID
+        items: (文章, 正文) 列表
+    
     Returns:
-        包含处理结果的字典
+        与items一一对应的结果：成功时为文章结果摘要，数据库更新失败时为None，出错时为异常对象
     """
-    logger.info("开始处理未处理的新闻文章...")
-    
-    # 初始化数据库和AI分析器
-    db = Database(DB_URL)
-    analyzer = SentimentAnalyzer()
-    
-    # 获取未处理的文章
-    unprocessed_articles = db.get_unprocessed_articles(limit=batch_size)
-    
-    if not unprocessed_articles:
-        logger.info("没有需要处理的文章")
-        return {"processed": 0, "success": 0, "failed": 0, "articles": []}
+    batch = []
+    for article, content in items:
+        title = article.title or ''
+        # 检查标题和内容是否为空
+        if not title or not content:
+            logger.warning(f"文章 ID {article.id} 缺少标题或内容")
+        logger.info(f"正在处理文章 ID {article.id}: {title[:50]}...")
+        batch.append({'id': article.id, 'title': title, 'content': content})
     
-    logger.info(f"找到 {len(unprocessed_articles)} 篇未处理的文章")
+    # 进行AI分析
+    analyses = analyzer.analyze_batch(batch)
     
-    processed_count = 0
-    success_count = 0
-    failed_count = 0
-    processed_articles = []
-    
-    for article in unprocessed_articles:
+    outcomes = []
+    for article, content in items:
         try:
             article_id = article.id
             title = article.title or ''
-            content = extract_with_trafilatura(article.link)
             keywords = article.keywords
-            if content == None:
-                content = article.content
             if keywords == None:
                 keywords = extract_keywords(title, content)
-            # 检查标题和内容是否为空
-            if not title or not content:
-                logger.warning(f"文章 ID {article_id} 缺少标题或内容")
-                #continue
-            
-            logger.info(f"正在处理文章 ID {article_id}: {title[:50]}...")
-            
-            # 进行AI分析
-            sentiment, sentiment_score, chinese_summary = analyzer.analyze(title, content)
-
-
+            sentiment, sentiment_score, chinese_summary = analyses[article_id]
             
             # 更新数据库中的文章
             update_data = {
@@ -90,40 +83,228 @@ def process_unprocessed_articles(batch_size, delay: float = 1.0) -> Dict[str, An
                 'keywords': keywords,
                 'ai_processed': True
             }
+            # 新提取到的正文一并保存，后续无需再次抓取
+            if content and content != article.content:
+                update_data['content'] = content
             
-            if db.update_article(article_id, update_data):
-                logger.info(f"文章 ID {article_id} 处理成功")
-                success_count += 1
-                processed_articles.append({
-                    'id': article_id,
-                    'title': title,
-                    'sentiment': sentiment,
-                    'sentiment_score': sentiment_score
-                })
-            else:
+            if not db.complete_article(article_id, worker_id, update_data):
                 logger.error(f"文章 ID {article_id} 更新失败")
-                failed_count += 1
-            
-            processed_count += 1
-            
-            # 添加延迟，避免API调用过于频繁
-            if delay > 0:
-                time.sleep(delay)
-                
+                outcomes.append(None)
+                continue
+            logger.info(f"文章 ID {article_id} 处理成功")
+            outcomes.append({
+                'id': article_id,
+                'title': title,
+                'sentiment': sentiment,
+                'sentiment_score': sentiment_score
+            })
         except Exception as e:
-            logger.error(f"处理文章 ID {article.id if hasattr(article, 'id') else 'unknown'} 时出错: {e}")
+            outcomes.append(e)
+    return outcomes
+
+def process_unprocessed_articles(batch_size, delay: float = 1.0, refresh: bool = False,
+                                 concurrency: int = LLM_MAX_CONCURRENCY,
+                                 articles_per_request: int = LLM_BATCH_SIZE,
+                                 job=None) -> Dict[str, Any]:
+    """
+    处理数据库中未经过AI处理的新闻文章
+    
+    每篇文章的分析结果会发布到进程内事件总线，供API的实时事件流推送
+    
+    Args:
+        batch_size: 每批处理的文章数量
+        delay: 串行模式下每次LLM请求之间的延迟（秒）；并发模式由限流器控制调用频率，忽略该参数
+        refresh: 为True时忽略已保存的正文和提取缓存，重新抓取原文
+        concurrency: 同时进行的LLM请求数，1为串行
+        articles_per_request: 每次LLM请求打包分析的文章数，1为逐篇分析
+        job: 作为后台任务运行时的任务对象（utils.job_manager.Job），用于报告进度；
+             任务被取消后不再开始新的分组，未处理的文章释放租约
+        
+    Returns:
+        包含处理结果的字典
+    """
+    logger.info("开始处理未处理的新闻文章...")
+    
+    # 初始化数据库和AI分析器，分析器的每次请求都经过进程内共享的限流器
+    db = get_database(DB_URL)
+    analyzer = SentimentAnalyzer(limiter=get_rate_limiter())
+    
+    # 认领未处理的文章，租约期间其他处理进程不会重复处理
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    unprocessed_articles = db.claim_unprocessed_articles(worker_id, limit=batch_size, fields=CLAIM_FIELDS)
+    
+    if not unprocessed_articles:
+        logger.info("没有需要处理的文章")
+        return {"processed": 0, "success": 0, "failed": 0, "articles": [],
+                "cache_hits": 0, "cache_misses": 0, "cache_hit_rate": 0.0}
+    
+    logger.info(f"找到 {len(unprocessed_articles)} 篇未处理的文章")
+    total = len(unprocessed_articles)
+    if job is not None:
+        job.update(done=0, total=total, success=0, failed=0)
+    
+    processed_count = 0
+    success_count = 0
+    failed_count = 0
+    processed_articles = []
+    
+    # 优先使用入库时已保存的正文，只有缺失（或要求刷新）时才提取，提取结果走本地缓存
+    to_extract = [a.link for a in unprocessed_articles if refresh or not a.content]
+    extracted = dict(extract_many(to_extract, refresh=refresh)) if to_extract else {}
+    
+    def _content_of(article) -> Optional[str]:
+        content = article.content if not refresh else None
+        if not content:
+            content = extracted.get(article.link) or article.content
+        return content
+    
+    completed_ids = set()
+    
+    def _collect(article, outcome):
+        nonlocal processed_count, success_count, failed_count
+        if isinstance(outcome, Exception):
+            logger.error(f"处理文章 ID {article.id if hasattr(article, 'id') else 'unknown'} 时出错: {outcome}")
+            failed_count += 1
+            return
+        if outcome:
+            success_count += 1
+            processed_articles.append(outcome)
+            completed_ids.add(article.id)
+        else:
             failed_count += 1
+        processed_count += 1
+    
+    # 按每次请求的文章数分组
+    per_request = max(1, articles_per_request)
+    items = [(article, _content_of(article)) for article in unprocessed_articles]
+    groups = [items[i:i + per_request] for i in range(0, len(items), per_request)]
+    
+    def _run_group(group):
+        if job is not None and job.cancelled:
+            return None
+        try:
+            return _analyze_and_update(db, analyzer, worker_id, group)
+        except Exception as e:
+            return [e] * len(group)
+    
+    def _collect_group(group, outcomes):
+        if outcomes is None:
+            return  # 任务已取消，该分组未处理
+        for (article, _), outcome in zip(group, outcomes):
+            _collect(article, outcome)
+            if outcome and not isinstance(outcome, Exception):
+                publish(ARTICLE_ANALYZED, outcome)
+        if job is not None:
+            job.update(done=success_count + failed_count, success=success_count, failed=failed_count)
+    
+    try:
+        if concurrency <= 1:
+            for group in groups:
+                if job is not None and job.cancelled:
+                    break
+                _collect_group(group, _run_group(group))
+                
+                # 添加延迟，避免API调用过于频繁
+                if delay > 0:
+                    time.sleep(delay)
+        else:
+            logger.info(f"并发分析模式，最大并发 {concurrency}，每次请求 {per_request} 篇")
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ai-analyze') as executor:
+                futures = {executor.submit(_run_group, group): group for group in groups}
+                for future in as_completed(futures):
+                    _collect_group(futures[future], future.result())
+    finally:
+        # 未成功写回的文章立即释放租约，便于下次重试
+        db.release_articles((a.id for a in unprocessed_articles if a.id not in completed_ids), worker_id)
     
     result = {
         "processed": processed_count,
         "success": success_count,
         "failed": failed_count,
-        "articles": processed_articles
+        "articles": processed_articles,
+        "cache_hits": analyzer.cache_hits,
+        "cache_misses": analyzer.cache_misses,
+        "cache_hit_rate": round(analyzer.cache_hit_rate, 4)
     }
     
-    logger.info(f"处理完成: 总计 {processed_count} 篇，成功 {success_count} 篇，失败 {failed_count} 篇")
+    logger.info(f"处理完成: 总计 {processed_count} 篇，成功 {success_count} 篇，失败 {failed_count} 篇，"
+                f"LLM缓存命中率 {analyzer.cache_hit_rate:.1%}")
     return result
 
+class _BatchProgress:
+    """
+    将单批处理的进度换算为整个循环的累计进度后转交给任务对象
+
+    process_unprocessed_articles 每批从0开始报告进度，这里加上之前各批的计数
+    """
+
+    def __init__(self, job, total: int):
+        self.job = job
+        self.total = total
+        self.done = self.success = self.failed = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.job.cancelled
+
+    def check_cancelled(self):
+        self.job.check_cancelled()
+
+    def update(self, done: int = 0, success: int = 0, failed: int = 0, total: int = 0):
+        # 处理期间可能有新文章入库，总数至少为已完成数加上本批数量
+        self.total = max(self.total, self.done + total)
+        self.job.update(done=self.done + done, total=self.total,
+                        success=self.success + success, failed=self.failed + failed)
+
+    def finish_batch(self, result: Dict[str, Any]):
+        self.done += result["success"] + result["failed"]
+        self.success += result["success"]
+        self.failed += result["failed"]
+
+
+def drain_unprocessed_articles(batch_size, delay: float = 1.0, max_batches: Optional[int] = None,
+                               job=None, **kwargs) -> Dict[str, Any]:
+    """
+    分批循环处理未处理文章，直到积压清空
+
+    每批单独认领、处理并写回，租约只需覆盖一批的处理时间；
+    某批没有任何文章处理成功时停止，避免对持续失败的文章反复认领
+
+    Args:
+        batch_size: 每批认领的文章数量
+        delay: 同 process_unprocessed_articles
+        max_batches: 最多处理的批数，None表示不限制
+        job: 作为后台任务运行时的任务对象，进度按所有批次累计，取消后不再认领新批次
+        **kwargs: 传给 process_unprocessed_articles 的其他参数
+
+    Returns:
+        各批累计的处理结果（processed/success/failed/batches/cache_hits/cache_misses/cache_hit_rate），
+        不含逐篇结果
+    """
+    progress = None
+    if job is not None:
+        progress = _BatchProgress(job, get_database(DB_URL).get_stats()["unprocessed_articles"])
+    totals = {"processed": 0, "success": 0, "failed": 0, "batches": 0, "cache_hits": 0, "cache_misses": 0}
+    while max_batches is None or totals["batches"] < max_batches:
+        if job is not None and job.cancelled:
+            break
+        result = process_unprocessed_articles(batch_size, delay=delay, job=progress, **kwargs)
+        for key in ("processed", "success", "failed", "cache_hits", "cache_misses"):
+            totals[key] += result[key]
+        if result["processed"] == 0 and result["failed"] == 0:
+            break
+        totals["batches"] += 1
+        if progress is not None:
+            progress.finish_batch(result)
+        if result["success"] == 0:
+            logger.warning("本批没有文章处理成功，停止循环处理")
+            break
+    lookups = totals["cache_hits"] + totals["cache_misses"]
+    totals["cache_hit_rate"] = round(totals["cache_hits"] / lookups, 4) if lookups else 0.0
+    logger.info(f"循环处理完成: 共 {totals['batches']} 批，成功 {totals['success']} 篇，失败 {totals['failed']} 篇，"
+                f"LLM缓存命中率 {totals['cache_hit_rate']:.1%}")
+    return totals
+
 def extract_keywords(title: str, content: str, max_keywords: int = 5) -> str:
     """
     从标题和内容中提取关键词
@@ -0,0 +1,136 @@
+# 添加项目根目录到Python路径，使模块可以正确导入
+import sys
+import os
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import argparse
+import datetime
+import gzip
+import json
+import random
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+from pydantic import TypeAdapter
+from web.schemas import ArticleListResponse, LIST_FIELDS, article_to_response, article_to_dict
+from web import responses
+from web.responses import dumps
+
+
+WORDS = ("bitcoin", "ether", "ETF", "inflows", "market", "price", "rally", "traders", "regulators", "SEC",
+         "stablecoin", "exchange", "liquidity", "volatility", "on-chain", "whales", "miners", "halving")
+CHINESE_WORDS = ("比特币", "以太坊", "现货", "资金流入", "市场情绪", "监管", "交易所", "波动", "分析师", "上涨", "回调", "链上")
+
+
+def _sentence(rng: random.Random, words, count: int, sep: str) -> str:
+    return sep.join(rng.choice(words) for _ in range(count))
+
+
+def make_rows(count: int) -> List[SimpleNamespace]:
+    """构造与列表页字段、长度相近的文章行（文本随机组合，使压缩率接近真实数据）"""
+    start = datetime.datetime(2025, 1, 1, 8, 30)
+    rng = random.Random(42)
+    return [
+        SimpleNamespace(
+            id=f"https://example.com/news/{i}",
+            source=("CoinDesk", "Cointelegraph", "Decrypt")[i % 3],
+            title=_sentence(rng, WORDS, 10, " ").capitalize(),
+            link=f"https://example.com/news/{i}",
+            summary=_sentence(rng, WORDS, 45, " ") + ".",
+            published=start + datetime.timedelta(minutes=7 * i),
+            author="Staff Reporter",
+            sentiment=("positive", "negative", "neutral")[i % 3],
+            sentiment_score=round((i % 21) / 10 - 1, 2),
+            chinese_summary=_sentence(rng, CHINESE_WORDS, 30, "") + "。",
+            keywords="比特币, ETF, 价格",
+            ai_processed=True,
+        )
+        for i in range(count)
+    ]
+
+
+def serialize_with_models(rows, adapter: TypeAdapter) -> bytes:
+    """
+    原路径：逐行构造ArticleResponse，再按FastAPI处理response_model的方式
+    转为字典、重新校验、按json模式导出并用标准库json编码
+    """
+    content = ArticleListResponse(
+        articles=[article_to_response(row, LIST_FIELDS) for row in rows],
+        total=len(rows), page=1, page_size=len(rows),
+    )
+    prepared = content.model_dump(by_alias=True, exclude_unset=True)
+    value = adapter.validate_python(prepared)
+    data = adapter.dump_python(value, mode="json", exclude_unset=True)
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def serialize_fast(rows) -> bytes:
+    """快速路径：行直接转为字典，一次序列化为JSON字节串"""
+    return dumps({
+        "articles": [article_to_dict(row, LIST_FIELDS) for row in rows],
+        "total": len(rows), "page": 1, "page_size": len(rows),
+    })
+
+
+def _time_per_call(fn: Callable[[], bytes], iterations: int) -> float:
+    fn()  # 预热
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def run_benchmark(rows: int = 100, iterations: int = 500) -> Dict:
+    """
+    对比一页文章列表在原路径与快速路径下的序列化耗时，以及压缩后的大小与耗时
+
+    Args:
+        rows: 每页行数
+        iterations: 每种方式的重复次数
+
+    Returns:
+        各项耗时（毫秒/页）与大小（字节）
+    """
+    data = make_rows(rows)
+    adapter = TypeAdapter(ArticleListResponse)
+    before = serialize_with_models(data, adapter)
+    after = serialize_fast(data)
+    if json.loads(before) != json.loads(after):
+        raise AssertionError("快速路径的输出与原路径不一致")
+    result = {
+        "rows": rows,
+        "orjson": responses._ORJSON_AVAILABLE,
+        "models_ms": _time_per_call(lambda: serialize_with_models(data, adapter), iterations),
+        "fast_ms": _time_per_call(lambda: serialize_fast(data), iterations),
+        "raw_bytes": len(after),
+        "gzip_bytes": len(gzip.compress(after, responses.COMPRESS_GZIP_LEVEL)),
+        "gzip_ms": _time_per_call(lambda: gzip.compress(after, responses.COMPRESS_GZIP_LEVEL), iterations),
+    }
+    if responses._BROTLI_AVAILABLE:
+        quality = responses.COMPRESS_BROTLI_QUALITY
+        result["br_bytes"] = len(responses.brotli.compress(after, quality=quality))
+        result["br_ms"] = _time_per_call(lambda: responses.brotli.compress(after, quality=quality), iterations)
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="文章列表序列化与压缩微基准")
+    parser.add_argument("--rows", type=int, default=100, help="每页行数")
+    parser.add_argument("--iterations", type=int, default=500, help="重复次数")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.rows, args.iterations)
+    print(f"每页 {result['rows']} 行，orjson: {'是' if result['orjson'] else '否（使用标准库json）'}")
+    print(f"  原路径（响应模型+response_model校验）: {result['models_ms']:.3f} ms/页")
+    print(f"  快速路径（字典直接序列化）:           {result['fast_ms']:.3f} ms/页 "
+          f"（{result['models_ms'] / result['fast_ms']:.1f}x）")
+    print(f"  响应体 {result['raw_bytes']} 字节，gzip后 {result['gzip_bytes']} 字节（{result['gzip_ms']:.3f} ms）")
+    if "br_bytes" in result:
+        print(f"  br后 {result['br_bytes']} 字节（{result['br_ms']:.3f} ms）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+# 添加项目根目录到Python路径，使模块可以正确导入
+import sys
+import os
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import argparse
+import logging
+from sqlalchemy import text
+from database.operations import Database, MIGRATIONS, get_database
+from config.config import DB_URL
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def migrate(db: Database) -> int:
+    """执行待执行的迁移（Database初始化时已自动完成）并输出当前版本"""
+    with db.engine.connect() as conn:
+        version = conn.execute(text("PRAGMA user_version")).scalar()
+    latest = MIGRATIONS[-1][0]
+    print(f"数据库版本: {version}（最新 {latest}）")
+    return 0 if version == latest else 1
+
+
+def check_plans(db: Database) -> int:
+    """检查热点查询的执行计划，存在全表扫描时返回非零退出码"""
+    full_scans = db.check_query_plans()
+    if not full_scans:
+        print("所有热点查询均使用索引")
+        return 0
+    for name, plan in full_scans.items():
+        print(f"[全表扫描] {name}:")
+        for step in plan:
+            print(f"    {step}")
+    return 1
+
+
+def rebuild_search(db: Database) -> int:
+    """重建全文索引，执行VACUUM或索引损坏后使用"""
+    return 0 if db.rebuild_search_index() else 1
+
+
+def rebuild_stats(db: Database) -> int:
+    """重新计算统计计数表"""
+    return 0 if db.rebuild_stats() else 1
+
+
+def rebuild_rollups(db: Database) -> int:
+    """重新计算情感时间序列汇总表"""
+    return 0 if db.rebuild_rollups() else 1
+
+
+COMMANDS = {
+    'migrate': migrate,
+    'check-plans': check_plans,
+    'rebuild-search': rebuild_search,
+    'rebuild-stats': rebuild_stats,
+    'rebuild-rollups': rebuild_rollups,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="数据库维护工具")
+    parser.add_argument('command', choices=sorted(COMMANDS), help="要执行的维护命令")
+    parser.add_argument('--db-url', default=DB_URL, help="数据库URL，默认使用配置中的DB_URL")
+    args = parser.parse_args(argv)
+    return COMMANDS[args.command](get_database(args.db_url))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
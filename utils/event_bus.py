@@ -0,0 +1,144 @@
+import asyncio
+import itertools
+import threading
+import time
+import logging
+from collections import deque
+from typing import Any, Dict, List, Optional
+from config.config import EVENT_BUFFER_SIZE
+logger = logging.getLogger(__name__)
+
+# 事件类型
+ARTICLE_INGESTED = "article.ingested"  # 新文章入库
+ARTICLE_ANALYZED = "article.analyzed"  # 文章完成AI分析
+JOB_STARTED = "job.started"  # 后台任务开始
+JOB_PROGRESS = "job.progress"  # 后台任务进度
+JOB_FINISHED = "job.finished"  # 后台任务结束（完成、失败或取消）
+DATA_CHANGED = "data.changed"  # 数据版本号变化（包括其他进程的写入）
+
+
+class Subscription:
+    """
+    一个订阅者（一个SSE/WebSocket连接）的事件队列
+
+    队列有界：订阅者消费过慢时丢弃最旧的事件并计数，不会阻塞发布者，也不会无限占用内存
+    """
+
+    def __init__(self, bus: 'EventBus', loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.bus = bus
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def _put(self, event: Dict[str, Any]):
+        """在订阅者的事件循环中执行，队列满时丢弃最旧的事件"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """等待下一个事件，超时返回None"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    进程内发布/订阅总线
+
+    发布可以在任意线程中进行（抓取、AI处理在工作线程中运行），事件通过
+    call_soon_threadsafe 投递到各订阅者所在的事件循环。最近的事件保存在环形缓冲区中，
+    断线重连的客户端可以按事件ID补发
+    """
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE):
+        self.buffer_size = max(1, buffer_size)
+        self._ids = itertools.count(1)
+        self._history: deque = deque(maxlen=self.buffer_size)
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        发布事件，立即返回
+
+        参数:
+            event_type: 事件类型
+            data: 事件数据，需可JSON序列化
+
+        返回:
+            Dict[str, Any]: 发布的事件（含自增ID与时间戳）
+        """
+        with self._lock:
+            event = {"id": next(self._ids), "type": event_type, "time": time.time(), "data": data or {}}
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+            except RuntimeError:
+                # 事件循环已关闭，订阅者随连接一起失效
+                self.unsubscribe(subscription)
+        return event
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        在当前事件循环中订阅事件
+
+        参数:
+            last_event_id: 客户端最后收到的事件ID，提供时先补发缓冲区中之后的事件
+
+        返回:
+            Subscription: 订阅对象，连接结束时需调用close()
+        """
+        subscription = Subscription(self, asyncio.get_running_loop(), self.buffer_size)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._history:
+                    if event["id"] > last_event_id:
+                        subscription._put(event)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+                if subscription.dropped:
+                    logger.warning(f"事件订阅者消费过慢，共丢弃 {subscription.dropped} 个事件")
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+_shared_bus = None
+_shared_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    """获取进程内共享的事件总线"""
+    global _shared_bus
+    with _shared_lock:
+        if _shared_bus is None:
+            _shared_bus = EventBus()
+        return _shared_bus
+
+
+def publish(event_type: str, data: Optional[Dict[str, Any]] = None):
+    """
+    向进程内共享的事件总线发布事件
+
+    发布失败只记录日志，不影响抓取、处理等业务流程
+    """
+    try:
+        get_event_bus().publish(event_type, data)
+    except Exception as e:
+        logger.error(f"发布事件 {event_type} 失败: {e}")
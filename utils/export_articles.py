@@ -0,0 +1,240 @@
+# 添加项目根目录到Python路径，使模块可以正确导入
+import sys
+import os
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import argparse
+import csv
+import datetime
+import io
+import logging
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+try:
+    import pyarrow
+    import pyarrow.parquet
+    _PYARROW_AVAILABLE = True
+except Exception:
+    _PYARROW_AVAILABLE = False
+
+from config.config import DB_URL, EXPORT_CHUNK_SIZE
+from database.operations import ARTICLE_FIELDS, get_database
+from web.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+# 可导出的字段及默认顺序（不含AI处理租约等内部列）
+EXPORT_FIELDS = ARTICLE_FIELDS
+DATETIME_FIELDS = ("published", "created_at", "updated_at")
+
+
+def parquet_available() -> bool:
+    """是否可以导出Parquet（需要安装pyarrow）"""
+    return _PYARROW_AVAILABLE
+
+
+def _row_values(row: Sequence, fields: Sequence[str]) -> list:
+    values = list(row)
+    if "ai_processed" in fields:
+        index = fields.index("ai_processed")
+        values[index] = bool(values[index])
+    return values
+
+
+def _chunks(rows: Iterable[Sequence], size: int) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_ndjson(rows: Iterable[Sequence], fields: Sequence[str], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """每行一个JSON对象，每chunk_size行产出一块字节串"""
+    for chunk in _chunks(rows, chunk_size):
+        yield b"".join(dumps(dict(zip(fields, _row_values(row, fields)))) + b"\n" for row in chunk)
+
+
+def iter_csv(rows: Iterable[Sequence], fields: Sequence[str], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """带表头的UTF-8 CSV，日期时间为ISO格式，空值为空字符串"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for chunk in _chunks(rows, chunk_size):
+        for row in chunk:
+            writer.writerow([
+                value.isoformat() if isinstance(value, datetime.datetime) else value
+                for value in _row_values(row, fields)
+            ])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink:
+    """供ParquetWriter写入的类文件对象，写入的数据在每个行组之后被取走，不累积整个文件"""
+
+    def __init__(self):
+        self.closed = False
+        self._parts = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _parquet_schema(fields: Sequence[str]):
+    types = {name: pyarrow.string() for name in fields}
+    for name in DATETIME_FIELDS:
+        types[name] = pyarrow.timestamp("us")
+    types["sentiment_score"] = pyarrow.float64()
+    types["ai_processed"] = pyarrow.bool_()
+    return pyarrow.schema([(name, types[name]) for name in fields])
+
+
+def iter_parquet(rows: Iterable[Sequence], fields: Sequence[str], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    列式Parquet文件，每chunk_size行写一个行组并立即产出，文件尾（元数据）在最后产出
+
+    需要安装pyarrow
+    """
+    if not _PYARROW_AVAILABLE:
+        raise RuntimeError("导出Parquet需要安装pyarrow")
+    schema = _parquet_schema(fields)
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            columns = list(zip(*(_row_values(row, fields) for row in chunk)))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(column, type=schema.field(i).type) for i, column in enumerate(columns)],
+                schema=schema
+            ))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+# 导出格式：(写出函数, 响应类型, 文件扩展名)
+EXPORT_FORMATS: Dict[str, Tuple[Callable[..., Iterator[bytes]], str, str]] = {
+    "ndjson": (iter_ndjson, "application/x-ndjson", "ndjson"),
+    "csv": (iter_csv, "text/csv; charset=utf-8", "csv"),
+    "parquet": (iter_parquet, "application/vnd.apache.parquet", "parquet"),
+}
+
+
+def parse_export_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    解析逗号分隔的导出字段，未提供时导出全部字段
+
+    Raises:
+        ValueError: 包含未知字段
+    """
+    if not fields:
+        return EXPORT_FIELDS
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in EXPORT_FIELDS]
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(unknown)}")
+    return names
+
+
+def export_articles(db, fmt: str, output, fields: Sequence[str] = EXPORT_FIELDS,
+                    chunk_size: int = EXPORT_CHUNK_SIZE, **filters) -> int:
+    """
+    将符合筛选条件的文章流式写入二进制文件对象
+
+    Args:
+        db: Database实例
+        fmt: 导出格式 ndjson/csv/parquet
+        output: 以二进制模式打开的文件对象
+        fields: 导出的字段
+        chunk_size: 每次从数据库读取与写出的行数
+        **filters: source/sentiment/ai_processed/start_date/end_date，同 Database.stream_articles
+
+    Returns:
+        导出的文章数
+    """
+    writer = EXPORT_FORMATS[fmt][0]
+    count = 0
+
+    def _counted(rows):
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    rows = db.stream_articles(fields, chunk_size=chunk_size, **filters)
+    for data in writer(_counted(rows), fields, chunk_size):
+        output.write(data)
+    return count
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="流式导出文章（NDJSON/CSV/Parquet），内存占用与导出行数无关")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson", help="导出格式")
+    parser.add_argument("--output", "-o", default="-", help="输出文件路径，- 表示标准输出")
+    parser.add_argument("--fields", help="逗号分隔的导出字段，默认全部字段")
+    parser.add_argument("--source", help="新闻来源筛选")
+    parser.add_argument("--sentiment", help="情感筛选 (positive/negative/neutral)")
+    parser.add_argument("--ai-processed", choices=("true", "false"), help="是否已AI处理")
+    parser.add_argument("--start-date", help="开始日期 (YYYY-MM-DD)，需与--end-date同时提供")
+    parser.add_argument("--end-date", help="结束日期 (YYYY-MM-DD)")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="每次读取与写出的行数")
+    parser.add_argument("--db-url", default=DB_URL, help="数据库URL")
+    args = parser.parse_args(argv)
+
+    try:
+        fields = parse_export_fields(args.fields)
+        start_date = datetime.datetime.strptime(args.start_date, "%Y-%m-%d") if args.start_date else None
+        end_date = datetime.datetime.strptime(args.end_date, "%Y-%m-%d") if args.end_date else None
+    except ValueError as e:
+        parser.error(str(e))
+    if args.format == "parquet" and not parquet_available():
+        parser.error("导出Parquet需要安装pyarrow")
+
+    db = get_database(args.db_url)
+    filters = {
+        "source": args.source,
+        "sentiment": args.sentiment,
+        "ai_processed": None if args.ai_processed is None else args.ai_processed == "true",
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    if args.output == "-":
+        count = export_articles(db, args.format, sys.stdout.buffer, fields, args.chunk_size, **filters)
+    else:
+        with open(args.output, "wb") as output:
+            count = export_articles(db, args.format, output, fields, args.chunk_size, **filters)
+    print(f"导出 {count} 篇文章", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
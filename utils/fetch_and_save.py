@@ -8,10 +8,11 @@ project_root = os.path.dirname(current_dir)
 sys.path.insert(0, project_root)
 
 import logging
-from database.operations import Database
-from fetchers.rss_fetcher import RSSFetcher
-from fetchers.context_extractor import extract_with_trafilatura
+from database.operations import get_database
+from fetchers.rss_fetcher import fetch_all_feeds
+from fetchers.context_extractor import extract_many
 from config.config import RSS_FEEDS, DB_URL
+from utils.event_bus import publish, ARTICLE_INGESTED
 import schedule
 import time
 from datetime import datetime
@@ -28,15 +29,24 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def fetch_and_save():
+def fetch_and_save(job=None):
     """
     从所有RSS源抓取新闻并保存到数据库
+    
+    新入库的文章会发布到进程内事件总线，供API的实时事件流推送
+    
+    Args:
+        job: 作为后台任务运行时的任务对象（utils.job_manager.Job），用于报告各阶段进度；
+             在提取正文与写入数据库之前检查是否已被取消
+    
+    Returns:
+        抓取与保存的文章数，数据库初始化失败时返回None
     """
     logger.info("开始执行新闻抓取与保存任务...")
     
     try:
         # 初始化数据库连接
-        db = Database(DB_URL)
+        db = get_database(DB_URL)
         logger.info("数据库连接成功")
     except Exception as e:
         logger.error(f"数据库初始化失败: {e}")
@@ -45,58 +55,116 @@ def fetch_and_save():
     total_fetched = 0
     total_saved = 0
     
-    for source_name, feed_config in RSS_FEEDS.items():
+    # 读取上次保存的ETag/Last-Modified，用于条件请求
+    validators = {
+        source_name: db.get_feed_validators(feed_config['url'])
+        for source_name, feed_config in RSS_FEEDS.items()
+    }
+    
+    # 并发抓取所有RSS源
+    fetchers = fetch_all_feeds(RSS_FEEDS, validators=validators)
+    
+    # 第一步：按源过滤出新文章
+    new_by_source = {}
+    failed_sources = set()
+    for source_name, fetcher in fetchers.items():
         logger.info(f"开始处理源: {source_name}")
         
         try:
-            # 初始化RSS抓取器
-            fetcher = RSSFetcher(feed_config)
+            if fetcher.not_modified:
+                logger.info(f"源 {source_name} 未更新，跳过")
+                continue
             
-            # 抓取文章
-            articles = fetcher.fetch()
+            articles = fetcher.articles
             fetched_count = len(articles)
             total_fetched += fetched_count
             logger.info(f"从 {source_name} 抓取到 {fetched_count} 篇文章")
             
             if not articles:
+                # 200响应解析失败或没有条目时不保存新的校验值，否则下次收到304会永久漏掉这次的文章
+                failed_sources.add(source_name)
                 continue
             
-            # 保存文章到数据库
-            saved_count = 0
-            for article in articles:
-                try:
-                    # 准备文章数据，映射到数据库字段
-                    
-                    db_article = {
-                        'id': article['original_id'],  # 使用RSS源的唯一ID作为数据库主键
-                        'source': article['source'],
-                        'title': article['title'],
-                        'link': article['link'],
-                        'summary': article.get('description', ''),
-                        'published': datetime.fromisoformat(article['published_at']),
-                        'content': extract_with_trafilatura(article.get('link', '')),
-                        'author': article.get('author', ''),
-                        'keywords': ','.join(article.get('categories', [])),
-                        'ai_processed': False  # 初始化为未处理状态
-                    }
-                    
-                    if db.add_article(db_article):
-                        saved_count += 1
-                        total_saved += 1
-                    else:
-                        logger.debug(f"文章已存在: {article['title']}")
-                        
-                except Exception as e:
-                    logger.error(f"保存文章 {article.get('title', '未知标题')} 失败: {e}")
-                    continue
-            
-            logger.info(f"源 {source_name}: {saved_count}/{fetched_count} 篇文章保存成功")
+            # 一次查询过滤掉已入库的文章，只有新文章才进行全文提取
+            existing_ids = db.get_existing_ids(a['original_id'] for a in articles)
+            new_articles = [a for a in articles if a['original_id'] not in existing_ids]
+            logger.info(f"源 {source_name}: {len(new_articles)}/{fetched_count} 篇为新文章")
+            new_by_source[source_name] = new_articles
             
         except Exception as e:
             logger.error(f"处理源 {source_name} 失败: {e}")
+            failed_sources.add(source_name)
+            continue
+    
+    new_count = sum(len(articles) for articles in new_by_source.values())
+    if job is not None:
+        job.update(stage='fetched', fetched=total_fetched, new=new_count)
+        job.check_cancelled()
+    
+    # 第二步：所有源的新文章一起并行提取正文，按站点限流
+    links = [a.get('link', '') for articles in new_by_source.values() for a in articles]
+    contents = dict(extract_many(links))
+    if job is not None:
+        job.update(stage='extracted')
+        job.check_cancelled()
+    
+    # 第三步：所有新文章在一个事务中批量写入数据库
+    db_articles = []
+    for source_name, new_articles in new_by_source.items():
+        for article in new_articles:
+            try:
+                # 准备文章数据，映射到数据库字段
+                db_articles.append({
+                    'id': article['original_id'],  # 使用RSS源的唯一ID作为数据库主键
+                    'source': article['source'],
+                    'title': article['title'],
+                    'link': article['link'],
+                    'summary': article.get('description', ''),
+                    'published': datetime.fromisoformat(article['published_at']),
+                    'content': contents.get(article.get('link', '')),
+                    'author': article.get('author', ''),
+                    'keywords': ','.join(article.get('categories', [])),
+                    'ai_processed': False  # 初始化为未处理状态
+                })
+            except Exception as e:
+                logger.error(f"准备文章 {article.get('title', '未知标题')} 失败: {e}")
+                failed_sources.add(source_name)
+    
+    if db_articles:
+        saved_ids = set(db.add_articles_bulk(db_articles))
+        if not saved_ids:
+            # 没有写入任何文章（可能是批量写入失败）时不更新校验值，下次完整抓取后由预过滤去重
+            failed_sources.update(new_by_source)
+        total_saved = len(saved_ids)
+        uncounted = set(saved_ids)
+        for source_name, new_articles in new_by_source.items():
+            saved_count = 0
+            for article in new_articles:
+                if article['original_id'] in uncounted:
+                    uncounted.discard(article['original_id'])
+                    saved_count += 1
+            logger.info(f"源 {source_name}: {saved_count}/{len(new_articles)} 篇新文章保存成功")
+        for article in db_articles:
+            if article['id'] in saved_ids:
+                publish(ARTICLE_INGESTED, {
+                    'id': article['id'],
+                    'source': article['source'],
+                    'title': article['title'],
+                    'published': article['published'].isoformat() if article['published'] else None,
+                })
+    
+    # 文章入库后再保存新的校验值，避免中途失败导致下次收到304而漏掉文章
+    for source_name, fetcher in fetchers.items():
+        saved = validators[source_name]
+        if source_name in failed_sources:
             continue
+        if (fetcher.etag, fetcher.modified) != (saved['etag'], saved['modified']):
+            db.save_feed_validators(fetcher.config['url'], fetcher.etag, fetcher.modified)
     
     logger.info(f"新闻抓取与保存任务完成: 总共抓取 {total_fetched} 篇，保存 {total_saved} 篇新文章")
+    if job is not None:
+        job.update(stage='saved', saved=total_saved)
+    return {"fetched": total_fetched, "saved": total_saved}
 
 if __name__ == "__main__":
     logger.info("新闻定时抓取服务启动")
@@ -0,0 +1,349 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config.config import JOB_WORKERS, JOB_HISTORY_SIZE, JOB_HISTORY_TTL_SEC, JOB_DB_PATH
+from utils.event_bus import publish, JOB_STARTED, JOB_PROGRESS, JOB_FINISHED
+logger = logging.getLogger(__name__)
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"  # 服务重启时仍在排队或运行的任务
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+# 进度写入持久化存储的最小间隔（秒），状态变化总是立即写入
+PERSIST_PROGRESS_INTERVAL = 1.0
+
+
+class JobCancelled(Exception):
+    """任务函数在检查点发现任务已被取消时抛出"""
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+
+class Job:
+    """
+    一个后台任务
+
+    任务函数以关键字参数job接收该对象：通过update()报告进度，在检查点读取cancelled
+    或调用check_cancelled()配合取消
+    """
+
+    def __init__(self, manager: 'JobManager', kind: str, key: Optional[str] = None,
+                 params: Optional[Dict[str, Any]] = None, job_id: Optional[str] = None):
+        self.manager = manager
+        self.id = job_id or str(uuid.uuid4())
+        self.kind = kind
+        self.key = key
+        self.params = params or {}
+        self.status = QUEUED
+        self.progress: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+        self._persisted_at = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已请求取消"""
+        return self._cancel.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in ACTIVE_STATUSES
+
+    def check_cancelled(self):
+        """已请求取消时抛出JobCancelled，供任务函数在检查点调用"""
+        if self.cancelled:
+            raise JobCancelled(self.id)
+
+    def update(self, **progress):
+        """
+        更新进度计数并通过事件总线推送 job.progress 事件
+
+        参数:
+            **progress: 进度字段，与已有进度合并，如 done=3, total=10
+        """
+        with self.manager._lock:
+            self.progress.update(progress)
+            snapshot = dict(self.progress)
+        publish(JOB_PROGRESS, {"job_id": self.id, "job": self.kind, **snapshot})
+        self.manager._persist(self, throttle=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """任务状态字典，字段与旧版任务状态接口兼容（type/status/started_at/finished_at/detail）"""
+        detail = self.result
+        if self.error is not None:
+            detail = {"error": self.error}
+        return {
+            "task_id": self.id,
+            "type": self.kind,
+            "status": self.status,
+            "cancel_requested": self.cancelled,
+            "params": self.params,
+            "progress": dict(self.progress),
+            "created_at": _isoformat(self.created_at),
+            "started_at": _isoformat(self.started_at),
+            "finished_at": _isoformat(self.finished_at),
+            "detail": detail,
+        }
+
+
+class JobManager:
+    """
+    后台任务管理器
+
+    - 任务在专用线程池中执行，不占用Web服务的请求线程池
+    - 指定key的任务单飞合并：同一key已有排队或运行中的任务时直接返回该任务
+    - 已结束的任务按TTL与条数上限淘汰
+    - 配置db_path时任务记录持久化到SQLite，重启后仍可查询；重启前未结束的任务标记为interrupted
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, history_size: int = JOB_HISTORY_SIZE,
+                 ttl_seconds: float = JOB_HISTORY_TTL_SEC, db_path: Optional[str] = JOB_DB_PATH):
+        self.history_size = max(1, history_size)
+        self.ttl = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='job')
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._active: Dict[str, Job] = {}
+        self._lock = threading.RLock()
+        self._conn = None
+        if db_path:
+            try:
+                self._open_store(db_path)
+            except Exception as e:
+                logger.error(f"初始化任务持久化存储失败，任务记录仅保存在内存中: {e}")
+                self._conn = None
+
+    def _open_store(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                params TEXT,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS ix_jobs_created_at ON jobs (created_at);
+        """)
+        # 上次运行时未结束的任务已随进程退出而中断
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, finished_at = ? WHERE status IN (?, ?)",
+            (INTERRUPTED, time.time(), QUEUED, RUNNING)
+        )
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT id, kind, status, params, progress, result, error, created_at, started_at, finished_at "
+            "FROM jobs ORDER BY created_at DESC LIMIT ?", (self.history_size,)
+        ).fetchall()
+        for row in reversed(rows):
+            job = self._job_from_row(row)
+            self._jobs[job.id] = job
+        self._evict()
+
+    def _job_from_row(self, row) -> Job:
+        job_id, kind, status, params, progress, result, error, created_at, started_at, finished_at = row
+        job = Job(self, kind, params=json.loads(params) if params else {}, job_id=job_id)
+        job.status = status
+        job.progress = json.loads(progress) if progress else {}
+        job.result = json.loads(result) if result else None
+        job.error = error
+        job.created_at, job.started_at, job.finished_at = created_at, started_at, finished_at
+        return job
+
+    def _persist(self, job: Job, throttle: bool = False):
+        """将任务记录写入持久化存储，throttle为True时按最小间隔限制写入频率"""
+        if self._conn is None:
+            return
+        now = time.monotonic()
+        if throttle and now - job._persisted_at < PERSIST_PROGRESS_INTERVAL:
+            return
+        try:
+            with self._lock:
+                job._persisted_at = now
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO jobs "
+                    "(id, kind, status, params, progress, result, error, created_at, started_at, finished_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job.id, job.kind, job.status,
+                     json.dumps(job.params, ensure_ascii=False, default=str),
+                     json.dumps(job.progress, ensure_ascii=False, default=str),
+                     json.dumps(job.result, ensure_ascii=False, default=str) if job.result is not None else None,
+                     job.error, job.created_at, job.started_at, job.finished_at)
+                )
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"保存任务 {job.id} 状态失败: {e}")
+
+    def _evict(self):
+        """淘汰超过TTL或超出条数上限的已结束任务（调用方持有锁）"""
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and self.ttl > 0 and now - (job.finished_at or job.created_at) > self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+        overflow = len(self._jobs) - self.history_size
+        if overflow > 0:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:overflow]:
+                del self._jobs[job_id]
+        if self._conn is not None:
+            try:
+                if self.ttl > 0:
+                    self._conn.execute("DELETE FROM jobs WHERE finished_at < ?", (now - self.ttl,))
+                self._conn.execute(
+                    "DELETE FROM jobs WHERE id NOT IN (SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?) "
+                    "AND status NOT IN (?, ?)", (self.history_size, QUEUED, RUNNING)
+                )
+                self._conn.commit()
+            except Exception as e:
+                logger.error(f"清理任务历史失败: {e}")
+
+    def submit(self, kind: str, fn: Callable, *args, key: Optional[str] = None,
+               params: Optional[Dict[str, Any]] = None, **kwargs) -> Tuple[Job, bool]:
+        """
+        提交任务，fn以 fn(*args, job=job, **kwargs) 的形式在任务线程池中执行
+
+        参数:
+            kind: 任务类型，如 fetch/process
+            fn: 任务函数，返回值作为任务结果（需可JSON序列化）
+            key: 单飞键，同一key已有排队或运行中的任务时不再创建新任务
+            params: 记录在任务状态中的参数
+
+        返回:
+            Tuple[Job, bool]: (任务, 是否新建)；合并到已有任务时为 (已有任务, False)
+        """
+        with self._lock:
+            if key is not None:
+                existing = self._active.get(key)
+                if existing is not None and not existing.finished:
+                    return existing, False
+            self._evict()
+            job = Job(self, kind, key=key, params=params)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active[key] = job
+        self._persist(job)
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        logger.info(f"提交后台任务 {kind} ({job.id})")
+        return job, True
+
+    def _run(self, job: Job, fn: Callable, args, kwargs):
+        with self._lock:
+            if job.status != QUEUED:
+                return  # 排队期间已被取消
+            job.status = RUNNING
+            job.started_at = time.time()
+        self._persist(job)
+        publish(JOB_STARTED, {"job_id": job.id, "job": job.kind})
+        try:
+            result = fn(*args, job=job, **kwargs)
+            status, error = (CANCELLED if job.cancelled else COMPLETED), None
+        except JobCancelled:
+            result, status, error = None, CANCELLED, None
+        except Exception as e:
+            logger.error(f"后台任务 {job.kind} ({job.id}) 失败: {e}", exc_info=True)
+            result, status, error = None, FAILED, str(e)
+        self._finish(job, status, result, error)
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None):
+        with self._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+            if job.key is not None and self._active.get(job.key) is job:
+                del self._active[job.key]
+        self._persist(job)
+        # 结束事件不带大体积的结果列表（如已处理文章明细），需要时通过任务状态接口查询
+        detail = job.to_dict()["detail"]
+        if isinstance(detail, dict):
+            detail = {k: v for k, v in detail.items() if not isinstance(v, list)}
+        publish(JOB_FINISHED, {"job_id": job.id, "job": job.kind, "status": status, "detail": detail})
+        logger.info(f"后台任务 {job.kind} ({job.id}) 结束: {status}")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """按ID获取任务（含已淘汰出内存但仍在持久化存储中的任务），不存在返回None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None or self._conn is None:
+                return job
+            try:
+                row = self._conn.execute(
+                    "SELECT id, kind, status, params, progress, result, error, created_at, started_at, finished_at "
+                    "FROM jobs WHERE id = ?", (job_id,)
+                ).fetchone()
+                return self._job_from_row(row) if row else None
+            except Exception as e:
+                logger.error(f"读取任务 {job_id} 失败: {e}")
+                return None
+
+    def list(self, kind: Optional[str] = None, status: Optional[str] = None, limit: int = 50) -> List[Job]:
+        """按创建时间倒序列出任务"""
+        with self._lock:
+            self._evict()
+            jobs = [job for job in reversed(self._jobs.values())
+                    if (kind is None or job.kind == kind) and (status is None or job.status == status)]
+        return jobs[:limit]
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        请求取消任务：排队中的任务直接取消，运行中的任务在下一个检查点停止
+
+        返回:
+            Optional[Job]: 任务，不存在时返回None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return job
+            job._cancel.set()
+            queued = job.status == QUEUED
+        if queued:
+            self._finish(job, CANCELLED)
+        else:
+            self._persist(job)
+        logger.info(f"请求取消后台任务 {job.kind} ({job.id})")
+        return job
+
+    def shutdown(self, wait: bool = False):
+        """请求取消所有未结束的任务并关闭线程池"""
+        for job in self.list(limit=len(self._jobs)):
+            if not job.finished:
+                self.cancel(job.id)
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """获取进程内共享的任务管理器"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
@@ -0,0 +1,124 @@
+# 添加项目根目录到Python路径，使模块可以正确导入
+import sys
+import os
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)
+
+import argparse
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+import requests
+
+# 默认压测的只读接口，模拟仪表盘的轮询与翻页
+DEFAULT_ENDPOINTS = [
+    "/api/stats",
+    "/api/sources",
+    "/api/sentiments",
+    "/api/articles?page_size=20",
+    "/api/articles?cursor=&page_size=20",
+    "/api/search?q=bitcoin&page_size=10",
+    "/api/sentiment/timeseries?bucket=day",
+]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+def run_load_test(base_url: str, endpoints: List[str], clients: int = 50, duration: float = 20.0,
+                  timeout: float = 30.0) -> Dict:
+    """
+    以多个并发客户端循环请求接口，统计吞吐量与延迟分位数
+
+    Args:
+        base_url: API服务地址，如 http://localhost:8002
+        endpoints: 依次轮询的接口路径（含查询参数）
+        clients: 并发客户端（线程）数
+        duration: 压测时长（秒）
+        timeout: 单次请求超时（秒）
+
+    Returns:
+        包含总请求数、吞吐量以及各接口延迟统计的字典
+    """
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def _client(index: int):
+        session = requests.Session()
+        i = index
+        while time.monotonic() < deadline:
+            path = endpoints[i % len(endpoints)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                response = session.get(base_url + path, timeout=timeout)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies[path].append(elapsed)
+                if not ok:
+                    errors[path] += 1
+        session.close()
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        for index in range(clients):
+            executor.submit(_client, index)
+    elapsed = time.monotonic() - started
+
+    total = sum(len(v) for v in latencies.values())
+    all_latencies = [x for v in latencies.values() for x in v]
+    return {
+        "clients": clients,
+        "duration": round(elapsed, 2),
+        "requests": total,
+        "errors": sum(errors.values()),
+        "throughput": round(total / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(all_latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(all_latencies, 95) * 1000, 1),
+        "p99_ms": round(_percentile(all_latencies, 99) * 1000, 1),
+        "endpoints": {
+            path: {
+                "requests": len(values),
+                "errors": errors[path],
+                "p50_ms": round(_percentile(values, 50) * 1000, 1),
+                "p99_ms": round(_percentile(values, 99) * 1000, 1),
+            }
+            for path, values in latencies.items()
+        },
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="API并发压测：统计多个并发客户端下的吞吐量与延迟")
+    parser.add_argument("--base-url", default=f"http://localhost:{os.getenv('PORT', '8002')}", help="API服务地址")
+    parser.add_argument("--clients", type=int, default=50, help="并发客户端数")
+    parser.add_argument("--duration", type=float, default=20.0, help="压测时长（秒）")
+    parser.add_argument("--endpoint", action="append", dest="endpoints", help="压测的接口路径，可重复指定")
+    args = parser.parse_args(argv)
+
+    result = run_load_test(args.base_url.rstrip("/"), args.endpoints or DEFAULT_ENDPOINTS,
+                           clients=args.clients, duration=args.duration)
+    print(f"并发 {result['clients']}，时长 {result['duration']} 秒，请求 {result['requests']} 次，"
+          f"失败 {result['errors']} 次，吞吐量 {result['throughput']} 次/秒")
+    print(f"延迟 p50 {result['p50_ms']} ms，p95 {result['p95_ms']} ms，p99 {result['p99_ms']} ms")
+    for path, stats in result["endpoints"].items():
+        print(f"  {path}: {stats['requests']} 次，失败 {stats['errors']}，"
+              f"p50 {stats['p50_ms']} ms，p99 {stats['p99_ms']} ms")
+    return 0 if result["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
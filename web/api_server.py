@@ -6,24 +6,31 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 sys.path.insert(0, project_root)
 
-from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Optional
 from datetime import datetime
 import json
-from sqlalchemy import func
+import html
+import base64
+import hashlib
 
 # 导入数据库操作
-from database.operations import Database, Article
-from utils.ai_processor import process_unprocessed_articles
+from database.operations import get_database, Article, SNIPPET_START, SNIPPET_END
+from web.schemas import (ArticleResponse, ArticleListResponse, SearchResponse, LIST_FIELDS,
+                         article_to_response, article_to_dict)
+from web.responses import FastJSONResponse, CompressionMiddleware
+from sqlalchemy.orm import undefer_group
+from utils.ai_processor import process_unprocessed_articles, drain_unprocessed_articles
 from utils.fetch_and_save import fetch_and_save
-import uuid
-import threading
+from utils.event_bus import get_event_bus, DATA_CHANGED
+from utils.job_manager import get_job_manager
+from utils.export_articles import EXPORT_FORMATS, parse_export_fields, parquet_available
 from datetime import datetime
-from config.config import DB_URL
+from config.config import DB_URL, EVENT_HEARTBEAT_SEC, EXPORT_CHUNK_SIZE, PROCESS_MAX_BATCH_SIZE
 
 # 配置日志
 import logging
@@ -58,74 +65,116 @@ app.mount("/static", StaticFiles(directory="web/static"), name="static")
 
 # 初始化数据库连接
 try:
-    db = Database(DB_URL)
+    db = get_database(DB_URL)
     logger.info("数据库连接成功")
 except Exception as e:
     logger.error(f"数据库初始化失败: {e}")
     raise
 
-# 定义响应模型
-class ArticleResponse(BaseModel):
-    id: str
-    source: Optional[str] = None
-    title: Optional[str] = None
-    link: Optional[str] = None
-    summary: Optional[str] = None
-    published: Optional[datetime] = None
-    content: Optional[str] = None
-    author: Optional[str] = None
-    sentiment: Optional[str] = None
-    sentiment_score: Optional[float] = None
-    chinese_summary: Optional[str] = None
-    keywords: Optional[str] = None
-    created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
-    ai_processed: bool = False
-
-    class Config:
-        from_attributes = True
-
-class ArticleListResponse(BaseModel):
-    articles: List[ArticleResponse]
-    total: int
-    page: int
-    page_size: int
+# 使用ETag条件请求的只读接口（含其子路径），响应只取决于数据版本号和请求参数
+ETAG_PATHS = (
+    "/api/articles", "/api/search", "/api/sources", "/api/sentiments",
+    "/api/stats", "/api/sentiment/timeseries",
+)
+
+def _is_etag_path(path: str) -> bool:
+    return any(path == prefix or path.startswith(prefix + "/") for prefix in ETAG_PATHS)
+
+def _make_etag(version: int, request: Request) -> str:
+    """由数据版本号和请求路径、参数（与顺序无关）生成弱ETag"""
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{request.url.path}?{params}".encode("utf-8")).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """按弱比较判断If-None-Match是否包含当前ETag"""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+@app.middleware("http")
+async def etag_middleware(request: Request, call_next):
+    """
+    为只读接口添加ETag与Cache-Control: no-cache
+
+    数据版本号未变化且客户端带有匹配的If-None-Match时直接返回304，不执行查询。
+    版本号缓存过期时才在读线程池中读取一次（单行主键查询）
+    """
+    if request.method not in ("GET", "HEAD") or not _is_etag_path(request.url.path):
+        return await call_next(request)
+    version = db.cached_data_version()
+    if version is None:
+        version = await db.run_read(db.get_data_version)
+    if version is None:
+        return await call_next(request)
+
+    etag = _make_etag(version, request)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
+
+# 按Accept-Encoding压缩较大的响应（最后添加，位于最外层）
+app.add_middleware(CompressionMiddleware)
 
+# 定义请求模型
 class ProcessRequest(BaseModel):
-    batch_size: int = 10
-    delay: float = 0.5
-
-# 简易任务状态存储
-TASKS = {}
-TASKS_LOCK = threading.Lock()
-
-def _set_task(task_id: str, data: dict):
-    with TASKS_LOCK:
-        TASKS[task_id] = data
-
-def _get_task(task_id: str):
-    with TASKS_LOCK:
-        return TASKS.get(task_id)
-
-# 辅助函数：将Article对象转换为响应模型
-def article_to_response(article: Article) -> ArticleResponse:
-    return ArticleResponse(
-        id=article.id,
-        source=article.source,
-        title=article.title,
-        link=article.link,
-        summary=article.summary,
-        published=article.published,
-        content=article.content,
-        author=article.author,
-        sentiment=article.sentiment,
-        sentiment_score=article.sentiment_score,
-        chinese_summary=article.chinese_summary,
-        keywords=article.keywords,
-        created_at=article.created_at,
-        updated_at=article.updated_at,
-        ai_processed=article.ai_processed
-    )
+    # 每批认领的文章数，一批需在租约时长内处理完；drain为True时任务分批循环处理直到积压清空
+    batch_size: int = Field(10, ge=1, le=PROCESS_MAX_BATCH_SIZE)
+    delay: float = Field(0.5, ge=0)
+    drain: bool = False
+
+# 后台任务在任务管理器的专用线程池中执行，不占用请求线程池
+jobs = get_job_manager()
+
+@app.on_event("shutdown")
+def _shutdown_jobs():
+    """服务停止时请求取消未结束的后台任务"""
+    jobs.shutdown(wait=False)
+
+def _parse_fields(fields: Optional[str]) -> tuple:
+    """解析逗号分隔的字段列表，未提供时使用列表默认字段，id总是返回"""
+    if not fields:
+        return LIST_FIELDS
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in ArticleResponse.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"未知字段: {', '.join(unknown)}")
+    return tuple(dict.fromkeys(["id"] + names))
+
+def _parse_date_range(start_date: Optional[str], end_date: Optional[str]):
+    """解析YYYY-MM-DD格式的日期范围，两者需同时提供，否则不按日期筛选"""
+    if not (start_date and end_date):
+        return None, None
+    try:
+        return datetime.strptime(start_date, "%Y-%m-%d"), datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="日期格式错误，请使用YYYY-MM-DD格式")
+
+def _encode_cursor(article: Article) -> str:
+    """将文章的 (published, id) 编码为不透明的游标字符串"""
+    published = article.published.isoformat() if article.published else None
+    payload = json.dumps([published, article.id], separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str):
+    """解析游标字符串为 (published, id)，格式错误时返回400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        published, article_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return (datetime.fromisoformat(published) if published else None), str(article_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="无效的游标")
+
+def _render_snippet(snippet: Optional[str]) -> Optional[str]:
+    """转义命中摘要中的HTML，并将命中标记替换为<mark>"""
+    if not snippet:
+        return None
+    return html.escape(snippet).replace(SNIPPET_START, "<mark>").replace(SNIPPET_END, "</mark>")
 
 # API端点
 @app.get("/", response_class=HTMLResponse)
@@ -139,7 +188,7 @@ async def root():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"读取主页模板失败: {str(e)}")
 
-@app.get("/api/articles", response_model=ArticleListResponse)
+@app.get("/api/articles", response_model=ArticleListResponse, response_model_exclude_unset=True)
 async def get_articles(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(10, ge=1, le=100, description="每页数量"),
@@ -147,41 +196,56 @@ async def get_articles(
     sentiment: Optional[str] = Query(None, description="情感筛选 (positive/negative/neutral)"),
     start_date: Optional[str] = Query(None, description="开始日期 (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="结束日期 (YYYY-MM-DD)"),
-    ai_processed: Optional[bool] = Query(None, description="是否已AI处理")
+    ai_processed: Optional[bool] = Query(None, description="是否已AI处理"),
+    cursor: Optional[str] = Query(None, description="游标分页：首页传空字符串，之后传上次返回的next_cursor；提供时忽略page"),
+    with_total: Optional[bool] = Query(None, description="是否返回总数，页码模式默认返回，游标模式默认不返回"),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，默认为不含正文的列表字段，需要正文时加入content")
 ):
-    try:
-        session = db.get_session()
+    def _query():
+        session = db.get_read_session()
         try:
-            query = session.query(Article)
-            if source:
-                query = query.filter(Article.source == source)
-            if sentiment:
-                query = query.filter(Article.sentiment == sentiment)
-            if ai_processed is not None:
-                query = query.filter(Article.ai_processed == ai_processed)
-            if start_date and end_date:
-                try:
-                    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-                except ValueError:
-                    raise HTTPException(status_code=400, detail="日期格式错误，请使用YYYY-MM-DD格式")
-                query = query.filter(Article.published.between(start_dt, end_dt))
-            total = query.count()
-            paginated_articles = (
-                query.order_by(Article.published.desc())
-                .offset((page - 1) * page_size)
+            start_dt, end_dt = _parse_date_range(start_date, end_date)
+            selected = _parse_fields(fields)
+            # 只查询需要的列（游标需要published），结果为轻量的行元组，不构造ORM对象
+            columns = [getattr(Article, name) for name in dict.fromkeys(selected + ("published",))]
+            # 筛选条件与排序和索引设计保持一致，见 Database.filter_articles
+            query = db.filter_articles(
+                session.query(*columns), source=source, sentiment=sentiment,
+                ai_processed=ai_processed, start_date=start_dt, end_date=end_dt
+            )
+            
+            # 快速路径：行直接转为字典并序列化为JSON，字段与 ArticleListResponse(exclude_unset) 一致
+            if cursor is not None:
+                # 游标模式：按 (published, id) 定位，不使用OFFSET，多取一条判断是否还有下一页
+                after = _decode_cursor(cursor) if cursor else None
+                rows = db.keyset_page(query, page_size + 1, after=after)
+                has_more = len(rows) > page_size
+                rows = rows[:page_size]
+                return FastJSONResponse({
+                    "articles": [article_to_dict(row, selected) for row in rows],
+                    "total": query.order_by(None).count() if with_total else None,
+                    "page_size": page_size,
+                    "next_cursor": _encode_cursor(rows[-1]) if has_more else None
+                })
+            
+            total = query.order_by(None).count() if with_total is not False else None
+            rows = (
+                query.offset((page - 1) * page_size)
                 .limit(page_size)
                 .all()
             )
-            article_responses = [article_to_response(a) for a in paginated_articles]
-            return ArticleListResponse(
-                articles=article_responses,
-                total=total,
-                page=page,
-                page_size=page_size
-            )
+            return FastJSONResponse({
+                "articles": [article_to_dict(row, selected) for row in rows],
+                "total": total,
+                "page": page,
+                "page_size": page_size
+            })
         finally:
             session.close()
+    
+    try:
+        # 数据库查询在有界的读线程池中执行，不阻塞事件循环
+        return await db.run_read(_query)
     except HTTPException:
         raise
     except Exception as e:
@@ -189,20 +253,64 @@ async def get_articles(
         logger.error(f"获取文章失败: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"获取文章失败: {str(e)}")
 
+@app.get("/api/search", response_model=SearchResponse, response_model_exclude_unset=True)
+async def search_articles(
+    q: str = Query(..., min_length=1, max_length=200, description="搜索关键词，多个词以空格分隔"),
+    page: int = Query(1, ge=1, description="页码"),
+    page_size: int = Query(10, ge=1, le=100, description="每页数量"),
+    source: Optional[str] = Query(None, description="新闻来源筛选"),
+    sentiment: Optional[str] = Query(None, description="情感筛选 (positive/negative/neutral)"),
+    start_date: Optional[str] = Query(None, description="开始日期 (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="结束日期 (YYYY-MM-DD)"),
+    ai_processed: Optional[bool] = Query(None, description="是否已AI处理"),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，默认为不含正文的列表字段，需要正文时加入content")
+):
+    """
+    全文搜索文章，按相关度排序并返回高亮的命中摘要
+    """
+    try:
+        start_dt, end_dt = _parse_date_range(start_date, end_date)
+        selected = _parse_fields(fields)
+        results, total = await db.run_read(
+            db.search_articles,
+            q, source=source, sentiment=sentiment, ai_processed=ai_processed, start_date=start_dt, end_date=end_dt,
+            limit=page_size, offset=(page - 1) * page_size, fields=selected
+        )
+        articles = []
+        for article, rank, snippet in results:
+            item = article_to_dict(article, selected)
+            item["rank"] = rank
+            item["snippet"] = _render_snippet(snippet)
+            articles.append(item)
+        # 快速路径：直接序列化字典，字段与 SearchResponse(exclude_unset) 一致
+        return FastJSONResponse({"articles": articles, "total": total, "page": page,
+                                 "page_size": page_size, "query": q})
+    except HTTPException:
+        raise
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"搜索文章失败: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"搜索文章失败: {str(e)}")
+
 @app.get("/api/articles/by-id", response_model=ArticleResponse)
 async def get_article_by_id(article_id: str = Query(..., description="文章ID")):
     """
     获取单篇文章详情（使用查询参数）
     """
-    try:
-        session = db.get_session()
+    def _query():
+        session = db.get_read_session()
         try:
-            article = session.query(Article).filter_by(id=article_id).first()
+            article = session.query(Article).options(undefer_group('body')).filter_by(id=article_id).first()
             if not article:
                 raise HTTPException(status_code=404, detail="文章不存在")
             return article_to_response(article)
         finally:
             session.close()
+    
+    try:
+        # 数据库查询在有界的读线程池中执行，不阻塞事件循环
+        return await db.run_read(_query)
     except HTTPException:
         raise
     except Exception as e:
@@ -216,15 +324,19 @@ async def get_article(article_id: str):
     """
     获取单篇文章详情
     """
-    try:
-        session = db.get_session()
+    def _query():
+        session = db.get_read_session()
         try:
-            article = session.query(Article).filter_by(id=article_id).first()
+            article = session.query(Article).options(undefer_group('body')).filter_by(id=article_id).first()
             if not article:
                 raise HTTPException(status_code=404, detail="文章不存在")
             return article_to_response(article)
         finally:
             session.close()
+    
+    try:
+        # 数据库查询在有界的读线程池中执行，不阻塞事件循环
+        return await db.run_read(_query)
     except HTTPException:
         raise
     except Exception as e:
@@ -238,14 +350,18 @@ async def get_sources():
     """
     获取所有新闻来源
     """
-    try:
-        session = db.get_session()
+    def _query():
+        session = db.get_read_session()
         try:
             # 获取所有不重复的新闻来源
             sources = session.query(Article.source).distinct().all()
             return [source[0] for source in sources if source[0]]
         finally:
             session.close()
+    
+    try:
+        # 数据库查询在有界的读线程池中执行，不阻塞事件循环
+        return await db.run_read(_query)
     except Exception as e:
         # 记录详细错误信息到日志
         logger = logging.getLogger(__name__)
@@ -257,14 +373,18 @@ async def get_sentiments():
     """
     获取所有情感类型
     """
-    try:
-        session = db.get_session()
+    def _query():
+        session = db.get_read_session()
         try:
             # 获取所有不重复的情感类型
             sentiments = session.query(Article.sentiment).distinct().all()
             return [sentiment[0] for sentiment in sentiments if sentiment[0]]
         finally:
             session.close()
+    
+    try:
+        # 数据库查询在有界的读线程池中执行，不阻塞事件循环
+        return await db.run_read(_query)
     except Exception as e:
         # 记录详细错误信息到日志
         logger = logging.getLogger(__name__)
@@ -277,109 +397,177 @@ async def get_stats():
     获取统计信息
     """
     try:
-        session = db.get_session()
-        try:
-            total_articles = session.query(Article).count()
-            processed_articles = session.query(Article).filter_by(ai_processed=True).count()
-            unprocessed_articles = total_articles - processed_articles
-            
-            # 按来源统计
-            source_stats = {}
-            sources = session.query(Article.source, func.count(Article.id)).group_by(Article.source).all()
-            for source, count in sources:
-                if source:
-                    source_stats[source] = count
-            
-            # 按情感统计
-            sentiment_stats = {}
-            sentiments = session.query(Article.sentiment, func.count(Article.id)).group_by(Article.sentiment).all()
-            for sentiment, count in sentiments:
-                if sentiment:
-                    sentiment_stats[sentiment] = count
-            
-            return {
-                "total_articles": total_articles,
-                "processed_articles": processed_articles,
-                "unprocessed_articles": unprocessed_articles,
-                "source_stats": source_stats,
-                "sentiment_stats": sentiment_stats
-            }
-        finally:
-            session.close()
+        # 计数由数据库触发器增量维护，见 Database.get_stats
+        return await db.run_read(db.get_stats)
     except Exception as e:
         # 记录详细错误信息到日志
         logger = logging.getLogger(__name__)
         logger.error(f"获取统计信息失败: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"获取统计信息失败: {str(e)}")
 
-@app.post("/api/process-unprocessed")
-async def process_unprocessed(req: ProcessRequest, background_tasks: BackgroundTasks):
-    """后台触发处理未AI文章，立即返回任务ID"""
+def _parse_datetime(value: Optional[str], name: str) -> Optional[datetime]:
+    """解析ISO格式的日期或日期时间参数"""
+    if not value:
+        return None
     try:
-        task_id = str(uuid.uuid4())
-        _set_task(task_id, {
-            "type": "process",
-            "status": "running",
-            "started_at": datetime.utcnow().isoformat()
-        })
-
-        def _run():
-            try:
-                result = process_unprocessed_articles(batch_size=req.batch_size, delay=req.delay)
-                _set_task(task_id, {
-                    "type": "process",
-                    "status": "completed",
-                    "started_at": _get_task(task_id)["started_at"],
-                    "finished_at": datetime.utcnow().isoformat(),
-                    "detail": result
-                })
-            except Exception as e:
-                _set_task(task_id, {
-                    "type": "process",
-                    "status": "failed",
-                    "started_at": _get_task(task_id)["started_at"],
-                    "finished_at": datetime.utcnow().isoformat(),
-                    "detail": {"error": str(e)}
-                })
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} 格式错误，请使用YYYY-MM-DD或YYYY-MM-DDTHH:MM:SS格式")
 
-        background_tasks.add_task(_run)
-        return {"task_id": task_id, "message": "处理任务已触发"}
+@app.get("/api/sentiment/timeseries")
+async def get_sentiment_timeseries(
+    bucket: str = Query("day", pattern="^(hour|day)$", description="时间粒度 (hour/day)"),
+    source: Optional[str] = Query(None, description="新闻来源，不填则汇总所有来源"),
+    start: Optional[str] = Query(None, alias="from", description="起始时间（含），YYYY-MM-DD或ISO日期时间"),
+    end: Optional[str] = Query(None, alias="to", description="结束时间（不含），YYYY-MM-DD或ISO日期时间")
+):
+    """
+    获取按小时/天汇总的情感时间序列（来自情感汇总表，不扫描文章表）
+    """
+    try:
+        start_dt = _parse_datetime(start, "from")
+        end_dt = _parse_datetime(end, "to")
+        points = await db.run_read(db.get_sentiment_timeseries, bucket, source=source, start=start_dt, end=end_dt)
+        return {"bucket": bucket, "source": source, "points": points}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"获取情感时间序列失败: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"获取情感时间序列失败: {str(e)}")
+
+@app.get("/api/export")
+async def export_articles(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$", description="导出格式 (ndjson/csv/parquet)"),
+    source: Optional[str] = Query(None, description="新闻来源筛选"),
+    sentiment: Optional[str] = Query(None, description="情感筛选 (positive/negative/neutral)"),
+    start_date: Optional[str] = Query(None, description="开始日期 (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="结束日期 (YYYY-MM-DD)"),
+    ai_processed: Optional[bool] = Query(None, description="是否已AI处理"),
+    fields: Optional[str] = Query(None, description="逗号分隔的导出字段，默认全部字段（含正文）")
+):
+    """
+    按列表页的筛选条件流式导出全部符合条件的文章
+
+    边查询边写出，每次读取EXPORT_CHUNK_SIZE行，内存占用与导出行数无关；
+    NDJSON/CSV响应按Accept-Encoding压缩，Parquet需要安装pyarrow
+    """
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="导出Parquet需要安装pyarrow")
+    try:
+        selected = parse_export_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    start_dt, end_dt = _parse_date_range(start_date, end_date)
+
+    writer, media_type, extension = EXPORT_FORMATS[format]
+    rows = db.stream_articles(selected, source=source, sentiment=sentiment, ai_processed=ai_processed,
+                              start_date=start_dt, end_date=end_dt, chunk_size=EXPORT_CHUNK_SIZE)
+    filename = f"articles-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}"
+    return StreamingResponse(
+        db.iterate_read(writer(rows, selected, EXPORT_CHUNK_SIZE)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def _format_sse(event: dict) -> str:
+    """
+    将事件编码为SSE消息，事件类型作为event字段，客户端可按类型监听
+
+    不在事件缓冲区中的事件（data.changed）没有id，不输出id字段，以免覆盖客户端的Last-Event-ID
+    """
+    data = json.dumps(event["data"], ensure_ascii=False, default=str)
+    event_id = f"id: {event['id']}\n" if event.get("id") else ""
+    return f"{event_id}event: {event['type']}\ndata: {data}\n\n"
+
+async def _event_source(last_event_id: Optional[int] = None):
+    """
+    订阅事件总线并逐个产出事件；空闲时每个心跳间隔产出一次None
+
+    心跳时检查数据版本号（进程内缓存，多个连接共享），其他进程写入数据库后
+    以 data.changed 事件通知客户端，客户端无需轮询统计与列表接口
+    """
+    async def _data_version():
+        version = db.cached_data_version()
+        return version if version is not None else await db.run_read(db.get_data_version)
+
+    subscription = get_event_bus().subscribe(last_event_id)
+    try:
+        version = await _data_version()
+        while True:
+            event = await subscription.get(timeout=EVENT_HEARTBEAT_SEC)
+            if event is not None:
+                yield event
+                continue
+            current = await _data_version()
+            if version is not None and current is not None and current != version:
+                yield {"id": None, "type": DATA_CHANGED, "data": {"version": current}}
+            else:
+                yield None
+            version = current
+    finally:
+        subscription.close()
+
+@app.get("/api/stream")
+async def event_stream(request: Request):
+    """
+    Server-Sent Events 实时事件流
+
+    推送 article.ingested、article.analyzed、job.started、job.progress、job.finished
+    与 data.changed 事件；断线重连时浏览器自动带上 Last-Event-ID，补发缓冲区中错过的事件
+    """
+    last_event_id = request.headers.get("last-event-id")
+    last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
+    async def _stream():
+        # 建议客户端断线3秒后重连
+        yield "retry: 3000\n\n"
+        async for event in _event_source(last_event_id):
+            yield ": keep-alive\n\n" if event is None else _format_sse(event)
+
+    return StreamingResponse(_stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # 禁止反向代理缓冲事件流
+    })
+
+@app.websocket("/api/ws")
+async def event_websocket(websocket: WebSocket):
+    """WebSocket 实时事件流，事件内容与 /api/stream 相同，以JSON消息发送"""
+    await websocket.accept()
+    try:
+        async for event in _event_source():
+            if event is None:
+                await websocket.send_json({"type": "ping"})
+            else:
+                await websocket.send_text(json.dumps(event, ensure_ascii=False, default=str))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"WebSocket事件流异常: {e}")
+
+@app.post("/api/process-unprocessed")
+async def process_unprocessed(req: ProcessRequest):
+    """后台触发处理未AI文章，立即返回任务ID；已有处理任务在排队或运行时返回该任务"""
+    try:
+        fn = drain_unprocessed_articles if req.drain else process_unprocessed_articles
+        job, created = jobs.submit(
+            "process", fn, key="process",
+            params={"batch_size": req.batch_size, "delay": req.delay, "drain": req.drain},
+            batch_size=req.batch_size, delay=req.delay
+        )
+        message = "处理任务已触发" if created else "已有处理任务在运行，返回该任务"
+        return {"task_id": job.id, "message": message, "coalesced": not created}
     except Exception as e:
         logger = logging.getLogger(__name__)
         logger.error(f"触发处理任务失败: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"触发失败: {str(e)}")
 
 @app.post("/api/fetch-latest")
-async def fetch_latest(background_tasks: BackgroundTasks):
-    """后台触发抓取任务，立即返回任务ID"""
+async def fetch_latest():
+    """后台触发抓取任务，立即返回任务ID；已有抓取任务在排队或运行时返回该任务"""
     try:
-        task_id = str(uuid.uuid4())
-        _set_task(task_id, {
-            "type": "fetch",
-            "status": "running",
-            "started_at": datetime.utcnow().isoformat()
-        })
-
-        def _run():
-            try:
-                fetch_and_save()
-                _set_task(task_id, {
-                    "type": "fetch",
-                    "status": "completed",
-                    "started_at": _get_task(task_id)["started_at"],
-                    "finished_at": datetime.utcnow().isoformat()
-                })
-            except Exception as e:
-                _set_task(task_id, {
-                    "type": "fetch",
-                    "status": "failed",
-                    "started_at": _get_task(task_id)["started_at"],
-                    "finished_at": datetime.utcnow().isoformat(),
-                    "detail": {"error": str(e)}
-                })
-
-        background_tasks.add_task(_run)
-        return {"task_id": task_id, "message": "抓取任务已触发"}
+        job, created = jobs.submit("fetch", fetch_and_save, key="fetch")
+        message = "抓取任务已触发" if created else "已有抓取任务在运行，返回该任务"
+        return {"task_id": job.id, "message": message, "coalesced": not created}
     except Exception as e:
         logger = logging.getLogger(__name__)
         logger.error(f"触发抓取任务失败: {str(e)}", exc_info=True)
@@ -387,11 +575,28 @@ async def fetch_latest(background_tasks: BackgroundTasks):
 
 @app.get("/api/task-status")
 async def task_status(task_id: str = Query(..., description="任务ID")):
-    """查询后台任务状态"""
-    task = _get_task(task_id)
-    if not task:
+    """查询后台任务状态、进度与结果"""
+    job = jobs.get(task_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return job.to_dict()
+
+@app.get("/api/tasks")
+async def list_tasks(
+    type: Optional[str] = Query(None, description="任务类型筛选 (fetch/process)"),
+    status: Optional[str] = Query(None, description="状态筛选 (queued/running/completed/failed/cancelled/interrupted)"),
+    limit: int = Query(50, ge=1, le=500, description="最多返回的任务数")
+):
+    """按创建时间倒序列出最近的后台任务"""
+    return {"tasks": [job.to_dict() for job in jobs.list(kind=type, status=status, limit=limit)]}
+
+@app.post("/api/tasks/{task_id}/cancel")
+async def cancel_task(task_id: str):
+    """取消后台任务：排队中的任务立即取消，运行中的任务在下一个检查点停止"""
+    job = jobs.cancel(task_id)
+    if not job:
         raise HTTPException(status_code=404, detail="任务不存在")
-    return task
+    return job.to_dict()
 
 # 启动服务器时的提示
 if __name__ == "__main__":
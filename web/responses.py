@@ -0,0 +1,189 @@
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except Exception:
+    _ORJSON_AVAILABLE = False
+try:
+    import brotli
+    _BROTLI_AVAILABLE = True
+except Exception:
+    _BROTLI_AVAILABLE = False
+
+from config.config import COMPRESS_MIN_BYTES, COMPRESS_GZIP_LEVEL, COMPRESS_BROTLI_QUALITY
+
+# 值得压缩的响应类型（前缀匹配），事件流需要逐条即时送达，不压缩
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "text/")
+UNCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    将字典/列表直接序列化为UTF-8 JSON字节串
+
+    安装了orjson时使用orjson，否则退回标准库json；两者输出一致：
+    紧凑分隔符、不转义非ASCII字符、日期时间为ISO格式
+    """
+    if _ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    直接序列化字典的JSON响应
+
+    处理函数返回该响应时FastAPI不再按response_model校验与转换，
+    调用方需保证内容与声明的响应模型一致（response_model仍用于生成接口文档）
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    按Accept-Encoding选择压缩算法：优先br（需安装brotli），其次gzip，都不接受时返回None
+
+    参数:
+        accept_encoding: 请求头Accept-Encoding的值，如 "gzip, deflate, br;q=0.9"
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    candidates = (("br", "gzip") if _BROTLI_AVAILABLE else ("gzip",))
+    best = max(candidates, key=lambda name: accepted.get(name, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+
+class _Compressor:
+    """gzip/br增量压缩器，每个数据块压缩后立即刷出，流式响应的客户端可以边收边解压"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: gzip格式
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """
+    按Accept-Encoding对响应进行gzip/br压缩的ASGI中间件
+
+    小于minimum_size的完整响应、已编码的响应、事件流和非文本类型不压缩；
+    流式响应（如批量导出）逐块压缩，不会缓存整个响应体
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES, gzip_level: int = COMPRESS_GZIP_LEVEL,
+                 brotli_quality: int = COMPRESS_BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+        pending = b""
+
+        async def _send(message):
+            nonlocal start_message, compressor, passthrough, pending
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                data = compressor.compress(body) if body else b""
+                if not more_body:
+                    data += compressor.finish()
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            content_type = headers.get("content-type", "").lower()
+            compressible = (
+                start_message["status"] not in (204, 304)
+                and "content-encoding" not in headers
+                and content_type.startswith(COMPRESSIBLE_TYPES)
+                and not content_type.startswith(UNCOMPRESSIBLE_TYPES)
+            )
+            if not compressible:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            # 经过其他中间件的响应会被拆成多块发送，先缓存到最小压缩大小再决定是否压缩
+            pending += body
+            if more_body and len(pending) < self.minimum_size:
+                return
+            headers.add_vary_header("Accept-Encoding")
+            if len(pending) < self.minimum_size:
+                passthrough = True
+                if "content-length" not in headers:
+                    headers["Content-Length"] = str(len(pending))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": pending})
+                return
+
+            compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+            headers["Content-Encoding"] = encoding
+            data = compressor.compress(pending)
+            pending = b""
+            if more_body:
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+            else:
+                data += compressor.finish()
+                headers["Content-Length"] = str(len(data))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, _send)
@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+
+# 定义响应模型
+class ArticleResponse(BaseModel):
+    id: str
+    source: Optional[str] = None
+    title: Optional[str] = None
+    link: Optional[str] = None
+    summary: Optional[str] = None
+    published: Optional[datetime] = None
+    content: Optional[str] = None
+    author: Optional[str] = None
+    sentiment: Optional[str] = None
+    sentiment_score: Optional[float] = None
+    chinese_summary: Optional[str] = None
+    keywords: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    ai_processed: bool = False
+
+    class Config:
+        from_attributes = True
+
+class ArticleListResponse(BaseModel):
+    articles: List[ArticleResponse]
+    total: Optional[int] = None  # 游标模式下默认不统计总数
+    page: Optional[int] = None  # 游标模式下为空
+    page_size: int
+    next_cursor: Optional[str] = None  # 游标模式下获取下一页的游标，没有更多数据时为空
+
+class SearchResultResponse(ArticleResponse):
+    rank: Optional[float] = None  # BM25分数，越小越相关
+    snippet: Optional[str] = None  # 命中摘要HTML，命中词以<mark>标记
+
+class SearchResponse(BaseModel):
+    articles: List[SearchResultResponse]
+    total: int
+    page: int
+    page_size: int
+    query: str
+
+
+# 列表默认返回的字段：卡片视图需要的字段，不含正文
+LIST_FIELDS = (
+    "id", "source", "title", "link", "summary", "published", "author", "sentiment",
+    "sentiment_score", "chinese_summary", "keywords", "ai_processed"
+)
+
+
+# 辅助函数：将Article对象转换为响应模型，指定fields时只填充这些字段
+def article_to_response(article: Any, fields: Optional[tuple] = None) -> ArticleResponse:
+    if fields is not None:
+        return ArticleResponse(**{name: getattr(article, name) for name in fields})
+    return ArticleResponse(
+        id=article.id,
+        source=article.source,
+        title=article.title,
+        link=article.link,
+        summary=article.summary,
+        published=article.published,
+        content=article.content,
+        author=article.author,
+        sentiment=article.sentiment,
+        sentiment_score=article.sentiment_score,
+        chinese_summary=article.chinese_summary,
+        keywords=article.keywords,
+        created_at=article.created_at,
+        updated_at=article.updated_at,
+        ai_processed=article.ai_processed
+    )
+
+
+def article_to_dict(row: Any, fields: tuple = LIST_FIELDS) -> Dict[str, Any]:
+    """
+    快速路径：直接从查询行（Row或Article对象）构造可JSON序列化的字典，不创建响应模型对象
+
+    输出与 article_to_response(row, fields).model_dump(exclude_unset=True) 一致，
+    日期时间由序列化器按ISO格式输出
+    """
+    mapping = getattr(row, '_mapping', None)
+    if mapping is not None:
+        item = {name: mapping[name] for name in fields}
+    else:
+        item = {name: getattr(row, name) for name in fields}
+    if 'ai_processed' in item:
+        item['ai_processed'] = bool(item['ai_processed'])
+    return item
@@ -2,7 +2,16 @@
 let currentPage = 1;
 let pageSize = 10;
 let totalArticles = 0;
+let statsTotal = 0;         // /api/stats 返回的文章总数，无筛选时用作列表总数
+let loadedArticles = 0;     // 游标分页已加载的文章数
 let currentFilters = {};
+let nextCursor = null;      // 列表无限滚动的下一页游标
+let loadingMore = false;    // 是否正在加载下一页
+let eventSource = null;     // 实时事件流 (/api/stream)
+let refreshTimer = null;    // 数据变化后的合并刷新定时器
+const jobListeners = new Map();  // 任务ID -> 任务事件回调
+const finishedJobs = new Map();  // 已结束但尚无回调的任务，防止结束事件先于回调注册到达
+const PROCESS_BATCH_SIZE = 50;     // 处理任务每批认领的文章数（不超过服务端PROCESS_MAX_BATCH_SIZE）
 
 // DOM加载完成后执行
 document.addEventListener('DOMContentLoaded', function() {
@@ -33,6 +42,84 @@ async function initializePage() {
     
     // 加载文章列表
     await loadArticles();
+    initializeInfiniteScroll();
+    
+    // 订阅实时事件，数据变化时刷新，无需轮询
+    initializeEventStream();
+}
+
+// 订阅服务端实时事件流，浏览器断线后会自动重连并补发错过的事件
+function initializeEventStream() {
+    if (typeof EventSource === 'undefined') return;
+    eventSource = new EventSource('/api/stream');
+    ['article.ingested', 'article.analyzed', 'data.changed'].forEach(type => {
+        eventSource.addEventListener(type, scheduleRefresh);
+    });
+    ['job.started', 'job.progress', 'job.finished'].forEach(type => {
+        eventSource.addEventListener(type, e => dispatchJobEvent(type, JSON.parse(e.data)));
+    });
+}
+
+// 数据变化后合并刷新：短时间内的多个事件只刷新一次
+function scheduleRefresh() {
+    if (refreshTimer) return;
+    refreshTimer = setTimeout(async () => {
+        refreshTimer = null;
+        await loadStats();
+        // 只在列表顶部时刷新列表，避免打断阅读和无限滚动
+        if (window.scrollY < 200) {
+            await loadArticles();
+        }
+    }, 1000);
+}
+
+function dispatchJobEvent(type, data) {
+    const listener = jobListeners.get(data.job_id);
+    if (listener) {
+        listener(type, data);
+    } else if (type === 'job.finished') {
+        finishedJobs.set(data.job_id, data);
+        if (finishedJobs.size > 50) finishedJobs.delete(finishedJobs.keys().next().value);
+    }
+}
+
+// 等待后台任务结束，期间通过onEvent接收进度事件；事件流断开时退回低频查询任务状态
+function waitForJob(taskId, onEvent) {
+    return new Promise(resolve => {
+        let pollTimer = null;
+        const finish = (data) => {
+            jobListeners.delete(taskId);
+            clearInterval(pollTimer);
+            resolve(data);
+        };
+        if (finishedJobs.has(taskId)) {
+            const data = finishedJobs.get(taskId);
+            finishedJobs.delete(taskId);
+            finish(data);
+            return;
+        }
+        jobListeners.set(taskId, (type, data) => {
+            onEvent(type, data);
+            if (type === 'job.finished') finish(data);
+        });
+        pollTimer = setInterval(async () => {
+            if (eventSource && eventSource.readyState === EventSource.OPEN) return;
+            try {
+                const task = await fetchJSON(`/api/task-status?task_id=${encodeURIComponent(taskId)}`);
+                if (task.status && !['queued', 'running'].includes(task.status)) {
+                    finish({ job_id: taskId, status: task.status, detail: task.detail });
+                }
+            } catch (e) {
+                console.error('查询任务状态失败:', e);
+            }
+        }, 5000);
+    });
+}
+
+function setTaskProgress(bar, pct) {
+    bar.className = 'progress-bar';
+    bar.style.width = pct + '%';
+    bar.textContent = pct + '%';
 }
 
 // 绑定事件
@@ -119,6 +206,8 @@ async function loadStats() {
         
         // 更新统计卡片
         document.getElementById('total-articles').textContent = stats.total_articles || 0;
+        statsTotal = stats.total_articles || 0;
+        updateArticleCount();
         document.getElementById('positive-sentiment').textContent = stats.sentiment_stats.positive || 0;
         document.getElementById('negative-sentiment').textContent = stats.sentiment_stats.negative || 0;
         document.getElementById('neutral-sentiment').textContent = stats.sentiment_stats.neutral || 0;
@@ -158,26 +247,23 @@ async function handleProcessUnprocessed() {
         }
         status.textContent = `待处理 ${totalUnprocessed} 篇文章…`;
 
-        let processedSum = 0;
-        const batchSize = 10;
-        const maxLoops = Math.ceil(totalUnprocessed / batchSize) + 5;
-        for (let i = 0; i < maxLoops; i++) {
-            const resp = await fetch('/api/process-unprocessed', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ batch_size: batchSize, delay: 0 })
-            });
-            if (!resp.ok) throw new Error(`HTTP错误: ${resp.status} ${resp.statusText}`);
-            const data = await resp.json();
-            const processed = Number(data.processed || 0);
-            processedSum += processed;
-            const pct = Math.min(100, Math.round((processedSum / totalUnprocessed) * 100));
-            bar.className = 'progress-bar';
-            bar.style.width = pct + '%';
-            bar.textContent = pct + '%';
-            status.textContent = `已处理 ${processedSum}/${totalUnprocessed} 篇…`;
-            if (processed === 0 || processedSum >= totalUnprocessed) break;
+        // 触发一个分批循环处理的任务，直到积压清空；每批认领数量有上限，租约不会在处理中途过期
+        const resp = await fetch('/api/process-unprocessed', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ batch_size: Math.min(totalUnprocessed, PROCESS_BATCH_SIZE), delay: 0, drain: true })
+        });
+        if (!resp.ok) throw new Error(`HTTP错误: ${resp.status} ${resp.statusText}`);
+        const { task_id } = await resp.json();
+        const result = await waitForJob(task_id, (type, data) => {
+            if (type !== 'job.progress' || !data.total) return;
+            setTaskProgress(bar, Math.min(100, Math.round((data.done / data.total) * 100)));
+            status.textContent = `已处理 ${data.done}/${data.total} 篇（成功 ${data.success}，失败 ${data.failed}）…`;
+        });
+        if (result.status !== 'completed') {
+            throw new Error((result.detail && result.detail.error) || result.status);
         }
+        setTaskProgress(bar, 100);
         status.textContent = '处理完成，刷新数据…';
         await loadStats();
         await loadArticles();
@@ -213,11 +299,24 @@ async function handleFetchLatestProgress() {
     try {
         const resp = await fetch('/api/fetch-latest', { method: 'POST' });
         if (!resp.ok) throw new Error(`HTTP错误: ${resp.status} ${resp.statusText}`);
-        const data = await resp.json();
-        bar.className = 'progress-bar';
-        bar.style.width = '100%';
-        bar.textContent = '100%';
-        status.textContent = `抓取完成：文章总数 ${data.total_articles}，未处理 ${data.unprocessed_articles}`;
+        const { task_id } = await resp.json();
+        const stages = {
+            fetched: [50, data => `已抓取 ${data.fetched} 篇，其中新文章 ${data.new} 篇，正在提取正文…`],
+            extracted: [75, data => `正文提取完成，正在保存 ${data.new} 篇新文章…`],
+            saved: [100, data => `已保存 ${data.saved} 篇新文章`]
+        };
+        const result = await waitForJob(task_id, (type, data) => {
+            const stage = type === 'job.progress' && stages[data.stage];
+            if (!stage) return;
+            setTaskProgress(bar, stage[0]);
+            status.textContent = stage[1](data);
+        });
+        if (result.status !== 'completed') {
+            throw new Error((result.detail && result.detail.error) || result.status);
+        }
+        const detail = result.detail || {};
+        setTaskProgress(bar, 100);
+        status.textContent = `抓取完成：抓取 ${detail.fetched || 0} 篇，新增 ${detail.saved || 0} 篇`;
         await loadStats();
         await loadArticles();
     } catch (error) {
@@ -270,7 +369,8 @@ function applyFilters() {
         sentiment: document.getElementById('sentiment-filter').value,
         start_date: document.getElementById('start-date').value,
         end_date: document.getElementById('end-date').value,
-        ai_processed: document.getElementById('ai-processed-filter').value
+        ai_processed: document.getElementById('ai-processed-filter').value,
+        q: document.getElementById('search-query').value.trim()
     };
     
     // 重置页码
@@ -288,6 +388,7 @@ function resetFilters() {
     document.getElementById('start-date').value = '';
     document.getElementById('end-date').value = '';
     document.getElementById('ai-processed-filter').value = '';
+    document.getElementById('search-query').value = '';
     
     // 清空筛选条件
     currentFilters = {};
@@ -300,66 +401,156 @@ function resetFilters() {
 }
 
 // 加载文章列表
+function buildFilterParams() {
+    let params = '';
+    if (currentFilters.source) {
+        params += `&source=${encodeURIComponent(currentFilters.source)}`;
+    }
+    if (currentFilters.sentiment) {
+        params += `&sentiment=${encodeURIComponent(currentFilters.sentiment)}`;
+    }
+    if (currentFilters.start_date) {
+        params += `&start_date=${encodeURIComponent(currentFilters.start_date)}`;
+    }
+    if (currentFilters.end_date) {
+        params += `&end_date=${encodeURIComponent(currentFilters.end_date)}`;
+    }
+    if (currentFilters.ai_processed) {
+        params += `&ai_processed=${encodeURIComponent(currentFilters.ai_processed)}`;
+    }
+    return params;
+}
+
+async function fetchJSON(url) {
+    const response = await fetch(url);
+    const data = await response.json();
+    if (!response.ok) {
+        throw new Error(data.detail || response.statusText);
+    }
+    return data;
+}
+
 async function loadArticles() {
     // 显示加载中
     document.getElementById('loading').classList.remove('d-none');
     document.getElementById('articles-container').classList.add('d-none');
+    nextCursor = null;
+    updateLoadMore();
     
     try {
-        // 构建API URL
-        let url = `/api/articles?page=${currentPage}&page_size=${pageSize}`;
-        
-        // 添加筛选参数
-        if (currentFilters.source) {
-            url += `&source=${encodeURIComponent(currentFilters.source)}`;
-        }
-        if (currentFilters.sentiment) {
-            url += `&sentiment=${encodeURIComponent(currentFilters.sentiment)}`;
-        }
-        if (currentFilters.start_date) {
-            url += `&start_date=${encodeURIComponent(currentFilters.start_date)}`;
-        }
-        if (currentFilters.end_date) {
-            url += `&end_date=${encodeURIComponent(currentFilters.end_date)}`;
-        }
-        if (currentFilters.ai_processed !== '') {
-            url += `&ai_processed=${encodeURIComponent(currentFilters.ai_processed)}`;
-        }
-        
-        // 发送请求
-        const response = await fetch(url);
-        const data = await response.json();
-        
-        // 更新总文章数
-        totalArticles = data.total;
-        document.getElementById('article-count').textContent = `${totalArticles} 篇文章`;
+        // 有关键词时使用服务端全文搜索（按相关度排序、页码分页），否则使用游标分页并无限滚动
+        const url = currentFilters.q
+            ? `/api/search?q=${encodeURIComponent(currentFilters.q)}&page=${currentPage}&page_size=${pageSize}`
+            : `/api/articles?cursor=&page_size=${pageSize}`;
+        const data = await fetchJSON(url + buildFilterParams());
         
         // 确保articles数组存在
         const articles = data.articles || [];
+        // 搜索结果的总数用于分页；文章列表不请求总数（避免每次加载都执行COUNT）
+        totalArticles = data.total || 0;
+        loadedArticles = articles.length;
         
         // 渲染文章列表
         renderArticles(articles);
         
-        // 渲染分页
-        renderPagination();
+        // 搜索结果使用分页，文章列表滚动到底部时自动加载下一页
+        if (currentFilters.q) {
+            renderPagination();
+        } else {
+            document.querySelector('#pagination-container ul').innerHTML = '';
+            nextCursor = data.next_cursor || null;
+            updateLoadMore();
+        }
+        updateArticleCount();
         
         // 隐藏加载中，显示文章列表
         document.getElementById('loading').classList.add('d-none');
         document.getElementById('articles-container').classList.remove('d-none');
+        if (nextCursor && isLoadMoreVisible()) {
+            loadMoreArticles();
+        }
     } catch (error) {
         console.error('加载文章失败:', error);
         document.getElementById('loading').classList.add('d-none');
         document.getElementById('articles-container').innerHTML = `
             <div class="alert alert-danger">
-                加载文章失败: ${error.message}
+                加载文章失败: ${escapeHTML(error.message)}
             </div>
         `;
         document.getElementById('articles-container').classList.remove('d-none');
     }
 }
 
+// 更新列表标题的文章数：搜索显示结果总数，无筛选时显示 /api/stats 的总数，
+// 有筛选时显示已加载的篇数，还有下一页时加“+”
+function updateArticleCount() {
+    let count;
+    if (currentFilters.q) {
+        count = totalArticles;
+    } else if (!buildFilterParams()) {
+        count = statsTotal;
+    } else {
+        count = `${loadedArticles}${nextCursor ? '+' : ''}`;
+    }
+    document.getElementById('article-count').textContent = `${count} 篇文章`;
+}
+
+// 无限滚动：按游标加载下一页并追加到列表末尾
+async function loadMoreArticles() {
+    if (!nextCursor || loadingMore || currentFilters.q) return;
+    loadingMore = true;
+    updateLoadMore();
+    const cursor = nextCursor;
+    try {
+        const data = await fetchJSON(
+            `/api/articles?cursor=${encodeURIComponent(cursor)}&page_size=${pageSize}` + buildFilterParams()
+        );
+        // 加载期间筛选条件已改变时丢弃结果
+        if (cursor !== nextCursor) return;
+        renderArticles(data.articles || [], true);
+        loadedArticles += (data.articles || []).length;
+        nextCursor = data.next_cursor || null;
+        updateArticleCount();
+    } catch (error) {
+        console.error('加载更多文章失败:', error);
+    } finally {
+        loadingMore = false;
+        updateLoadMore();
+    }
+    // 追加后底部仍在视口内时（页面较短）继续加载，IntersectionObserver不会再次触发
+    if (nextCursor && isLoadMoreVisible()) {
+        loadMoreArticles();
+    }
+}
+
+function isLoadMoreVisible() {
+    const el = document.getElementById('load-more');
+    return !!el && !el.classList.contains('d-none') && el.getBoundingClientRect().top < window.innerHeight + 200;
+}
+
+// 更新列表底部“加载更多”区域的显示状态
+function updateLoadMore() {
+    const el = document.getElementById('load-more');
+    if (!el) return;
+    el.classList.toggle('d-none', !nextCursor);
+    const spinner = el.querySelector('.spinner-border');
+    if (spinner) spinner.classList.toggle('d-none', !loadingMore);
+}
+
+// 监听列表底部哨兵元素，进入视口时加载下一页
+function initializeInfiniteScroll() {
+    const sentinel = document.getElementById('load-more');
+    if (!sentinel || typeof IntersectionObserver === 'undefined') return;
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadMoreArticles();
+        }
+    }, { rootMargin: '200px' });
+    observer.observe(sentinel);
+}
+
 // 渲染文章列表
-function renderArticles(articles) {
+function renderArticles(articles, append = false) {
     const container = document.getElementById('articles-container');
     
     // 确保articles是一个数组
@@ -368,7 +559,7 @@ function renderArticles(articles) {
         articles = [];
     }
     
-    if (articles.length === 0) {
+    if (articles.length === 0 && !append) {
         container.innerHTML = `
             <div class="empty-state">
                 <i class="bi bi-inbox"></i>
@@ -385,10 +576,15 @@ function renderArticles(articles) {
         articlesHTML += createArticleCard(article);
     });
     
-    container.innerHTML = articlesHTML;
+    if (append) {
+        container.insertAdjacentHTML('beforeend', articlesHTML);
+    } else {
+        container.innerHTML = articlesHTML;
+    }
     
-    // 绑定文章卡片点击事件
-    document.querySelectorAll('.article-card').forEach(card => {
+    // 绑定文章卡片点击事件（追加时只绑定新卡片）
+    container.querySelectorAll('.article-card:not([data-bound])').forEach(card => {
+        card.setAttribute('data-bound', '1');
         card.addEventListener('click', function() {
             const articleId = this.getAttribute('data-article-id');
             console.log('点击文章卡片, ID:', articleId);
@@ -440,7 +636,7 @@ function createArticleCard(article) {
                 </div>
                 
                 <div class="article-summary">
-                    ${escapeHTML(article.summary || '无摘要')}
+                    ${article.snippet ? article.snippet : escapeHTML(article.summary || '无摘要')}
                 </div>
                 
                 ${article.chinese_summary ? `